@@ -28,8 +28,12 @@ Optimized (i.e., production-ready) Alignment Algorithms
    :toctree: generated/
 
    StripedSmithWaterman
+   StripedSmithWatermanCache
    AlignmentStructure
    local_pairwise_align_ssw
+   local_pairwise_score_ssw
+   local_pairwise_scores_ssw
+   local_pairwise_distance_ssw
 
 Slow (i.e., educational-purposes only) Alignment Algorithms
 -----------------------------------------------------------
@@ -216,16 +220,21 @@ from ._pairwise import (
     local_pairwise_align_nucleotide, local_pairwise_align_protein,
     local_pairwise_align, global_pairwise_align_nucleotide,
     global_pairwise_align_protein, global_pairwise_align,
-    make_identity_substitution_matrix, local_pairwise_align_ssw
+    make_identity_substitution_matrix, local_pairwise_align_ssw,
+    local_pairwise_score_ssw, local_pairwise_scores_ssw,
+    local_pairwise_distance_ssw, StripedSmithWatermanCache
 )
 from skbio.alignment._ssw_wrapper import (
     StripedSmithWaterman, AlignmentStructure)
 from ._exception import (SequenceCollectionError, AlignmentError)
 
 __all__ = ['TabularMSA', 'Alignment', 'SequenceCollection',
-           'StripedSmithWaterman', 'AlignmentStructure',
-           'local_pairwise_align_ssw', 'SequenceCollectionError',
-           'AlignmentError', 'global_pairwise_align',
+           'StripedSmithWaterman', 'StripedSmithWatermanCache',
+           'AlignmentStructure', 'local_pairwise_align_ssw',
+           'local_pairwise_score_ssw', 'local_pairwise_scores_ssw',
+           'local_pairwise_distance_ssw',
+           'SequenceCollectionError', 'AlignmentError',
+           'global_pairwise_align',
            'global_pairwise_align_nucleotide', 'global_pairwise_align_protein',
            'local_pairwise_align', 'local_pairwise_align_nucleotide',
            'local_pairwise_align_protein', 'make_identity_substitution_matrix']
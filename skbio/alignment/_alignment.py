@@ -8,9 +8,9 @@
 
 from __future__ import absolute_import, division, print_function
 from future.builtins import zip, range
-from future.utils import viewkeys, viewitems
 
 from collections import Counter, defaultdict
+import numbers
 
 import numpy as np
 from scipy.stats import entropy
@@ -20,6 +20,9 @@ from skbio._base import SkbioObject
 from skbio.sequence import Sequence
 from skbio.stats.distance import DistanceMatrix
 from ._exception import (SequenceCollectionError, AlignmentError)
+from ._utils import (_stack_bytes, _position_counts,
+                     _count_codes_per_sequence, _hamming_distances,
+                     _p_distances, _kmer_distances)
 from skbio.util._decorator import experimental, deprecated
 
 
@@ -318,6 +321,58 @@ class SequenceCollection(SkbioObject):
                 dm[i, j] = dm[j, i] = self_i.distance(self[j], distance_fn)
         return DistanceMatrix(dm, ids)
 
+    @experimental(as_of="0.4.0-dev")
+    def kmer_distances(self, k):
+        """Compute k-mer distances between all pairs of sequences
+
+        Parameters
+        ----------
+        k : int
+            The length of the k-mers.
+
+        Returns
+        -------
+        skbio.DistanceMatrix
+            Matrix containing the k-mer distances between all pairs of
+            sequences.
+
+        Raises
+        ------
+        ValueError
+            If `k` is less than 1 or if any sequence is shorter than `k`.
+
+        See Also
+        --------
+        kmer_frequencies
+
+        Notes
+        -----
+        The k-mer distance between two sequences is the Jaccard distance
+        between their sets of (overlapping) k-mers, that is, the fraction of
+        the distinct k-mers found in either sequence that are not found in
+        both. Sequences do not need to be aligned or of equal length.
+
+        All distances are computed at once from a sparse matrix of k-mer
+        occurrences instead of comparing each pair of sequences separately.
+
+        Examples
+        --------
+        >>> from skbio import SequenceCollection
+        >>> from skbio import DNA
+        >>> sequences = [DNA('ACCGT', metadata={'id': "seq1"}),
+        ...              DNA('AACCGGT', metadata={'id': "seq2"})]
+        >>> s1 = SequenceCollection(sequences)
+        >>> print(s1.kmer_distances(k=2))
+        2x2 distance matrix
+        IDs:
+        'seq1', 'seq2'
+        Data:
+        [[ 0.          0.33333333]
+         [ 0.33333333  0.        ]]
+
+        """
+        return DistanceMatrix(_kmer_distances(self._data, k), self.ids())
+
     @experimental(as_of="0.4.0")
     def distribution_stats(self, center_f=np.mean, spread_f=np.std):
         r"""Return sequence count, and center and spread of sequence lengths
@@ -716,7 +771,10 @@ class Alignment(SequenceCollection):
     -----
     By definition, all of the sequences in an alignment must be of the same
     length. For this reason, an alignment can be thought of as a matrix of
-    sequences (rows) by positions (columns).
+    sequences (rows) by positions (columns). Position-wise statistics (e.g.,
+    ``position_counters`` and ``majority_consensus``) are computed from such a
+    matrix of the sequences' bytes, which is built the first time it is needed
+    and reused afterwards.
 
     See Also
     --------
@@ -750,28 +808,58 @@ class Alignment(SequenceCollection):
         else:
             self._score = None
         self._start_end_positions = start_end_positions
+        self._bytes_matrix = None
 
     @experimental(as_of="0.4.0")
-    def distances(self, distance_fn=None):
+    def distances(self, distance_fn=None, n_jobs=1):
         """Compute distances between all pairs of sequences
 
         Parameters
         ----------
-        distance_fn : function, optional
+        distance_fn : function or str, optional
             Function for computing the distance between a pair of sequences.
             This must take two sequences as input (as `skbio.Sequence` objects)
-            and return a single integer or float value. Defaults to the default
-            distance function used by `skbio.Sequence.distance`.
+            and return a single integer or float value. Alternatively, the name
+            of a built-in distance: ``'hamming'`` or ``'p-distance'`` (see
+            Notes). Defaults to ``'hamming'``, which is the default distance
+            function used by `skbio.Sequence.distance`.
+        n_jobs : int, optional
+            Number of threads used to compute a built-in distance. If -1, all
+            CPUs are used. Ignored if `distance_fn` is a function.
 
         Returns
         -------
         skbio.DistanceMatrix
             Matrix containing the distances between all pairs of sequences.
 
+        Raises
+        ------
+        ValueError
+            If `distance_fn` is not a function or the name of a built-in
+            distance.
+        ValueError
+            If ``distance_fn='p-distance'`` and a pair of sequences has no
+            positions where neither of them has a gap.
+
         See Also
         --------
         skbio.Sequence.distance
 
+        Notes
+        -----
+        The Hamming distance between two aligned sequences is the proportion of
+        positions at which their characters differ. Gaps are compared like any
+        other character.
+
+        The p-distance is the proportion of positions at which the characters
+        of two aligned sequences differ, only considering the positions at
+        which neither sequence has a gap (i.e., pairwise deletion).
+
+        Built-in distances are computed for all pairs of sequences at once from
+        the alignment's matrix of bytes, in blocks of sequences that can be
+        distributed over `n_jobs` threads. A function passed as `distance_fn`
+        is called once for every pair of sequences.
+
         Examples
         --------
         >>> from skbio import Alignment
@@ -789,8 +877,33 @@ class Alignment(SequenceCollection):
          [ 0.42857143  0.          0.42857143]
          [ 0.28571429  0.42857143  0.        ]]
 
+        Ignore positions with gaps in either sequence:
+
+        >>> print(a1.distances('p-distance'))
+        3x3 distance matrix
+        IDs:
+        's1', 's2', 's3'
+        Data:
+        [[ 0.          0.          0.16666667]
+         [ 0.          0.          0.2       ]
+         [ 0.16666667  0.2         0.        ]]
+
         """
-        return super(Alignment, self).distances(distance_fn)
+        if distance_fn is None:
+            distance_fn = 'hamming'
+        if callable(distance_fn):
+            return super(Alignment, self).distances(distance_fn)
+
+        if distance_fn == 'hamming':
+            distances = _hamming_distances(self._bytes, n_jobs=n_jobs)
+        elif distance_fn == 'p-distance':
+            gap_codes = self[0]._gap_codes if self._data else []
+            distances = _p_distances(self._bytes, gap_codes, n_jobs=n_jobs)
+        else:
+            raise ValueError(
+                "`distance_fn` must be a function, 'hamming' or "
+                "'p-distance', not %r." % distance_fn)
+        return DistanceMatrix(distances, self.ids())
 
     @experimental(as_of="0.4.0")
     def score(self):
@@ -851,7 +964,8 @@ class Alignment(SequenceCollection):
         seqs_to_keep : list, optional
             A list of sequence ids to be retained in the resulting
             `Alignment`. If this is not passed, the default will be to retain
-            all sequences.
+            all sequences. Integers (and integral floats) also match the
+            sequence at that index, but booleans don't.
         positions_to_keep : list, optional
             A list of position indices to be retained in the resulting
             `Alignment`. If this is not passed, the default will be to retain
@@ -893,6 +1007,9 @@ class Alignment(SequenceCollection):
         <Alignment: n=2; mean +/- std length=4.00 +/- 0.00>
 
         """
+        sequence_count = self.sequence_count()
+        sequence_length = self.sequence_length()
+
         # if seqs_to_keep was not passed
         if seqs_to_keep is None:
             # and invert_seqs_to_keep is True
@@ -900,26 +1017,29 @@ class Alignment(SequenceCollection):
                 # return an empty alignment (because we're inverting the
                 # default of keeping all sequences)
                 return self.__class__([])
-            # else if invert_seqs_to_keep is False
-            else:
-                # default to returning all sequences
-                def keep_seq(i, id):
-                    return True
+            # else if invert_seqs_to_keep is False, default to returning all
+            # sequences
+            seq_mask = np.ones(sequence_count, dtype=bool)
         # else, if seqs_to_keep was passed
         else:
-            seqs_to_keep = set(seqs_to_keep)
-            # and invert_seqs_to_keep is True
+            # sequences can be identified either by id or by index
+            seq_mask = np.zeros(sequence_count, dtype=bool)
+            for seq_to_keep in set(seqs_to_keep):
+                index = self._id_to_index.get(seq_to_keep)
+                if index is not None:
+                    seq_mask[index] = True
+                # indices match by equality (e.g., 1.0 is index 1), but bools
+                # aren't indices
+                if (isinstance(seq_to_keep, numbers.Real) and
+                        not isinstance(seq_to_keep, (bool, np.bool_)) and
+                        np.isfinite(seq_to_keep) and
+                        seq_to_keep == int(seq_to_keep) and
+                        0 <= seq_to_keep < sequence_count):
+                    seq_mask[int(seq_to_keep)] = True
+            # and invert_seqs_to_keep is True, keep only sequences that were
+            # not listed in seqs_to_keep
             if invert_seqs_to_keep:
-                # keep only sequences that were not listed in seqs_to_keep
-                def keep_seq(i, id):
-                    return not (id in seqs_to_keep or
-                                i in seqs_to_keep)
-            # else if invert_seqs_to_keep is False
-            else:
-                # keep only sequences that were listed in seqs_to_keep
-                def keep_seq(i, id):
-                    return (id in seqs_to_keep or
-                            i in seqs_to_keep)
+                seq_mask = ~seq_mask
 
         # if positions_to_keep was not passed
         if positions_to_keep is None:
@@ -928,43 +1048,19 @@ class Alignment(SequenceCollection):
                 # return an empty alignment (because we're inverting the
                 # default of keeping all positions)
                 return self.__class__([])
-            # else if invert_positions_to_keep is False
-            else:
-                # default to returning all positions
-                def keep_position(pos):
-                    return True
+            # else if invert_positions_to_keep is False, default to returning
+            # all positions
+            position_mask = np.ones(sequence_length, dtype=bool)
         # else, if positions_to_keep was passed
         else:
-            positions_to_keep = set(positions_to_keep)
-            # and invert_positions_to_keep is True
+            position_mask = np.in1d(np.arange(sequence_length),
+                                    list(positions_to_keep))
+            # and invert_positions_to_keep is True, keep only positions that
+            # were not listed in positions_to_keep
             if invert_positions_to_keep:
-                # keep only positions that were not listed in
-                # positions_to_keep
-                def keep_position(pos):
-                    return pos not in positions_to_keep
-            # else if invert_positions_to_keep is False
-            else:
-                # keep only sequences that were listed in positions_to_keep
-                def keep_position(pos):
-                    return pos in positions_to_keep
+                position_mask = ~position_mask
 
-        # prep the result object
-        result = []
-        # indices to keep
-        indices = [
-            i for i in range(self.sequence_length()) if keep_position(i)]
-        # iterate over sequences
-        for sequence_index, seq in enumerate(self):
-            # determine if we're keeping the current sequence
-            if keep_seq(sequence_index, seq.metadata['id']):
-                # slice the current sequence with the indices
-                result.append(seq[indices])
-            # if we're not keeping the current sequence, move on to the next
-            else:
-                continue
-        # pack the result up in the same type of object as the current object
-        # and return it
-        return self.__class__(result)
+        return self._subalignment(seq_mask, position_mask)
 
     @experimental(as_of="0.4.0")
     def iter_positions(self, constructor=None):
@@ -1033,6 +1129,14 @@ class Alignment(SequenceCollection):
         ['-', 'T']
 
         """
+        if constructor is str:
+            # each character can be taken straight from the byte matrix
+            # without creating intermediate sequence objects
+            matrix = self._bytes
+            for i in range(self.sequence_length()):
+                yield list(matrix[:, i].tostring().decode('ascii'))
+            return
+
         if constructor is None:
             def constructor(s):
                 return s
@@ -1083,15 +1187,13 @@ class Alignment(SequenceCollection):
 
         """
         if self.is_empty():
-            seq_constructor = Sequence
-        else:
-            seq_constructor = self[0].__class__
+            return Sequence('')
+        seq_constructor = self[0].__class__
 
-        # Counter.most_common returns an ordered list of the n most common
-        # (sequence, count) items in Counter. Here we set n=1, and take only
-        # the character, not the count.
-        return seq_constructor(''.join(c.most_common(1)[0][0]
-                               for c in self.position_counters()))
+        codes, counts = _position_counts(self._bytes)
+        if counts.size == 0:
+            return seq_constructor('')
+        return seq_constructor(codes[counts.argmax(axis=1)])
 
     @experimental(as_of="0.4.0")
     def omit_gap_positions(self, maximum_gap_frequency):
@@ -1134,15 +1236,13 @@ class Alignment(SequenceCollection):
         if self.is_empty():
             return self.__class__([])
 
-        position_frequencies = self.position_frequencies()
-        gap_chars = self[0].gap_chars
+        codes, counts = _position_counts(self._bytes)
+        is_gap = np.in1d(codes, self[0]._gap_codes)
+        gap_frequencies = counts[:, is_gap].sum(axis=1) / self.sequence_count()
 
-        positions_to_keep = []
-        for i, f in enumerate(position_frequencies):
-            gap_frequency = sum([f[c] if c in f else 0.0 for c in gap_chars])
-            if gap_frequency <= maximum_gap_frequency:
-                positions_to_keep.append(i)
-        return self.subalignment(positions_to_keep=positions_to_keep)
+        seq_mask = np.ones(self.sequence_count(), dtype=bool)
+        return self._subalignment(
+            seq_mask, gap_frequencies <= maximum_gap_frequency)
 
     @experimental(as_of="0.4.0")
     def omit_gap_sequences(self, maximum_gap_frequency):
@@ -1183,14 +1283,17 @@ class Alignment(SequenceCollection):
         if self.is_empty():
             return self.__class__([])
 
-        base_frequencies = self.kmer_frequencies(k=1, relative=True)
-        gap_chars = self[0].gap_chars
-        seqs_to_keep = []
-        for seq, f in zip(self, base_frequencies):
-            gap_frequency = sum([f[c] if c in f else 0.0 for c in gap_chars])
-            if gap_frequency <= maximum_gap_frequency:
-                seqs_to_keep.append(seq.metadata['id'])
-        return self.subalignment(seqs_to_keep=seqs_to_keep)
+        sequence_length = self.sequence_length()
+        gap_counts = _count_codes_per_sequence(self._bytes,
+                                               self[0]._gap_codes)
+        if sequence_length == 0:
+            gap_frequencies = np.zeros(self.sequence_count())
+        else:
+            gap_frequencies = gap_counts / sequence_length
+
+        position_mask = np.ones(sequence_length, dtype=bool)
+        return self._subalignment(
+            gap_frequencies <= maximum_gap_frequency, position_mask)
 
     @experimental(as_of="0.4.0")
     def position_counters(self):
@@ -1223,7 +1326,14 @@ class Alignment(SequenceCollection):
         Counter({'C': 2, '-': 1})
 
         """
-        return [Counter(p) for p in self.iter_positions(constructor=str)]
+        chars, counts = self._position_counts()
+        result = []
+        for position_counts in counts:
+            observed = position_counts.nonzero()[0]
+            result.append(Counter(dict(
+                zip([chars[i] for i in observed],
+                    position_counts[observed].tolist()))))
+        return result
 
     @experimental(as_of="0.4.0")
     def position_frequencies(self):
@@ -1257,13 +1367,14 @@ class Alignment(SequenceCollection):
         0.0
 
         """
-        seq_count = self.sequence_count()
+        chars, counts = self._position_counts()
+        frequencies = counts / self.sequence_count()
         result = []
-        for pos_counter in self.position_counters():
-            freqs = defaultdict(float)
-            for char, count in viewitems(pos_counter):
-                freqs[char] = count / seq_count
-            result.append(freqs)
+        for position_counts, position_frequencies in zip(counts, frequencies):
+            observed = position_counts.nonzero()[0]
+            result.append(defaultdict(
+                float, zip([chars[i] for i in observed],
+                           position_frequencies[observed].tolist())))
         return result
 
     @experimental(as_of="0.4.0")
@@ -1317,19 +1428,21 @@ class Alignment(SequenceCollection):
         [0.56233514461880829, 1.3862943611198906, nan, nan]
 
         """
-        result = []
         # handle empty Alignment case
         if self.is_empty():
-            return result
+            return []
 
-        iupac_standard_characters = self[0].nondegenerate_chars
-        for f in self.position_frequencies():
-            if (nan_on_non_standard_chars and
-                    len(viewkeys(f) - iupac_standard_characters) > 0):
-                result.append(np.nan)
-            else:
-                result.append(entropy(list(f.values()), base=base))
-        return result
+        chars, counts = self._position_counts()
+        if counts.size == 0:
+            return []
+
+        result = entropy(counts.T / self.sequence_count(), base=base)
+        if nan_on_non_standard_chars:
+            iupac_standard_characters = self[0].nondegenerate_chars
+            non_standard = np.asarray(
+                [c not in iupac_standard_characters for c in chars])
+            result[(counts[:, non_standard] > 0).any(axis=1)] = np.nan
+        return list(result)
 
     @experimental(as_of="0.4.0")
     def sequence_length(self):
@@ -1363,6 +1476,34 @@ class Alignment(SequenceCollection):
         else:
             return len(self._data[0])
 
+    @property
+    def _bytes(self):
+        """Sequences (rows) by positions (columns) matrix of bytes"""
+        if self._bytes_matrix is None:
+            self._bytes_matrix = _stack_bytes(self._data,
+                                              self.sequence_length())
+        return self._bytes_matrix
+
+    def _position_counts(self):
+        """Return observed characters and their counts at each position"""
+        codes, counts = _position_counts(self._bytes)
+        return codes.tostring().decode('ascii'), counts
+
+    def _subalignment(self, seq_mask, position_mask):
+        """Return subalignment given boolean sequence and position masks"""
+        positions = np.flatnonzero(position_mask)
+        if positions.size == 0:
+            # an empty list of positions
+            index = positions
+        elif positions[-1] - positions[0] + 1 == positions.size:
+            # contiguous positions: slicing shares the underlying bytes
+            index = slice(positions[0], positions[-1] + 1)
+        else:
+            index = position_mask
+
+        result = [self._data[i][index] for i in np.flatnonzero(seq_mask)]
+        return self.__class__(result)
+
     def _validate_lengths(self):
         """Return ``True`` if all sequences same length, ``False`` otherwise
         """
@@ -9,6 +9,7 @@
 from __future__ import absolute_import, division, print_function
 from warnings import warn
 from itertools import product
+from collections import OrderedDict
 
 import numpy as np
 from future.builtins import range, zip
@@ -578,7 +579,7 @@ def global_pairwise_align(seq1, seq2, gap_open_penalty, gap_extend_penalty,
 
 @experimental(as_of="0.4.0")
 def local_pairwise_align_ssw(sequence1, sequence2, constructor=Sequence,
-                             **kwargs):
+                             profile_cache=None, **kwargs):
     """Align query and target sequences with Striped Smith-Waterman.
 
     Parameters
@@ -589,6 +590,12 @@ def local_pairwise_align_ssw(sequence1, sequence2, constructor=Sequence,
         The second unaligned sequence
     constructor : Sequence subclass
         A constructor to use if `protein` is not True.
+    profile_cache : StripedSmithWatermanCache, optional
+        If provided, the query profile is looked up in (and added to)
+        `profile_cache` instead of being rebuilt on every call. If the cache
+        was created with ``reverse=True``, the profile is built from
+        `sequence2` instead of `sequence1`; the returned alignment is laid out
+        the same way in both cases.
 
     Returns
     -------
@@ -627,7 +634,11 @@ def local_pairwise_align_ssw(sequence1, sequence2, constructor=Sequence,
     if isinstance(sequence1, Protein):
         kwargs['protein'] = True
 
-    query = StripedSmithWaterman(str(sequence1), **kwargs)
+    reverse = profile_cache is not None and profile_cache.reverse
+    if reverse:
+        sequence1, sequence2 = sequence2, sequence1
+
+    query = _get_ssw_profile(sequence1, profile_cache, kwargs)
     alignment = query(str(sequence2))
 
     # If there is no cigar, then it has failed a filter. Return None.
@@ -640,25 +651,351 @@ def local_pairwise_align_ssw(sequence1, sequence2, constructor=Sequence,
             (alignment.query_begin, alignment.query_end),
             (alignment.target_begin, alignment.target_end_optimal)
         ]
+    aligned = [alignment.aligned_query_sequence,
+               alignment.aligned_target_sequence]
+    if reverse:
+        aligned.reverse()
+        if start_end is not None:
+            start_end.reverse()
+
     if kwargs.get('protein', False):
-        seqs = [
-            Protein(alignment.aligned_query_sequence,
-                    metadata={'id': 'query'}),
-            Protein(alignment.aligned_target_sequence,
-                    metadata={'id': 'target'})
-        ]
-    else:
-        seqs = [
-            constructor(alignment.aligned_query_sequence,
-                        metadata={'id': 'query'}),
-            constructor(alignment.aligned_target_sequence,
-                        metadata={'id': 'target'})
-        ]
+        constructor = Protein
+    seqs = [
+        constructor(aligned[0], metadata={'id': 'query'}),
+        constructor(aligned[1], metadata={'id': 'target'})
+    ]
 
     return Alignment(seqs, score=alignment.optimal_alignment_score,
                      start_end_positions=start_end)
 
 
+@experimental(as_of="0.4.0-dev")
+def local_pairwise_score_ssw(sequence1, sequence2, profile_cache=None,
+                             **kwargs):
+    """Compute the Striped Smith-Waterman score of two sequences.
+
+    Unlike ``local_pairwise_align_ssw``, no traceback is performed and no
+    sequence or ``Alignment`` objects are created, making this function
+    suitable for filtering or as a similarity kernel. Scores are
+    similarities; use ``local_pairwise_distance_ssw`` to compute distances
+    (e.g., with ``DistanceMatrix.from_iterable``).
+
+    Parameters
+    ----------
+    sequence1 : str or Sequence
+        The first unaligned sequence
+    sequence2 : str or Sequence
+        The second unaligned sequence
+    profile_cache : StripedSmithWatermanCache, optional
+        If provided, the query profile is looked up in (and added to)
+        `profile_cache` instead of being rebuilt on every call.
+
+    Returns
+    -------
+    int
+        The optimal local alignment score.
+
+    See Also
+    --------
+    local_pairwise_align_ssw
+    local_pairwise_scores_ssw
+    local_pairwise_distance_ssw
+    StripedSmithWaterman
+
+    Notes
+    -----
+    For a complete list of optional keyword-arguments that can be provided,
+    see ``skbio.alignment.StripedSmithWaterman``.
+
+    The following kwargs will not have any effect: `score_only`,
+    `suppress_sequences`, `score_filter`, `distance_filter` and
+    `override_skip_babp`
+
+    Examples
+    --------
+    >>> from skbio.alignment import local_pairwise_score_ssw
+    >>> local_pairwise_score_ssw('ACTAAGGCTCTCTACCCCTCTCAGAGA',
+    ...                          'ACTAAGGCTCCTAACCCCCTTTTCTCAGA')
+    27
+
+    """
+    kwargs = _ssw_score_only_kwargs(sequence1, kwargs)
+    if profile_cache is not None and profile_cache.reverse:
+        sequence1, sequence2 = sequence2, sequence1
+
+    query = _get_ssw_profile(sequence1, profile_cache, kwargs)
+    return query(str(sequence2)).optimal_alignment_score
+
+
+@experimental(as_of="0.4.0-dev")
+def local_pairwise_scores_ssw(query, targets, profile_cache=None, **kwargs):
+    """Compute Striped Smith-Waterman scores of a query against many targets.
+
+    Parameters
+    ----------
+    query : str or Sequence
+        The unaligned query sequence. Its profile is built once and reused
+        for all `targets`.
+    targets : iterable of str or Sequence
+        The unaligned target sequences.
+    profile_cache : StripedSmithWatermanCache, optional
+        If provided, the query profile is looked up in (and added to)
+        `profile_cache` instead of being rebuilt on every call. If the cache
+        was created with ``reverse=True``, the profile of each target is
+        looked up instead.
+
+    Returns
+    -------
+    1D np.ndarray (int)
+        The optimal local alignment score of `query` against each target, in
+        the order of `targets`.
+
+    See Also
+    --------
+    local_pairwise_score_ssw
+    StripedSmithWaterman
+
+    Notes
+    -----
+    For a complete list of optional keyword-arguments that can be provided,
+    see ``skbio.alignment.StripedSmithWaterman``.
+
+    The following kwargs will not have any effect: `score_only`,
+    `suppress_sequences`, `score_filter`, `distance_filter` and
+    `override_skip_babp`
+
+    Examples
+    --------
+    >>> from skbio.alignment import local_pairwise_scores_ssw
+    >>> local_pairwise_scores_ssw('ACTAAGGCTCTC',
+    ...                           ['ACTAAGGCTCTCTACCCCTCTCAGAGA',
+    ...                            'TTTTTTTT'])
+    array([24,  2])
+
+    """
+    kwargs = _ssw_score_only_kwargs(query, kwargs)
+    if profile_cache is not None and profile_cache.reverse:
+        query = str(query)
+        return np.fromiter(
+            (_get_ssw_profile(target, profile_cache, kwargs)(
+                query).optimal_alignment_score for target in targets),
+            dtype=int)
+
+    profile = _get_ssw_profile(query, profile_cache, kwargs)
+    return np.fromiter((profile(str(target)).optimal_alignment_score
+                        for target in targets), dtype=int)
+
+
+@experimental(as_of="0.4.0-dev")
+def local_pairwise_distance_ssw(sequence1, sequence2, profile_cache=None,
+                                **kwargs):
+    """Compute a distance between two sequences from their SSW scores.
+
+    The distance is ``1 - score / min(self_score1, self_score2)``, where
+    ``score`` is the Striped Smith-Waterman score of the two sequences and
+    ``self_score1`` and ``self_score2`` are the scores of each sequence
+    aligned with itself. It is zero for identical sequences and one for
+    sequences without any positive-scoring local alignment.
+
+    Parameters
+    ----------
+    sequence1 : str or Sequence
+        The first unaligned sequence
+    sequence2 : str or Sequence
+        The second unaligned sequence
+    profile_cache : StripedSmithWatermanCache, optional
+        If provided, profiles are looked up in (and added to) `profile_cache`
+        instead of being rebuilt on every call. Passing the same cache to
+        all calls of an all-vs-all comparison builds each sequence's profile
+        once.
+
+    Returns
+    -------
+    float
+        The distance between `sequence1` and `sequence2`, between zero and
+        one.
+
+    See Also
+    --------
+    local_pairwise_score_ssw
+    skbio.DistanceMatrix.from_iterable
+
+    Notes
+    -----
+    Dividing by the smaller self-score makes the distance symmetric, and it
+    is zero if one sequence is contained in the other. It is clipped at zero
+    for substitution matrices that score some mismatches higher than
+    matches.
+
+    Each call computes three scores. For a complete list of optional
+    keyword-arguments that can be provided, see
+    ``skbio.alignment.StripedSmithWaterman``.
+
+    Examples
+    --------
+    >>> from functools import partial
+    >>> from skbio import DistanceMatrix
+    >>> from skbio.alignment import (local_pairwise_distance_ssw,
+    ...                              StripedSmithWatermanCache)
+    >>> seqs = ['ACTAAGGCTCTCTACCCCTCTCAGAGA',
+    ...         'ACTAAGGCTCCTAACCCCCTTTTCTCAGA',
+    ...         'TTTTTTTTTTTT']
+    >>> metric = partial(local_pairwise_distance_ssw,
+    ...                  profile_cache=StripedSmithWatermanCache())
+    >>> dm = DistanceMatrix.from_iterable(seqs, metric)
+    >>> print(dm.data.round(3))
+    [[ 0.     0.5    0.917]
+     [ 0.5    0.     0.667]
+     [ 0.917  0.667  0.   ]]
+
+    """
+    score = local_pairwise_score_ssw(sequence1, sequence2, profile_cache,
+                                     **kwargs)
+    self_score = min(
+        local_pairwise_score_ssw(sequence1, sequence1, profile_cache,
+                                 **kwargs),
+        local_pairwise_score_ssw(sequence2, sequence2, profile_cache,
+                                 **kwargs))
+    return max(0.0, 1 - score / self_score)
+
+
+def _ssw_score_only_kwargs(sequence, kwargs):
+    kwargs = dict(kwargs)
+    for name in ('score_filter', 'distance_filter', 'override_skip_babp'):
+        kwargs.pop(name, None)
+    kwargs['score_only'] = True
+    kwargs['suppress_sequences'] = True
+    if isinstance(sequence, Protein):
+        kwargs['protein'] = True
+    return kwargs
+
+
+def _get_ssw_profile(sequence, profile_cache, kwargs):
+    if profile_cache is None:
+        return StripedSmithWaterman(str(sequence), **kwargs)
+    return profile_cache.get(str(sequence), **kwargs)
+
+
+class StripedSmithWatermanCache(object):
+    """Least-recently-used cache of ``StripedSmithWaterman`` profiles.
+
+    Building a ``StripedSmithWaterman`` object computes the query profile and
+    converts the substitution matrix, which dominates the cost of aligning a
+    short query against a single target. Passing the same cache to repeated
+    ``local_pairwise_align_ssw`` calls reuses those profiles.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of profiles kept in the cache. When the cache is full,
+        the least recently used profile is discarded.
+    reverse : bool, optional
+        If ``True``, ``local_pairwise_align_ssw`` builds (and caches) profiles
+        from its second sequence rather than its first. This is useful in
+        all-vs-all jobs where a small set of reference sequences is aligned
+        against many queries.
+
+    Raises
+    ------
+    ValueError
+        If `maxsize` is less than 1.
+
+    See Also
+    --------
+    local_pairwise_align_ssw
+    StripedSmithWaterman
+
+    Notes
+    -----
+    Profiles are keyed by the profile sequence together with all keyword
+    arguments passed to ``StripedSmithWaterman`` (e.g., gap penalties, match
+    and mismatch scores, the substitution matrix and the `protein` flag), so a
+    single cache may be shared between calls using different scoring schemes.
+
+    When `reverse` is ``True`` the roles of query and target are swapped in
+    the underlying SSW call. Alignment scores are unaffected for symmetric
+    substitution matrices, but tied optimal alignments may be reported with a
+    different layout, and an automatic `mask_length` is derived from the
+    length of the second sequence.
+
+    Examples
+    --------
+    >>> from skbio.alignment import (local_pairwise_align_ssw,
+    ...                              StripedSmithWatermanCache)
+    >>> cache = StripedSmithWatermanCache(maxsize=16)
+    >>> targets = ['ACTAAGGCTCTCTACCCCTCTCAGAGA', 'ACTAAGGCTCCTAACCCCCTTTTCTC']
+    >>> for target in targets:
+    ...     aln = local_pairwise_align_ssw('ACTAAGGCTCTC', target,
+    ...                                    profile_cache=cache)
+    >>> len(cache)
+    1
+    >>> cache.hits, cache.misses
+    (1, 1)
+
+    """
+
+    @experimental(as_of="0.4.0-dev")
+    def __init__(self, maxsize=128, reverse=False):
+        if maxsize < 1:
+            raise ValueError("`maxsize` must be at least 1, not %r." % maxsize)
+        self.maxsize = maxsize
+        self.reverse = reverse
+        self.hits = 0
+        self.misses = 0
+        self._profiles = OrderedDict()
+
+    @experimental(as_of="0.4.0-dev")
+    def __len__(self):
+        return len(self._profiles)
+
+    @experimental(as_of="0.4.0-dev")
+    def get(self, sequence, **kwargs):
+        """Return a (possibly cached) ``StripedSmithWaterman`` profile.
+
+        Parameters
+        ----------
+        sequence : str
+            Sequence from which the profile is built.
+        kwargs : dict
+            Keyword arguments passed to ``StripedSmithWaterman``.
+
+        Returns
+        -------
+        StripedSmithWaterman
+            Profile for `sequence` built with `kwargs`.
+
+        """
+        key = self._make_key(sequence, kwargs)
+        try:
+            profile = self._profiles.pop(key)
+        except KeyError:
+            self.misses += 1
+            profile = StripedSmithWaterman(sequence, **kwargs)
+            if len(self._profiles) >= self.maxsize:
+                self._profiles.popitem(last=False)
+        else:
+            self.hits += 1
+        # (re)inserting marks the profile as the most recently used one
+        self._profiles[key] = profile
+        return profile
+
+    @experimental(as_of="0.4.0-dev")
+    def clear(self):
+        """Remove all profiles from the cache and reset its statistics."""
+        self._profiles.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _make_key(self, sequence, kwargs):
+        items = []
+        for name, value in sorted(kwargs.items()):
+            if name == 'substitution_matrix' and value is not None:
+                value = tuple((row, tuple(sorted(value[row].items())))
+                              for row in sorted(value))
+            items.append((name, value))
+        return sequence, tuple(items)
+
+
 @deprecated(as_of="0.4.0", until="0.4.1",
             reason="Will be replaced by a SubstitutionMatrix class. To track "
                    "progress, see [#161]"
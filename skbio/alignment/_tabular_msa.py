@@ -20,6 +20,8 @@ from skbio.sequence._iupac_sequence import IUPACSequence
 from skbio.util import find_duplicates, OperationError, UniqueError
 from skbio.util._decorator import experimental
 from skbio.util._misc import resolve_key
+from ._utils import (_stack_bytes, _position_counts,
+                     _count_codes_per_sequence)
 
 
 _Shape = collections.namedtuple('Shape', ['sequence', 'position'])
@@ -339,6 +341,7 @@ class TabularMSA(SkbioObject):
         self._seqs = seqs
         self._dtype = dtype
         self._shape = _Shape(sequence=len(seqs), position=length)
+        self._bytes_matrix = None
 
         if metadata is None:
             self._metadata = None
@@ -561,6 +564,88 @@ class TabularMSA(SkbioObject):
         """
         return not (self == other)
 
+    @experimental(as_of='0.4.0-dev')
+    def gap_frequencies(self, axis='sequence', relative=False):
+        """Compute frequency of gap characters across an axis.
+
+        Parameters
+        ----------
+        axis : {'sequence', 'position'}, optional
+            Axis to compute gap character frequencies across. If 'sequence' or
+            0, frequencies are computed for each position in the MSA. If
+            'position' or 1, frequencies are computed for each sequence.
+        relative : bool, optional
+            If ``True``, return the relative frequency of gap characters
+            instead of the count.
+
+        Returns
+        -------
+        1D np.ndarray (int or float)
+            Vector of gap character frequencies across the specified axis. Will
+            have ``int`` dtype if ``relative=False`` and ``float`` dtype if
+            ``relative=True``.
+
+        Raises
+        ------
+        ValueError
+            If `axis` is invalid.
+
+        Notes
+        -----
+        If there are no positions in the MSA, ``axis='position'``, **and**
+        ``relative=True``, the relative frequency of gap characters in each
+        sequence will be ``np.nan``.
+
+        Examples
+        --------
+        Compute frequency of gap characters for each position in the MSA (i.e.,
+        *across* the sequence axis):
+
+        >>> from skbio import DNA, TabularMSA
+        >>> msa = TabularMSA([DNA('ACG'),
+        ...                   DNA('A--'),
+        ...                   DNA('AC.'),
+        ...                   DNA('AG.')])
+        >>> msa.gap_frequencies()
+        array([0, 1, 3])
+
+        Compute relative frequencies across the same axis:
+
+        >>> msa.gap_frequencies(relative=True)
+        array([ 0.  ,  0.25,  0.75])
+
+        Compute frequency of gap characters for each sequence (i.e., *across*
+        the position axis):
+
+        >>> msa.gap_frequencies(axis='position')
+        array([0, 2, 1, 1])
+
+        """
+        if axis in ('sequence', 0):
+            axis = 0
+        elif axis in ('position', 1):
+            axis = 1
+        else:
+            raise ValueError(
+                "`axis` must be 'sequence' (0) or 'position' (1), not %r" %
+                axis)
+
+        if self._dtype is None:
+            # an empty MSA has no gap characters to count
+            gaps = np.zeros(self.shape[1 - axis], dtype=int)
+        elif axis == 0:
+            codes, counts = _position_counts(self._bytes)
+            is_gap = np.in1d(codes, self._dtype._gap_codes)
+            gaps = counts[:, is_gap].sum(axis=1)
+        else:
+            gaps = _count_codes_per_sequence(self._bytes,
+                                             self._dtype._gap_codes)
+
+        if relative:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                gaps = gaps / self.shape[axis]
+        return gaps
+
     @experimental(as_of='0.4.0-dev')
     def has_keys(self):
         """Determine if keys exist on the MSA.
@@ -801,6 +886,15 @@ class TabularMSA(SkbioObject):
                 _, sorted_seqs = self._sort_by_first_element(
                     [sort_keys, self._seqs], reverse)
             self._seqs = list(sorted_seqs)
+            self._bytes_matrix = None
+
+    @property
+    def _bytes(self):
+        """Sequences (rows) by positions (columns) matrix of bytes."""
+        if self._bytes_matrix is None:
+            self._bytes_matrix = _stack_bytes(self._seqs,
+                                              self.shape.position)
+        return self._bytes_matrix
 
     def _sort_by_first_element(self, components, reverse):
         """Helper for TabularMSA.sort."""
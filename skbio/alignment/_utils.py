@@ -0,0 +1,297 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2013--, scikit-bio development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from __future__ import absolute_import, division, print_function
+from future.builtins import range
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from skbio.util._misc import _parallel_map
+
+# Number of matrix cells processed at a time when computing position counts.
+# Bounds the size of the temporary (np.intp) arrays that ``np.bincount``
+# requires.
+_BLOCK_CELLS = 2 ** 20
+
+# Number of sequences (rows of the pairwise result) processed per block when
+# computing pairwise distances. Blocks are the unit of work handed to threads.
+_PAIRWISE_BLOCK_ROWS = 256
+
+
+def _stack_bytes(seqs, length):
+    """Stack the bytes of equal-length sequences into a 2-D matrix.
+
+    Parameters
+    ----------
+    seqs : list of Sequence
+        Sequences of length `length`.
+    length : int
+        Number of positions in each sequence.
+
+    Returns
+    -------
+    2D np.ndarray (np.uint8)
+        Read-only matrix of sequences (rows) by positions (columns). The
+        matrix is stored in column-major (Fortran) order so that each position
+        is contiguous in memory.
+
+    """
+    matrix = np.empty((len(seqs), length), dtype=np.uint8, order='F')
+    for i, seq in enumerate(seqs):
+        matrix[i] = seq._bytes
+    matrix.flags.writeable = False
+    return matrix
+
+
+def _position_counts(matrix):
+    """Count the characters observed at each position of a byte matrix.
+
+    Parameters
+    ----------
+    matrix : 2D np.ndarray (np.uint8)
+        Matrix of sequences (rows) by positions (columns).
+
+    Returns
+    -------
+    codes : 1D np.ndarray (np.uint8)
+        Sorted ASCII codes of the characters observed anywhere in `matrix`.
+    counts : 2D np.ndarray (int)
+        Positions by `codes` matrix, where ``counts[i, j]`` is the number of
+        times ``codes[j]`` is observed at position ``i``.
+
+    """
+    n_seqs, n_positions = matrix.shape
+    counts = np.zeros((n_positions, 256), dtype=int)
+    if n_seqs > 0:
+        step = max(1, _BLOCK_CELLS // n_seqs)
+        offsets = np.arange(step) * 256
+        for start in range(0, n_positions, step):
+            block = matrix[:, start:start + step]
+            width = block.shape[1]
+            # one bin per (position, code) pair
+            bins = block + offsets[:width]
+            counts[start:start + width] = np.bincount(
+                bins.ravel(), minlength=width * 256).reshape(width, 256)
+
+    codes = np.flatnonzero(counts.any(axis=0))
+    return codes.astype(np.uint8), counts[:, codes]
+
+
+def _count_codes_per_sequence(matrix, codes):
+    """Count how often any of `codes` occurs in each row of a byte matrix.
+
+    Parameters
+    ----------
+    matrix : 2D np.ndarray (np.uint8)
+        Matrix of sequences (rows) by positions (columns).
+    codes : 1D array_like (int)
+        ASCII codes of the characters to count.
+
+    Returns
+    -------
+    1D np.ndarray (int)
+        Number of characters in each sequence that are in `codes`.
+
+    """
+    n_seqs, n_positions = matrix.shape
+    lookup = np.zeros(256, dtype=bool)
+    lookup[np.asarray(codes, dtype=int)] = True
+
+    counts = np.zeros(n_seqs, dtype=int)
+    step = max(1, _BLOCK_CELLS // max(n_seqs, 1))
+    for start in range(0, n_positions, step):
+        counts += lookup[matrix[:, start:start + step]].sum(axis=1)
+    return counts
+
+
+def _pairwise_shared_counts(indicators, n_seqs, n_jobs=1):
+    """Count the positions shared by every pair of sequences.
+
+    Parameters
+    ----------
+    indicators : iterable of callables
+        Each callable returns a 2D boolean (sequences by positions) matrix when
+        called. Two sequences share a position if it is ``True`` for both of
+        them in any one of the matrices.
+    n_seqs : int
+        Number of sequences.
+    n_jobs : int, optional
+        Number of threads used to process blocks of sequences.
+
+    Returns
+    -------
+    2D np.ndarray (float)
+        Symmetric matrix of the number of shared positions for each pair of
+        sequences.
+
+    Notes
+    -----
+    Counts are computed as products of the indicator matrices with their
+    transposes, which are evaluated by BLAS in blocks of rows. Only the upper
+    triangle is computed and then mirrored.
+
+    """
+    counts = np.zeros((n_seqs, n_seqs))
+    for indicator in indicators:
+        indicator = indicator()
+        n_positions = indicator.shape[1]
+        # single precision sums of zeros and ones are exact below 2 ** 24
+        dtype = np.float32 if n_positions < 2 ** 24 else np.float64
+        indicator = np.ascontiguousarray(indicator, dtype=dtype)
+
+        def block(start, indicator=indicator):
+            stop = start + _PAIRWISE_BLOCK_ROWS
+            counts[start:stop, start:] += np.dot(indicator[start:stop],
+                                                 indicator[start:].T)
+
+        _parallel_map(block, range(0, n_seqs, _PAIRWISE_BLOCK_ROWS), n_jobs)
+
+    lower = np.tril_indices_from(counts, -1)
+    counts[lower] = counts.T[lower]
+    return counts
+
+
+def _hamming_distances(matrix, n_jobs=1):
+    """Compute the Hamming distance between every pair of rows.
+
+    Parameters
+    ----------
+    matrix : 2D np.ndarray (np.uint8)
+        Matrix of sequences (rows) by positions (columns).
+    n_jobs : int, optional
+        Number of threads used to process blocks of sequences.
+
+    Returns
+    -------
+    2D np.ndarray (float)
+        Proportion of positions that differ for each pair of sequences.
+
+    """
+    n_seqs, n_positions = matrix.shape
+    codes, _ = _position_counts(matrix)
+    matches = _pairwise_shared_counts(
+        [lambda code=code: matrix == code for code in codes], n_seqs,
+        n_jobs=n_jobs)
+    # without positions, distances are undefined (nan)
+    with np.errstate(invalid='ignore'):
+        distances = (n_positions - matches) / n_positions
+    np.fill_diagonal(distances, 0.0)
+    return distances
+
+
+def _p_distances(matrix, gap_codes, n_jobs=1):
+    """Compute the uncorrected p-distance between every pair of rows.
+
+    Positions at which either sequence of a pair has a gap are excluded from
+    the comparison of that pair (i.e., pairwise deletion).
+
+    Parameters
+    ----------
+    matrix : 2D np.ndarray (np.uint8)
+        Matrix of sequences (rows) by positions (columns).
+    gap_codes : 1D array_like (int)
+        ASCII codes of the gap characters.
+    n_jobs : int, optional
+        Number of threads used to process blocks of sequences.
+
+    Returns
+    -------
+    2D np.ndarray (float)
+        Proportion of compared positions that differ for each pair of
+        sequences.
+
+    Raises
+    ------
+    ValueError
+        If a pair of sequences does not have a position at which neither
+        sequence has a gap.
+
+    """
+    n_seqs = matrix.shape[0]
+    codes, _ = _position_counts(matrix)
+    codes = codes[~np.in1d(codes, gap_codes)]
+    matches = _pairwise_shared_counts(
+        [lambda code=code: matrix == code for code in codes], n_seqs,
+        n_jobs=n_jobs)
+    compared = _pairwise_shared_counts(
+        [lambda: ~np.in1d(matrix, gap_codes).reshape(matrix.shape)],
+        n_seqs, n_jobs=n_jobs)
+
+    # a sequence is always at distance zero from itself
+    undefined = compared == 0
+    np.fill_diagonal(undefined, False)
+    if undefined.any():
+        i, j = np.argwhere(undefined)[0]
+        raise ValueError(
+            "Sequences %d and %d do not have any positions without gaps in "
+            "common, so their p-distance is undefined." % (i, j))
+    with np.errstate(invalid='ignore'):
+        distances = (compared - matches) / compared
+    np.fill_diagonal(distances, 0.0)
+    return distances
+
+
+def _kmer_distances(seqs, k):
+    """Compute the k-mer (Jaccard) distance between every pair of sequences.
+
+    Parameters
+    ----------
+    seqs : list of Sequence
+        Sequences to compare. Sequences do not need to be the same length.
+    k : int
+        Length of the k-mers.
+
+    Returns
+    -------
+    2D np.ndarray (float)
+        Fraction of the distinct k-mers found in either sequence of a pair that
+        are not found in both of them.
+
+    Raises
+    ------
+    ValueError
+        If `k` is less than 1, or if any sequence is shorter than `k`.
+
+    """
+    if k < 1:
+        raise ValueError("k must be greater than 0.")
+    if not seqs:
+        return np.zeros((0, 0))
+
+    kmer_type = np.dtype((np.void, k))
+    kmers = []
+    for i, seq in enumerate(seqs):
+        n_kmers = len(seq) - k + 1
+        if n_kmers < 1:
+            raise ValueError(
+                "Sequence %d is shorter than k (%d < %d), so it has no "
+                "k-mers." % (i, len(seq), k))
+        windows = np.lib.stride_tricks.as_strided(
+            seq._bytes, shape=(n_kmers, k),
+            strides=(seq._bytes.strides[0],) * 2)
+        kmers.append(np.ascontiguousarray(windows).view(kmer_type).ravel())
+
+    # number each distinct k-mer across all sequences, then keep the set of
+    # k-mer numbers of each sequence
+    _, kmer_ids = np.unique(np.concatenate(kmers), return_inverse=True)
+    bounds = np.cumsum([0] + [kmer.size for kmer in kmers])
+    kmer_sets = [np.unique(kmer_ids[start:stop])
+                 for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    indptr = np.cumsum([0] + [kmer_set.size for kmer_set in kmer_sets])
+    indices = np.concatenate(kmer_sets)
+    indicator = csr_matrix((np.ones(indices.size), indices, indptr),
+                           shape=(len(seqs), kmer_ids.max() + 1))
+
+    shared = (indicator * indicator.T).toarray()
+    sizes = np.diff(indptr)
+    union = sizes[:, np.newaxis] + sizes - shared
+    distances = 1 - shared / union
+    np.fill_diagonal(distances, 0.0)
+    return distances
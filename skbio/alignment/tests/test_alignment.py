@@ -14,11 +14,13 @@ from unittest import TestCase, main
 from collections import Counter, defaultdict
 
 import numpy as np
+import numpy.testing as npt
 from scipy.spatial.distance import hamming
 
 from skbio import (Sequence, DNA, RNA,
                    DistanceMatrix, Alignment, SequenceCollection)
 from skbio.alignment import (SequenceCollectionError, AlignmentError)
+from skbio.stats.distance import DissimilarityMatrixError
 
 
 class SequenceCollectionTests(TestCase):
@@ -214,6 +216,30 @@ class SequenceCollectionTests(TestCase):
         actual = s1.distances(dumb_distance)
         self.assertEqual(actual, expected)
 
+    def test_kmer_distances(self):
+        actual = self.s1.kmer_distances(2)
+        self.assertEqual(actual.ids, ('d1', 'd2'))
+        npt.assert_almost_equal(actual.data, [[0, 6. / 7], [6. / 7, 0]])
+
+        expected = DistanceMatrix([[0, 1], [1, 0]], ['d1', 'd2'])
+        self.assertEqual(self.s1.kmer_distances(3), expected)
+
+        # identical k-mer sets
+        sc = SequenceCollection([DNA('ACGACG', metadata={'id': 'a'}),
+                                 DNA('CGACGA', metadata={'id': 'b'})])
+        self.assertEqual(sc.kmer_distances(2),
+                         DistanceMatrix([[0, 0], [0, 0]], ['a', 'b']))
+
+    def test_kmer_distances_empty(self):
+        with six.assertRaisesRegex(self, DissimilarityMatrixError, '1x1'):
+            SequenceCollection([]).kmer_distances(2)
+
+    def test_kmer_distances_invalid_k(self):
+        with six.assertRaisesRegex(self, ValueError, 'greater than 0'):
+            self.s1.kmer_distances(0)
+        with six.assertRaisesRegex(self, ValueError, 'shorter than k'):
+            self.s1.kmer_distances(4)
+
     def test_distribution_stats(self):
         actual1 = self.s1.distribution_stats()
         self.assertEqual(actual1[0], 2)
@@ -469,6 +495,46 @@ class AlignmentTests(TestCase):
         actual = self.a1.distances(dumb_distance)
         self.assertEqual(actual, expected)
 
+    def test_distances_hamming_matches_sequence_distance(self):
+        seqs = [DNA(''.join(np.random.choice(list('ACGT-'), 50)),
+                    metadata={'id': str(i)}) for i in range(20)]
+        a = Alignment(seqs)
+        expected = a.distances(lambda s1, s2: s1.distance(s2))
+        for n_jobs in 1, 2:
+            self.assertEqual(a.distances('hamming', n_jobs=n_jobs), expected)
+
+    def test_distances_p_distance(self):
+        expected = [[0, 0, 1. / 8],
+                    [0, 0, 1. / 7],
+                    [1. / 8, 1. / 7, 0]]
+        expected = DistanceMatrix(expected, ['d1', 'd2', 'd3'])
+        self.assertEqual(self.a1.distances('p-distance'), expected)
+
+    def test_distances_p_distance_undefined(self):
+        a = Alignment([DNA('AC--', metadata={'id': 'a'}),
+                       DNA('--GT', metadata={'id': 'b'})])
+        with six.assertRaisesRegex(self, ValueError, '0 and 1'):
+            a.distances('p-distance')
+
+    def test_distances_empty(self):
+        for distance_fn in 'hamming', 'p-distance':
+            # no sequences
+            with six.assertRaisesRegex(self, DissimilarityMatrixError,
+                                       '1x1'):
+                Alignment([]).distances(distance_fn)
+
+        # no positions: the distances are undefined
+        a = Alignment([DNA('', metadata={'id': 'a'}),
+                       DNA('', metadata={'id': 'b'})])
+        with self.assertRaises(DissimilarityMatrixError):
+            a.distances()
+        with six.assertRaisesRegex(self, ValueError, '0 and 1'):
+            a.distances('p-distance')
+
+    def test_distances_invalid_distance_fn(self):
+        with six.assertRaisesRegex(self, ValueError, "'euclidean'"):
+            self.a1.distances('euclidean')
+
     def test_score(self):
         self.assertEqual(self.a3.score(), 42.0)
         self.assertEqual(self.a4.score(), -42.0)
@@ -538,6 +604,66 @@ class AlignmentTests(TestCase):
         expected = Alignment([d2])
         self.assertEqual(actual, expected)
 
+    def test_subalignment_mixed_ids_and_indices(self):
+        actual = self.a1.subalignment(seqs_to_keep=iter(['d1', 2, 'd1']),
+                                      positions_to_keep=iter([3, 0, 2, 3]))
+        d1 = DNA('.AC', metadata={'id': "d1"})
+        d3 = DNA('.AC', metadata={'id': "d3"})
+        self.assertEqual(actual, Alignment([d1, d3]))
+
+    def test_subalignment_index_types(self):
+        d2 = DNA('TAC', metadata={'id': "d2"})
+        for seqs_to_keep in ([1.0], [np.int64(1)], [np.float32(1)]):
+            actual = self.a1.subalignment(seqs_to_keep=seqs_to_keep,
+                                          positions_to_keep=[1, 2, 3])
+            self.assertEqual(actual, Alignment([d2]))
+
+        # bools and non-integral floats aren't indices
+        for seqs_to_keep in ([True], [np.bool_(True)], [False], [1.5],
+                             [float('nan')]):
+            actual = self.a1.subalignment(seqs_to_keep=seqs_to_keep)
+            self.assertEqual(actual.sequence_count(), 0)
+
+        # in particular, True no longer selects the sequence at index 1 (and
+        # False the one at index 0)
+        actual = self.a1.subalignment(seqs_to_keep=[True, False],
+                                      invert_seqs_to_keep=True)
+        self.assertEqual(actual, self.a1)
+        actual = self.a1.subalignment(seqs_to_keep=[True, 0])
+        self.assertEqual(actual.ids(), ['d1'])
+
+    def test_subalignment_ignores_unknown_seqs_and_positions(self):
+        actual = self.a1.subalignment(seqs_to_keep=['d2', 'd4', 3, -1],
+                                      positions_to_keep=[1, 42, -1])
+        self.assertEqual(actual, Alignment([DNA('T', metadata={'id': "d2"})]))
+
+        actual = self.a1.subalignment(seqs_to_keep=['d4', 3],
+                                      invert_seqs_to_keep=True,
+                                      positions_to_keep=[42],
+                                      invert_positions_to_keep=True)
+        self.assertEqual(actual, self.a1)
+
+    def test_subalignment_shares_bytes_of_contiguous_positions(self):
+        actual = self.a1.subalignment(positions_to_keep=[4, 2, 3])
+        self.assertEqual(str(actual[1]), 'ACC')
+        self.assertTrue(np.may_share_memory(actual[1]._bytes, self.d2._bytes))
+
+        actual = self.a1.subalignment(seqs_to_keep=['d2'])
+        self.assertEqual(actual[0], self.d2)
+        self.assertTrue(np.may_share_memory(actual[0]._bytes, self.d2._bytes))
+
+    def test_subalignment_positional_metadata(self):
+        aln = Alignment([DNA('AC-T', metadata={'id': 'a'},
+                             positional_metadata={'q': [1, 2, 3, 4]}),
+                         DNA('ACGT', metadata={'id': 'b'},
+                             positional_metadata={'q': [5, 6, 7, 8]})])
+        actual = aln.subalignment(positions_to_keep=[0, 3])
+        expected = Alignment([DNA('AT', metadata={'id': 'a'},
+                                  positional_metadata={'q': [1, 4]}),
+                              DNA('AT', metadata={'id': 'b'},
+                                  positional_metadata={'q': [5, 8]})])
+        self.assertEqual(actual, expected)
+
     def test_subalignment_filter_out_everything(self):
         exp = Alignment([])
 
@@ -653,6 +779,24 @@ class AlignmentTests(TestCase):
         self.assertEqual(aln.omit_gap_sequences(1 - np.finfo(float).eps),
                          Alignment([]))
 
+    def test_omit_gap_positions_and_sequences_no_positions(self):
+        self.assertEqual(self.no_positions.omit_gap_positions(0.0),
+                         self.no_positions)
+        self.assertEqual(self.no_positions.omit_gap_sequences(0.0),
+                         self.no_positions)
+
+    def test_omit_gap_positions_and_sequences_mixed_gap_chars(self):
+        aln = Alignment([DNA('A-.C', metadata={'id': 'a'}),
+                         DNA('A.-C', metadata={'id': 'b'}),
+                         DNA('A-GC', metadata={'id': 'c'})])
+        self.assertEqual(aln.omit_gap_positions(0.5),
+                         aln.subalignment(positions_to_keep=[0, 3]))
+        self.assertEqual(aln.omit_gap_positions(0.67),
+                         aln.subalignment(positions_to_keep=[0, 2, 3]))
+        self.assertEqual(aln.omit_gap_sequences(0.25),
+                         aln.subalignment(seqs_to_keep=['c']))
+        self.assertEqual(aln.omit_gap_sequences(0.5), aln)
+
     def test_position_counters(self):
         self.assertEqual(self.empty.position_counters(), [])
 
@@ -665,6 +809,32 @@ class AlignmentTests(TestCase):
                     Counter({'-': 1, 'U': 1})]
         self.assertEqual(self.a2.position_counters(), expected)
 
+    def test_position_counters_matches_iter_positions(self):
+        chars = np.array(list('ACGT-.N'))
+        rng = np.random.RandomState(0)
+        aln = Alignment([DNA(''.join(rng.choice(chars, 37)),
+                             metadata={'id': str(i)}) for i in range(25)])
+        expected = [Counter(p) for p in aln.iter_positions(constructor=str)]
+        self.assertEqual(aln.position_counters(), expected)
+
+        expected = [Counter(str(s) for s in p) for p in aln.iter_positions()]
+        self.assertEqual(aln.position_counters(), expected)
+
+    def test_bytes(self):
+        obs = self.a2._bytes
+        self.assertEqual(obs.shape, (2, 5))
+        self.assertEqual(obs.dtype, np.uint8)
+        self.assertTrue(obs.flags['F_CONTIGUOUS'])
+        self.assertFalse(obs.flags.writeable)
+        np.testing.assert_array_equal(
+            obs.view('|S1'),
+            np.array([list('UUAU-'), list('ACGUU')], dtype='|S1'))
+        # the matrix is only built once
+        self.assertIs(self.a2._bytes, obs)
+
+        self.assertEqual(self.empty._bytes.shape, (0, 0))
+        self.assertEqual(self.no_positions._bytes.shape, (2, 0))
+
     def test_position_frequencies(self):
         self.assertEqual(self.empty.position_frequencies(), [])
 
@@ -20,8 +20,16 @@ from __future__ import absolute_import, division, print_function
 
 from unittest import TestCase, main
 
-from skbio import local_pairwise_align_ssw, Sequence, DNA
-from skbio.alignment import StripedSmithWaterman, AlignmentStructure
+import numpy as np
+import numpy.testing as npt
+
+from skbio import (local_pairwise_align_ssw, Sequence, DNA, Protein,
+                   DistanceMatrix)
+from skbio.alignment import (StripedSmithWaterman, AlignmentStructure,
+                             StripedSmithWatermanCache,
+                             local_pairwise_score_ssw,
+                             local_pairwise_scores_ssw,
+                             local_pairwise_distance_ssw)
 from skbio.alignment._pairwise import blosum50
 
 
@@ -606,6 +614,203 @@ class TestAlignStripedSmithWaterman(TestSSW):
         self.assertEqual(type(align1[0]), Sequence)
         self.assertEqual(type(align2[0]), DNA)
 
+    def test_profile_cache_same_as_uncached(self):
+        query_sequence = 'AGGGTAATTAGGCGTGTTCACCTA'
+        target_sequences = ['TACTTATAAGATGTCTCAACGGCATGCGCAACTTGTGAAGTG',
+                            'AACTTATATAATAAAAATTATATATTCGTTGGGTTCTTTTGATATA']
+        cache = StripedSmithWatermanCache()
+        for target_sequence in target_sequences:
+            for kwargs in [{}, {'match_score': 5, 'mismatch_score': -2}]:
+                query = StripedSmithWaterman(query_sequence, **kwargs)
+                align1 = query(target_sequence)
+                align2 = local_pairwise_align_ssw(query_sequence,
+                                                  target_sequence,
+                                                  profile_cache=cache,
+                                                  **kwargs)
+                self._check_Alignment_to_AlignmentStructure(align2, align1)
+        # one profile per scoring scheme
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.hits, 2)
+
+    def test_profile_cache_reverse(self):
+        query_sequence = 'AGGGTAATTAGGCGTGTTCACCTA'
+        target_sequence = 'TACTTATAAGATGTCTCAACGGCATGCGCAACTTGTGAAGTG'
+        cache = StripedSmithWatermanCache(reverse=True)
+        align1 = local_pairwise_align_ssw(query_sequence, target_sequence)
+        align2 = local_pairwise_align_ssw(query_sequence, target_sequence,
+                                          profile_cache=cache,
+                                          constructor=DNA)
+
+        self.assertEqual(align2.score(), align1.score())
+        self.assertEqual(align2.start_end_positions(),
+                         align1.start_end_positions())
+        self.assertEqual(str(align2[0]), str(align1[0]))
+        self.assertEqual(str(align2[1]), str(align1[1]))
+        self.assertEqual(align2[0].metadata['id'], 'query')
+        self.assertEqual(align2[1].metadata['id'], 'target')
+        self.assertEqual(type(align2[0]), DNA)
+
+        # the profile was built from the target sequence
+        self.assertEqual(len(cache), 1)
+        cache.get(target_sequence, suppress_sequences=False, zero_index=True)
+        self.assertEqual(cache.hits, 1)
+
+
+class TestScoreStripedSmithWaterman(TestCase):
+    query_sequence = 'AGGGTAATTAGGCGTGTTCACCTA'
+    target_sequences = ['TACTTATAAGATGTCTCAACGGCATGCGCAACTTGTGAAGTG',
+                        'AACTTATATAATAAAAATTATATATTCGTTGGGTTCTTTTGATATA',
+                        'AGGGTAATTAGGCGTGTTCACCTA']
+
+    def test_local_pairwise_score_ssw(self):
+        for kwargs in [{}, {'match_score': 5, 'mismatch_score': -2},
+                       {'score_filter': 1000, 'distance_filter': 1000}]:
+            for target_sequence in self.target_sequences:
+                expected = local_pairwise_align_ssw(
+                    self.query_sequence, target_sequence).score()
+                if kwargs:
+                    query = StripedSmithWaterman(self.query_sequence,
+                                                 **kwargs)
+                    expected = query(target_sequence).optimal_alignment_score
+                obs = local_pairwise_score_ssw(self.query_sequence,
+                                               target_sequence, **kwargs)
+                self.assertEqual(obs, expected)
+
+    def test_local_pairwise_score_ssw_sequence_objects(self):
+        obs = local_pairwise_score_ssw(DNA(self.query_sequence),
+                                       DNA(self.target_sequences[0]))
+        exp = local_pairwise_score_ssw(self.query_sequence,
+                                       self.target_sequences[0])
+        self.assertEqual(obs, exp)
+
+        obs = local_pairwise_score_ssw(Protein('HEAGAWGHEE'),
+                                       Protein('PAWHEAE'),
+                                       substitution_matrix=blosum50)
+        exp = local_pairwise_align_ssw(Protein('HEAGAWGHEE'),
+                                       Protein('PAWHEAE'),
+                                       substitution_matrix=blosum50).score()
+        self.assertEqual(obs, exp)
+
+    def test_local_pairwise_score_ssw_profile_cache(self):
+        for reverse in False, True:
+            cache = StripedSmithWatermanCache(reverse=reverse)
+            for target_sequence in self.target_sequences:
+                obs = local_pairwise_score_ssw(self.query_sequence,
+                                               target_sequence,
+                                               profile_cache=cache)
+                exp = local_pairwise_score_ssw(self.query_sequence,
+                                               target_sequence)
+                self.assertEqual(obs, exp)
+            self.assertEqual(len(cache), 1 if not reverse else 3)
+
+    def test_local_pairwise_scores_ssw(self):
+        obs = local_pairwise_scores_ssw(self.query_sequence,
+                                        iter(self.target_sequences))
+        exp = np.array([local_pairwise_score_ssw(self.query_sequence, t)
+                        for t in self.target_sequences])
+        npt.assert_array_equal(obs, exp)
+        self.assertEqual(obs[2], 2 * len(self.query_sequence))
+
+        obs = local_pairwise_scores_ssw(self.query_sequence, [],
+                                        match_score=5)
+        self.assertEqual(obs.shape, (0,))
+
+    def test_local_pairwise_scores_ssw_profile_cache(self):
+        exp = local_pairwise_scores_ssw(self.query_sequence,
+                                        self.target_sequences)
+        for reverse in False, True:
+            cache = StripedSmithWatermanCache(reverse=reverse)
+            for _ in range(2):
+                obs = local_pairwise_scores_ssw(self.query_sequence,
+                                                self.target_sequences,
+                                                profile_cache=cache)
+                npt.assert_array_equal(obs, exp)
+            self.assertEqual(len(cache), 1 if not reverse else 3)
+            self.assertEqual(cache.hits, 1 if not reverse else 3)
+
+    def test_local_pairwise_distance_ssw(self):
+        for kwargs in {}, {'match_score': 5, 'mismatch_score': -2}:
+            for target_sequence in self.target_sequences:
+                score = local_pairwise_score_ssw(
+                    self.query_sequence, target_sequence, **kwargs)
+                self_score = min(
+                    local_pairwise_score_ssw(self.query_sequence,
+                                             self.query_sequence, **kwargs),
+                    local_pairwise_score_ssw(target_sequence,
+                                             target_sequence, **kwargs))
+                obs = local_pairwise_distance_ssw(
+                    self.query_sequence, target_sequence, **kwargs)
+                self.assertAlmostEqual(obs, 1 - score / self_score)
+                self.assertTrue(0 <= obs <= 1)
+                self.assertEqual(
+                    obs, local_pairwise_distance_ssw(
+                        target_sequence, self.query_sequence, **kwargs))
+
+        # a sequence contained in another one
+        self.assertEqual(local_pairwise_distance_ssw(
+            DNA(self.query_sequence[3:15]), DNA(self.query_sequence)), 0)
+
+    def test_local_pairwise_distance_ssw_distance_matrix(self):
+        seqs = [self.query_sequence] + self.target_sequences
+        cache = StripedSmithWatermanCache()
+        dm = DistanceMatrix.from_iterable(
+            seqs, lambda a, b: local_pairwise_distance_ssw(
+                a, b, profile_cache=cache))
+        self.assertEqual(len(cache), 3)
+        # more similar sequences are closer
+        self.assertEqual(dm[0, 3], 0)
+        self.assertLess(dm[0, 1], 1)
+        npt.assert_array_less(0, dm[0, 1:3])
+
+
+class TestStripedSmithWatermanCache(TestCase):
+    def test_invalid_maxsize(self):
+        with self.assertRaises(ValueError):
+            StripedSmithWatermanCache(maxsize=0)
+
+    def test_get_reuses_profile(self):
+        cache = StripedSmithWatermanCache()
+        profile = cache.get('ACGT', gap_open_penalty=3)
+        self.assertIsInstance(profile, StripedSmithWaterman)
+        self.assertIs(cache.get('ACGT', gap_open_penalty=3), profile)
+        self.assertIsNot(cache.get('ACGT', gap_open_penalty=4), profile)
+        self.assertIsNot(cache.get('ACGA', gap_open_penalty=3), profile)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    def test_get_substitution_matrix_key(self):
+        cache = StripedSmithWatermanCache()
+        profile = cache.get('HEAGAWGHEE', protein=True,
+                            substitution_matrix=blosum50)
+        matrix = {k: dict(v) for k, v in blosum50.items()}
+        self.assertIs(cache.get('HEAGAWGHEE', protein=True,
+                                substitution_matrix=matrix), profile)
+        matrix['A']['A'] = 10
+        self.assertIsNot(cache.get('HEAGAWGHEE', protein=True,
+                                   substitution_matrix=matrix), profile)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = StripedSmithWatermanCache(maxsize=2)
+        a = cache.get('AAAA')
+        cache.get('CCCC')
+        # touch 'AAAA' so that 'CCCC' becomes the least recently used
+        cache.get('AAAA')
+        cache.get('GGGG')
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get('AAAA'), a)
+        misses = cache.misses
+        cache.get('CCCC')
+        self.assertEqual(cache.misses, misses + 1)
+
+    def test_clear(self):
+        cache = StripedSmithWatermanCache()
+        cache.get('ACGT')
+        cache.get('ACGT')
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
 
 class TestAlignmentStructure(TestSSW):
 
@@ -525,6 +525,58 @@ class TestTabularMSA(unittest.TestCase, ReallyEqualMixin):
         self.assertIsNone(msa1._metadata)
         self.assertIsNone(msa2._metadata)
 
+    def test_gap_frequencies_empty(self):
+        msa = TabularMSA([])
+        npt.assert_array_equal(msa.gap_frequencies(), np.array([]))
+        npt.assert_array_equal(msa.gap_frequencies(axis='position'),
+                               np.array([]))
+
+        msa = TabularMSA([DNA(''), DNA('')])
+        npt.assert_array_equal(msa.gap_frequencies(), np.array([]))
+        npt.assert_array_equal(msa.gap_frequencies(axis=1),
+                               np.array([0, 0]))
+        npt.assert_array_equal(
+            msa.gap_frequencies(axis='position', relative=True),
+            np.array([np.nan, np.nan]))
+
+    def test_gap_frequencies(self):
+        msa = TabularMSA([DNA('AC-G'),
+                          DNA('A--.'),
+                          DNA('ACGT')])
+
+        obs = msa.gap_frequencies()
+        npt.assert_array_equal(obs, np.array([0, 1, 2, 1]))
+        self.assertTrue(np.issubdtype(obs.dtype, np.integer))
+        npt.assert_array_equal(msa.gap_frequencies(axis=0), obs)
+
+        npt.assert_array_equal(msa.gap_frequencies(relative=True),
+                               np.array([0.0, 1 / 3, 2 / 3, 1 / 3]))
+
+        npt.assert_array_equal(msa.gap_frequencies(axis='position'),
+                               np.array([1, 3, 0]))
+        npt.assert_array_equal(msa.gap_frequencies(axis=1, relative=True),
+                               np.array([0.25, 0.75, 0.0]))
+
+    def test_gap_frequencies_protein_and_rna(self):
+        msa = TabularMSA([Protein('-.*A'), Protein('WKLA')])
+        npt.assert_array_equal(msa.gap_frequencies(), np.array([1, 1, 0, 0]))
+
+        msa = TabularMSA([RNA('U--'), RNA('.CG')])
+        npt.assert_array_equal(msa.gap_frequencies(axis='position'),
+                               np.array([2, 1]))
+
+    def test_gap_frequencies_after_sort(self):
+        msa = TabularMSA([DNA('AC-'), DNA('---')], keys=['b', 'a'])
+        npt.assert_array_equal(msa.gap_frequencies(axis='position'),
+                               np.array([1, 3]))
+        msa.sort()
+        npt.assert_array_equal(msa.gap_frequencies(axis='position'),
+                               np.array([3, 1]))
+
+    def test_gap_frequencies_invalid_axis(self):
+        with six.assertRaisesRegex(self, ValueError, "axis.*'foo'"):
+            TabularMSA([DNA('ACG')]).gap_frequencies(axis='foo')
+
     def test_has_metadata(self):
         msa = TabularMSA([])
         self.assertFalse(msa.has_metadata())
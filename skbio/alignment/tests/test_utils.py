@@ -0,0 +1,136 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2013--, scikit-bio development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from __future__ import absolute_import, division, print_function
+
+from unittest import TestCase, main
+
+import numpy as np
+import numpy.testing as npt
+import six
+from scipy.spatial.distance import pdist, squareform
+
+from skbio import DNA
+import skbio.alignment._utils as _utils
+from skbio.alignment._utils import (_stack_bytes, _position_counts,
+                                    _hamming_distances, _p_distances,
+                                    _kmer_distances)
+
+
+class UtilsTests(TestCase):
+    def setUp(self):
+        self.seqs = [DNA('AC-GT'), DNA('ACCGA'), DNA('TC-GN')]
+        self.matrix = _stack_bytes(self.seqs, 5)
+
+    def test_stack_bytes(self):
+        npt.assert_array_equal(
+            self.matrix.view('|S1'),
+            np.array([list('AC-GT'), list('ACCGA'), list('TC-GN')],
+                     dtype='|S1'))
+        self.assertEqual(self.matrix.dtype, np.uint8)
+        self.assertTrue(self.matrix.flags['F_CONTIGUOUS'])
+        self.assertFalse(self.matrix.flags.writeable)
+
+    def test_stack_bytes_empty(self):
+        self.assertEqual(_stack_bytes([], 0).shape, (0, 0))
+        self.assertEqual(_stack_bytes([DNA('')], 0).shape, (1, 0))
+
+    def test_position_counts(self):
+        codes, counts = _position_counts(self.matrix)
+        npt.assert_array_equal(codes.view('|S1'),
+                               np.array(list('-ACGNT'), dtype='|S1'))
+        npt.assert_array_equal(counts, np.array([[0, 2, 0, 0, 0, 1],
+                                                 [0, 0, 3, 0, 0, 0],
+                                                 [2, 0, 1, 0, 0, 0],
+                                                 [0, 0, 0, 3, 0, 0],
+                                                 [0, 1, 0, 0, 1, 1]]))
+
+    def test_position_counts_multiple_blocks(self):
+        expected_codes, expected_counts = _position_counts(self.matrix)
+        block_cells = _utils._BLOCK_CELLS
+        try:
+            # force one position per block, then two positions per block
+            for n in 1, 6:
+                _utils._BLOCK_CELLS = n
+                codes, counts = _position_counts(self.matrix)
+                npt.assert_array_equal(codes, expected_codes)
+                npt.assert_array_equal(counts, expected_counts)
+        finally:
+            _utils._BLOCK_CELLS = block_cells
+
+    def test_position_counts_empty(self):
+        codes, counts = _position_counts(_stack_bytes([], 0))
+        self.assertEqual(codes.shape, (0,))
+        self.assertEqual(counts.shape, (0, 0))
+
+        codes, counts = _position_counts(_stack_bytes([DNA(''), DNA('')], 0))
+        self.assertEqual(codes.shape, (0,))
+        self.assertEqual(counts.shape, (0, 0))
+
+    def test_hamming_distances(self):
+        expected = squareform(pdist(self.matrix, 'hamming'))
+        npt.assert_almost_equal(_hamming_distances(self.matrix), expected)
+
+    def test_hamming_distances_multiple_blocks_and_threads(self):
+        matrix = np.random.choice(np.frombuffer(b'ACGT-', dtype=np.uint8),
+                                  (23, 40))
+        expected = squareform(pdist(matrix, 'hamming'))
+        block_rows = _utils._PAIRWISE_BLOCK_ROWS
+        try:
+            for rows in 1, 5, 23:
+                _utils._PAIRWISE_BLOCK_ROWS = rows
+                for n_jobs in 1, 3:
+                    npt.assert_almost_equal(
+                        _hamming_distances(matrix, n_jobs=n_jobs), expected)
+        finally:
+            _utils._PAIRWISE_BLOCK_ROWS = block_rows
+
+    def test_distances_empty(self):
+        gap_codes = np.frombuffer(b'-', dtype=np.uint8)
+        matrix = _stack_bytes([], 0)
+        self.assertEqual(_hamming_distances(matrix).shape, (0, 0))
+        self.assertEqual(_p_distances(matrix, gap_codes).shape, (0, 0))
+        self.assertEqual(_kmer_distances([], 2).shape, (0, 0))
+
+        # without positions, Hamming distances are undefined
+        matrix = _stack_bytes([DNA(''), DNA('')], 0)
+        npt.assert_equal(_hamming_distances(matrix), [[0, np.nan],
+                                                      [np.nan, 0]])
+        with six.assertRaisesRegex(self, ValueError, '0 and 1'):
+            _p_distances(matrix, gap_codes)
+
+    def test_p_distances(self):
+        matrix = _stack_bytes([DNA('AC-T'), DNA('ACGA'), DNA('-CGA')], 4)
+        gap_codes = np.frombuffer(b'-', dtype=np.uint8)
+        npt.assert_almost_equal(_p_distances(matrix, gap_codes),
+                                [[0, 1. / 3, 1. / 2],
+                                 [1. / 3, 0, 0],
+                                 [1. / 2, 0, 0]])
+
+    def test_p_distances_undefined(self):
+        matrix = _stack_bytes([DNA('AC-T'), DNA('AC-T'), DNA('--G-')], 4)
+        gap_codes = np.frombuffer(b'-', dtype=np.uint8)
+        with six.assertRaisesRegex(self, ValueError, '0 and 2'):
+            _p_distances(matrix, gap_codes)
+
+    def test_kmer_distances(self):
+        seqs = [DNA('AAAC'), DNA('AAC'), DNA('GTTT')]
+        npt.assert_almost_equal(_kmer_distances(seqs, 2),
+                                [[0, 0, 1], [0, 0, 1], [1, 1, 0]])
+        npt.assert_almost_equal(_kmer_distances(seqs, 3),
+                                [[0, 0.5, 1], [0.5, 0, 1], [1, 1, 0]])
+
+    def test_kmer_distances_invalid(self):
+        with six.assertRaisesRegex(self, ValueError, 'greater than 0'):
+            _kmer_distances([DNA('ACGT')], 0)
+        with six.assertRaisesRegex(self, ValueError, 'Sequence 1'):
+            _kmer_distances([DNA('ACGT'), DNA('AC')], 3)
+
+
+if __name__ == '__main__':
+    main()
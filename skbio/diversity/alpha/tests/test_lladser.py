@@ -83,10 +83,12 @@ def test_lladser_ci_f3():
     # Test different values of f=3 and r=14, which lie exactly on the
     # 95% interval line. For 100 reps using simple cumulative binomial
     # probs we expect to have more than 5 misses of the interval in 38%
-    # of all test runs. To make this test pass reliable we thus have to
-    # set a defined seed
+    # of all test runs. We thus use more reps and only check that the
+    # coverage is not significantly below 95%: with 400 reps, the observed
+    # coverage is below 92% in less than 1% of the test runs, so the test
+    # doesn't depend on how subsample_counts draws from the random state
     np.random.seed(12345678)
-    reps = 100
+    reps = 400
     sum = 0
     for i in range(reps):
         # re-create the obs for every estimate, such that they are truly
@@ -96,7 +98,7 @@ def test_lladser_ci_f3():
         if (low <= exp_p <= high):
             sum += 1
 
-    assert_true(sum/reps >= 0.95)
+    assert_true(sum/reps >= 0.92)
 
 
 def test_expand_counts():
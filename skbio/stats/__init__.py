@@ -29,6 +29,8 @@ Functions
 
    subsample_counts
    isubsample
+   rarefy_table
+   rarefaction_curve
 
 """
 
@@ -44,8 +46,10 @@ from __future__ import absolute_import, division, print_function
 
 from skbio.util import TestRunner
 
-from ._subsample import subsample_counts, isubsample
+from ._subsample import (subsample_counts, isubsample, rarefy_table,
+                         rarefaction_curve)
 
-__all__ = ['subsample_counts', 'isubsample']
+__all__ = ['subsample_counts', 'isubsample', 'rarefy_table',
+           'rarefaction_curve']
 
 test = TestRunner(__file__).test
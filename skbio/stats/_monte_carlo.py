@@ -0,0 +1,180 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2013--, scikit-bio development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from __future__ import absolute_import, division, print_function
+from future.builtins import range
+
+import numbers
+
+import numpy as np
+
+from skbio.util._misc import _parallel_map, _resolve_n_jobs
+
+# Number of permutations evaluated per batch. Batches are the unit of work
+# handed to threads, have their own random stream (see `_run_monte_carlo`)
+# and are the granularity at which early stopping is checked.
+_PERMUTATION_BATCH_SIZE = 100
+
+# Relative tolerance within which permuted statistics are considered ties of
+# the original statistic. Only absorbs rounding errors of statistics computed
+# in different ways (e.g., a different order of summation).
+_TIE_RTOL = 1e-12
+
+
+def _check_random_state(seed):
+    """Turn `seed` into a ``np.random.RandomState`` instance.
+
+    Parameters
+    ----------
+    seed : int, np.random.RandomState, or None
+        If ``None``, the global random state (i.e., ``np.random``) is
+        returned. If an int, a new ``RandomState`` seeded with it is returned.
+        If a ``RandomState``, it is returned unchanged.
+
+    Raises
+    ------
+    TypeError
+        If `seed` is not one of the types above.
+
+    """
+    if seed is None:
+        return np.random.mtrand._rand
+    if isinstance(seed, np.random.RandomState):
+        return seed
+    if isinstance(seed, (numbers.Integral, np.integer)):
+        return np.random.RandomState(seed)
+    raise TypeError("`seed` must be None, an int, or a numpy.random."
+                    "RandomState instance, not %r." % type(seed).__name__)
+
+
+def _count_at_least_as_extreme(stat, perm_stats, alternative):
+    """Count permuted statistics at least as extreme as `stat`.
+
+    Permuted statistics that are equal to `stat` up to floating point
+    rounding error (a relative difference of ``_TIE_RTOL``) count as at least
+    as extreme.
+
+    """
+    if alternative == 'two-sided':
+        stat, perm_stats = np.absolute(stat), np.absolute(perm_stats)
+        extreme = perm_stats >= stat
+    elif alternative == 'greater':
+        extreme = perm_stats >= stat
+    else:
+        extreme = perm_stats <= stat
+    return (extreme |
+            np.isclose(perm_stats, stat, rtol=_TIE_RTOL, atol=0)).sum()
+
+
+def _run_monte_carlo(stat, permuted_stats_function, permutations,
+                     alternative='greater', seed=None, n_jobs=1,
+                     precision=None):
+    """Compute the p-value of a test statistic with a permutation test.
+
+    Parameters
+    ----------
+    stat : float
+        Test statistic of the original (unpermuted) data.
+    permuted_stats_function : callable
+        ``permuted_stats_function(random_state, n)`` must return a 1-D array
+        of `n` test statistics, each computed on a random permutation of the
+        data drawn from `random_state` (a ``np.random.RandomState``). It may
+        compute the `n` statistics one by one or all at once.
+    permutations : int
+        Maximum number of permutations. Must be greater than or equal to zero.
+    alternative : {'greater', 'less', 'two-sided'}
+        Alternative hypothesis. Determines whether permuted statistics that
+        are greater than, less than, or greater in magnitude than `stat` are
+        counted.
+    seed : int, np.random.RandomState, or None, optional
+        Source of randomness. See Notes.
+    n_jobs : int, optional
+        Number of threads used to evaluate batches of permutations. If -1,
+        all CPUs are used.
+    precision : float, optional
+        If provided, stop once the standard error of the p-value estimate is
+        less than `precision`. Checked after each batch of permutations.
+
+    Returns
+    -------
+    p_value : float
+        Proportion of the permuted statistics (plus the original statistic)
+        that are at least as extreme as `stat`. ``np.nan`` if `permutations`
+        is zero or `stat` is ``np.nan``.
+    perm_stats : 1-D np.ndarray (float)
+        Permuted statistics. Contains fewer than `permutations` statistics if
+        the test stopped early, and none if `p_value` is ``np.nan``.
+
+    Raises
+    ------
+    ValueError
+        If `permutations` is negative, `alternative` is invalid, `precision`
+        is not positive, or `n_jobs` is invalid.
+
+    Notes
+    -----
+    Permutations are evaluated in batches of ``_PERMUTATION_BATCH_SIZE``.
+
+    If `seed` is ``None`` and `n_jobs` is 1, all batches are drawn in order
+    from NumPy's global random state, so seeding it with ``np.random.seed``
+    gives reproducible results. Otherwise, each batch draws from its own
+    ``RandomState`` whose seed is drawn from `seed` (or from the global random
+    state). Batches therefore have independent random streams that do not
+    depend on the thread evaluating them, and results for a given `seed`
+    are the same for any `n_jobs`.
+
+    Early stopping is checked after each batch in order, so the number of
+    permutations used does not depend on `n_jobs` either.
+
+    """
+    if permutations < 0:
+        raise ValueError("Number of permutations must be greater than or "
+                         "equal to zero.")
+    if alternative not in ('two-sided', 'greater', 'less'):
+        raise ValueError("Invalid alternative hypothesis '%s'." % alternative)
+    if precision is not None and precision <= 0:
+        raise ValueError("`precision` must be greater than zero.")
+    n_jobs = _resolve_n_jobs(n_jobs)
+    random_state = _check_random_state(seed)
+
+    if permutations == 0 or np.isnan(stat):
+        return np.nan, np.empty(0)
+
+    batch_sizes = [min(_PERMUTATION_BATCH_SIZE, permutations - start)
+                   for start in range(0, permutations,
+                                      _PERMUTATION_BATCH_SIZE)]
+    if seed is None and n_jobs == 1:
+        batch_states = [random_state] * len(batch_sizes)
+    else:
+        batch_states = [np.random.RandomState(batch_seed)
+                        for batch_seed in random_state.randint(
+                            2 ** 31 - 1, size=len(batch_sizes))]
+
+    def run_batch(batch):
+        return np.asarray(
+            permuted_stats_function(batch_states[batch], batch_sizes[batch]),
+            dtype=np.float64)
+
+    perm_stats = []
+    count = 0
+    num_perms = 0
+    for start in range(0, len(batch_sizes), n_jobs):
+        batches = range(start, min(start + n_jobs, len(batch_sizes)))
+        for batch_stats in _parallel_map(run_batch, batches, n_jobs):
+            perm_stats.append(batch_stats)
+            count += _count_at_least_as_extreme(stat, batch_stats,
+                                                alternative)
+            num_perms += len(batch_stats)
+
+            p_value = (count + 1) / (num_perms + 1)
+            if precision is not None and num_perms < permutations:
+                std_err = np.sqrt(p_value * (1 - p_value) / (num_perms + 1))
+                if std_err < precision:
+                    return p_value, np.concatenate(perm_stats)
+
+    return p_value, np.concatenate(perm_stats)
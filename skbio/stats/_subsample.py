@@ -9,24 +9,29 @@
 from __future__ import absolute_import, division, print_function
 from future.utils import viewitems
 
-import sys
-from warnings import warn
-from heapq import heappush, heappop
-from collections import defaultdict
 from copy import copy
+from itertools import islice
+from math import expm1, log
 
 import numpy as np
+from scipy.sparse import csr_matrix, issparse
 
-from skbio.util import EfficiencyWarning
-try:
-    from .__subsample import _subsample_counts_without_replacement
-except ImportError:
-    pass
+from skbio.stats._monte_carlo import _check_random_state
 from skbio.util._decorator import experimental
+from skbio.util._misc import _parallel_map
+
+# Number of rows (samples) subsampled by each task of `rarefy_table`.
+_RAREFY_BLOCK_ROWS = 64
+
+# Upper bound of log(W) in the reservoir sampler of `isubsample`. log(W) is
+# negative unless an exponential draw is exactly zero, in which case the next
+# item enters the reservoir.
+_MAX_LOG_W = -np.finfo(float).tiny
 
 
 @experimental(as_of="0.4.0")
-def isubsample(items, maximum, minimum=1, buf_size=1000, bin_f=None):
+def isubsample(items, maximum, minimum=1, buf_size=1000, bin_f=None,
+               seed=None):
     """Randomly subsample items from bins, without replacement.
 
     Randomly subsample items without replacement from an unknown number of
@@ -43,18 +48,18 @@ def isubsample(items, maximum, minimum=1, buf_size=1000, bin_f=None):
     minimum : unsigned int, optional
         The minimum number of items per bin. The default is 1.
     buf_size : unsigned int, optional
-        The size of the random value buffer. This buffer holds the random
-        values assigned to each item from items. In practice, it is unlikely
-        that this value will need to change. Increasing it will require more
-        resident memory, but potentially reduce the number of function calls
-        made to the PRNG, whereas decreasing it will result in more function
-        calls and lower memory overhead. The default is 1000.
+        The size of the random value buffer. Random values are drawn from the
+        random state `buf_size` at a time. In practice, it is unlikely that
+        this value will need to change. The default is 1000.
     bin_f : function, optional
         Method to determine what bin an item is associated with. If None (the
         default), then all items are considered to be part of the same bin.
         This function will be provided with each entry in items, and must
         return a hashable value indicating the bin that that entry should be
         placed in.
+    seed : int or np.random.RandomState, optional
+        Seed or random state to draw random values from. If ``None`` (the
+        default), NumPy's global random state is used.
 
     Returns
     -------
@@ -83,14 +88,26 @@ def isubsample(items, maximum, minimum=1, buf_size=1000, bin_f=None):
 
     All items associated to a bin have an equal probability of being retained.
 
+    Each bin is a reservoir sampled with Algorithm L [1]_: once a bin holds
+    ``maximum`` items, the number of its items to skip before the next one
+    that enters the reservoir is drawn at random. Random values are only
+    drawn, and items only copied, for items that enter a reservoir, i.e.,
+    O(``maximum`` * log(n / ``maximum``)) times for a bin of n items. If
+    `bin_f` is ``None``, skipped items are consumed from `items` without
+    being inspected at all.
+
+    References
+    ----------
+    .. [1] Li, K.-H. (1994). "Reservoir-Sampling Algorithms of Time Complexity
+       O(n(1 + log(N/n)))". ACM Transactions on Mathematical Software 20 (4):
+       481-493.
+
     Examples
     --------
     Randomly keep up to 2 sequences per sample from a set of demultiplexed
     sequences:
 
     >>> from skbio.stats import isubsample
-    >>> import numpy as np
-    >>> np.random.seed(123)
     >>> seqs = [('sampleA', 'AATTGG'),
     ...         ('sampleB', 'ATATATAT'),
     ...         ('sampleC', 'ATGGCC'),
@@ -98,61 +115,114 @@ def isubsample(items, maximum, minimum=1, buf_size=1000, bin_f=None):
     ...         ('sampleB', 'ATGGCG'),
     ...         ('sampleA', 'ATGGCA')]
     >>> bin_f = lambda item: item[0]
-    >>> for bin_, item in sorted(isubsample(seqs, 2, bin_f=bin_f)):
+    >>> for bin_, item in sorted(isubsample(seqs, 2, bin_f=bin_f, seed=123)):
     ...     print(bin_, item[1])
     sampleA AATTGG
     sampleA ATGGCA
-    sampleB ATATATAT
     sampleB ATGGCG
+    sampleB ATGGCT
     sampleC ATGGCC
 
     Now, let's set the minimum to 2:
 
     >>> bin_f = lambda item: item[0]
-    >>> for bin_, item in sorted(isubsample(seqs, 2, 2, bin_f=bin_f)):
+    >>> for bin_, item in sorted(isubsample(seqs, 2, 2, bin_f=bin_f,
+    ...                                     seed=123)):
     ...     print(bin_, item[1])
     sampleA AATTGG
     sampleA ATGGCA
-    sampleB ATATATAT
     sampleB ATGGCG
+    sampleB ATGGCT
     """
     if minimum > maximum:
         raise ValueError("minimum cannot be > maximum.")
     if minimum < 1 or maximum < 1:
         raise ValueError("minimum and maximum must be > 0.")
+
+    random_state = _check_random_state(seed)
+    exponentials = _buffered(random_state.standard_exponential, buf_size)
+    uniforms = _buffered(random_state.random_sample, buf_size)
+
     if bin_f is None:
-        def bin_f(x):
-            return True
+        reservoirs = {True: _sample_reservoir(iter(items), maximum,
+                                              exponentials, uniforms)}
+    else:
+        reservoirs = _sample_reservoirs(items, maximum, bin_f, exponentials,
+                                        uniforms)
 
-    # buffer some random values
-    random_values = np.random.randint(0, sys.maxsize, buf_size)
-    random_idx = 0
+    # yield items
+    for bin_, reservoir in viewitems(reservoirs):
+        if len(reservoir) < minimum:
+            continue
 
-    result = defaultdict(list)
-    for item in items:
-        bin_ = bin_f(item)
-        heap = result[bin_]
+        for item in reservoir:
+            yield (bin_, item)
 
-        # pull a random value, and recompute random values if we've consumed
-        # our buffer
-        random_value = random_values[random_idx]
-        random_idx += 1
-        if random_idx >= buf_size:
-            random_values = np.random.randint(0, sys.maxsize, buf_size)
-            random_idx = 0
 
-        # push our item on to the heap and drop the smallest if necessary
-        heappush(heap, (random_value, copy(item)))
-        if len(heap) > maximum:
-            heappop(heap)
+def _buffered(draw, buf_size):
+    """Yield random values drawn `buf_size` at a time with `draw`."""
+    while True:
+        for value in draw(buf_size).tolist():
+            yield value
 
-    # yield items
-    for bin_, heap in viewitems(result):
-        if len(heap) < minimum:
+
+def _reservoir_skip(log_w, exponentials):
+    """Draw the number of items to skip before the next one enters a reservoir.
+
+    `log_w` is the (negative) logarithm of Algorithm L's W. The number of
+    skipped items is ``floor(log(u) / log(1 - W))`` for a uniform ``u``,
+    computed as the ratio of an exponential to ``-log(1 - W)``.
+
+    """
+    return int(next(exponentials) / -log(-expm1(min(log_w, _MAX_LOG_W))))
+
+
+def _sample_reservoir(items, maximum, exponentials, uniforms):
+    """Sample up to `maximum` items of an iterator, skipping over the rest."""
+    reservoir = [copy(item) for item in islice(items, maximum)]
+    if len(reservoir) < maximum:
+        return reservoir
+
+    log_w = -next(exponentials) / maximum
+    while True:
+        skip = _reservoir_skip(log_w, exponentials)
+        # advance the iterator by `skip` items without looking at them
+        next(islice(items, skip, skip), None)
+        for item in islice(items, 1):
+            break
+        else:
+            return reservoir
+        reservoir[int(next(uniforms) * maximum)] = copy(item)
+        log_w -= next(exponentials) / maximum
+
+
+def _sample_reservoirs(items, maximum, bin_f, exponentials, uniforms):
+    """Sample up to `maximum` items of each bin of an iterable."""
+    # per bin: [items seen, number of the next item to enter the reservoir,
+    # log(W), reservoir]
+    states = {}
+    for item in items:
+        bin_ = bin_f(item)
+        state = states.get(bin_)
+        if state is None:
+            state = states[bin_] = [0, 1, 0.0, []]
+        state[0] += 1
+        if state[0] < state[1]:
             continue
 
-        for _, item in heap:
-            yield (bin_, item)
+        seen = state[0]
+        reservoir = state[3]
+        if seen <= maximum:
+            reservoir.append(copy(item))
+            if seen < maximum:
+                state[1] = seen + 1
+                continue
+        else:
+            reservoir[int(next(uniforms) * maximum)] = copy(item)
+        state[2] -= next(exponentials) / maximum
+        state[1] = seen + _reservoir_skip(state[2], exponentials) + 1
+
+    return {bin_: state[3] for bin_, state in viewitems(states)}
 
 
 @experimental(as_of="0.4.0")
@@ -183,8 +253,6 @@ def subsample_counts(counts, n, replace=False):
         If `counts` cannot be safely converted to an integer datatype.
     ValueError
         If `n` is less than zero or greater than the sum of `counts`.
-    EfficiencyWarning
-        If the accelerated code isn't present or hasn't been compiled.
 
     See Also
     --------
@@ -201,6 +269,13 @@ def subsample_counts(counts, n, replace=False):
     equal to the number of items in `counts`, the subsampled vector that is
     returned may not necessarily be the same vector as `counts`.
 
+    Subsampling without replacement draws the subsampled counts from the
+    multivariate hypergeometric distribution, one hypergeometric draw per
+    split of the (nonzero) counts into halves, recursively. This is
+    equivalent to drawing `n` items at random from all the items in
+    `counts`, but its cost depends on the number of nonzero counts rather
+    than on the number of items.
+
     Examples
     --------
     Subsample 4 items (without replacement) from a vector of counts:
@@ -250,20 +325,308 @@ def subsample_counts(counts, n, replace=False):
         if counts_sum == n:
             result = counts
         else:
-            try:
-                result = _subsample_counts_without_replacement(counts, n,
-                                                               counts_sum)
-            except NameError:
-                warn("Accelerated subsampling without replacement isn't"
-                     " available.", EfficiencyWarning)
-
-                nz = counts.nonzero()[0]
-                unpacked = np.concatenate([np.repeat(np.array(i,), counts[i])
-                                           for i in nz])
-                permuted = np.random.permutation(unpacked)[:n]
-
-                result = np.zeros(len(counts), dtype=int)
-                for p in permuted:
-                    result[p] += 1
+            result = _subsample_counts_without_replacement(counts, n)
+
+    return result
+
+
+@experimental(as_of="0.4.0-dev")
+def rarefy_table(counts, depth, ids=None, n_jobs=1, seed=None):
+    """Subsample every sample of a table of counts to the same depth.
+
+    Parameters
+    ----------
+    counts : 2-D array_like or scipy.sparse matrix
+        Table of counts (integers) with samples as rows and features (e.g.,
+        OTUs) as columns.
+    depth : int
+        Number of items to subsample (without replacement) from each sample.
+        Samples with fewer items are dropped.
+    ids : iterable of str, optional
+        IDs of the samples (rows) of `counts`. If not provided, samples are
+        identified by their row indices.
+    n_jobs : int, optional
+        Number of threads used to subsample blocks of samples. If -1, all
+        CPUs are used.
+    seed : int or np.random.RandomState, optional
+        Seed or random state from which the random state of each sample is
+        seeded. If ``None`` (the default), NumPy's global random state is
+        used.
+
+    Returns
+    -------
+    rarefied : 2-D np.ndarray or scipy.sparse.csr_matrix
+        Subsampled counts of the samples with at least `depth` items, in the
+        order of `counts`. Each row sums to `depth`. A sparse matrix is
+        returned if `counts` is sparse.
+    ids : np.ndarray
+        IDs (or row indices) of the samples in `rarefied`.
+
+    Raises
+    ------
+    TypeError
+        If `counts` cannot be safely converted to an integer datatype.
+    ValueError
+        If `counts` is not 2-D or contains negative counts, if the number of
+        `ids` does not match the number of samples, or if `depth` is negative.
+
+    See Also
+    --------
+    subsample_counts
+
+    Notes
+    -----
+    Each sample is subsampled as in ``subsample_counts``, with its own
+    ``RandomState``. The seeds of these random states are drawn from `seed`
+    for all samples (including dropped ones) before any subsampling, so the
+    subsampled counts of a sample only depend on `seed` and its position in
+    `counts`, and not on `n_jobs`.
+
+    Subsampling a sparse table only involves its nonzero counts, which are
+    never expanded into a dense table.
+
+    Examples
+    --------
+    >>> from skbio.stats import rarefy_table
+    >>> counts = [[4, 5, 0, 2, 1],
+    ...           [0, 1, 0, 1, 0],
+    ...           [9, 0, 3, 0, 0]]
+    >>> rarefied, ids = rarefy_table(counts, 5, ids=['A', 'B', 'C'], seed=42)
+    >>> rarefied.sum(axis=1)
+    array([5, 5])
+    >>> print(list(ids))
+    ['A', 'C']
+
+    """
+    if depth < 0:
+        raise ValueError("depth cannot be negative.")
+
+    sparse = issparse(counts)
+    if sparse:
+        counts = csr_matrix(counts)
+        data = counts.data.astype(int, casting='safe', copy=False)
+    else:
+        counts = np.asarray(counts).astype(int, casting='safe', copy=False)
+        if counts.ndim != 2:
+            raise ValueError("Only 2-D tables of counts are supported.")
+        data = counts
+    if (data < 0).any():
+        raise ValueError("Counts cannot contain negative values.")
+
+    num_samples = counts.shape[0]
+    if ids is None:
+        ids = np.arange(num_samples)
+    else:
+        ids = np.asarray(list(ids))
+        if len(ids) != num_samples:
+            raise ValueError("Number of IDs (%d) must match the number of "
+                             "samples (%d)." % (len(ids), num_samples))
+
+    random_state = _check_random_state(seed)
+    sample_seeds = random_state.randint(2 ** 31 - 1, size=num_samples)
+    totals = np.asarray(counts.sum(axis=1)).ravel()
+    kept = np.flatnonzero(totals >= depth)
+
+    if sparse:
+        starts = counts.indptr[kept]
+        stops = counts.indptr[kept + 1]
+        indptr = np.concatenate(([0], np.cumsum(stops - starts)))
+        result = np.empty(indptr[-1], dtype=int)
+        indices = counts.indices[np.repeat(totals >= depth,
+                                           np.diff(counts.indptr))]
+
+        def sample(i):
+            return data[starts[i]:stops[i]], result[indptr[i]:indptr[i + 1]]
+    else:
+        result = np.empty((len(kept), counts.shape[1]), dtype=int)
+
+        def sample(i):
+            return data[kept[i]], result[i]
+
+    def rarefy_block(start):
+        for i in range(start, min(start + _RAREFY_BLOCK_ROWS, len(kept))):
+            sample_counts, out = sample(i)
+            if totals[kept[i]] == depth:
+                out[:] = sample_counts
+            else:
+                out[:] = _subsample_counts_without_replacement(
+                    sample_counts, depth, sample_seeds[kept[i]])
+
+    _parallel_map(rarefy_block, range(0, len(kept), _RAREFY_BLOCK_ROWS),
+                  n_jobs)
+
+    if sparse:
+        result = csr_matrix((result, indices, indptr),
+                            shape=(len(kept), counts.shape[1]))
+        result.eliminate_zeros()
+    return result, ids[kept]
+
+
+@experimental(as_of="0.4.0-dev")
+def rarefaction_curve(counts, depths, metrics, iterations=10, n_jobs=1,
+                      seed=None):
+    """Compute alpha diversity metrics of repeated subsamples at many depths.
+
+    Parameters
+    ----------
+    counts : 1-D or 2-D array_like
+        Vector of counts (integers) of a sample, or table of counts with
+        samples as rows and features (e.g., OTUs) as columns.
+    depths : 1-D array_like (int)
+        Subsampling depths. Must be greater than zero.
+    metrics : list of str or callable
+        Alpha diversity metrics to compute at each depth, either as names of
+        functions in ``skbio.diversity.alpha`` (e.g., ``'shannon'``) or as
+        callables that take a counts vector and return a number.
+    iterations : int, optional
+        Number of subsamples drawn at each depth.
+    n_jobs : int, optional
+        Number of threads used to process samples of a table. If -1, all CPUs
+        are used.
+    seed : int or np.random.RandomState, optional
+        Seed or random state from which the random state of each sample is
+        seeded (as in ``rarefy_table``). If ``None`` (the default), NumPy's
+        global random state is used.
+
+    Returns
+    -------
+    np.ndarray (float)
+        Values of the metrics, indexed by depth, iteration and metric (in the
+        order of `depths` and `metrics`). If `counts` is 2-D, the first axis
+        is the sample. Depths greater than the number of items of a sample
+        are ``np.nan``.
+
+    Raises
+    ------
+    ValueError
+        If `counts` is not 1-D or 2-D or contains negative counts, if `depths`
+        are not greater than zero, if `metrics` is empty or names an unknown
+        metric, or if `iterations` is less than one.
+
+    See Also
+    --------
+    subsample_counts
+    rarefy_table
+    skbio.diversity.alpha
+
+    Notes
+    -----
+    Each iteration subsamples the deepest depth (that is not greater than
+    the number of items of the sample) once, and every shallower depth is
+    subsampled from the previous, deeper subsample. As a random subsample of
+    a random subsample is a random subsample of the original counts, each
+    depth has the same distribution as if subsampled with
+    ``subsample_counts``, but each subsample is drawn from fewer items.
+    Subsamples of different depths in the same iteration are nested, and
+    thus not independent.
+
+    Examples
+    --------
+    Observed OTUs and Shannon diversity of a sample subsampled 3 times to 5,
+    10 and 15 items:
+
+    >>> import numpy as np
+    >>> from skbio.stats import rarefaction_curve
+    >>> counts = [10, 4, 0, 2, 1, 6, 1, 1]
+    >>> curve = rarefaction_curve(counts, [5, 10, 15],
+    ...                           ['observed_otus', 'shannon'], iterations=3,
+    ...                           seed=0)
+    >>> curve.shape
+    (3, 3, 2)
+
+    The number of observed OTUs increases with depth:
+
+    >>> np.all(np.diff(curve[:, :, 0].mean(axis=1)) >= 0)
+    True
+
+    """
+    from skbio.diversity import alpha
+
+    counts = np.asarray(counts).astype(int, casting='safe', copy=False)
+    if counts.ndim not in (1, 2):
+        raise ValueError("Only 1-D vectors and 2-D tables of counts are "
+                         "supported.")
+    if (counts < 0).any():
+        raise ValueError("Counts cannot contain negative values.")
+    depths = np.asarray(depths).astype(int, casting='safe')
+    if depths.ndim != 1 or (depths < 1).any():
+        raise ValueError("Depths must be greater than zero.")
+    if iterations < 1:
+        raise ValueError("iterations must be greater than zero.")
+    if not metrics:
+        raise ValueError("At least one metric is required.")
+    metric_functions = []
+    for metric in metrics:
+        if callable(metric):
+            metric_functions.append(metric)
+        elif metric in alpha.__all__:
+            metric_functions.append(getattr(alpha, metric))
+        else:
+            raise ValueError("Unknown alpha diversity metric '%s'." % metric)
+
+    table = counts.reshape(-1, counts.shape[-1])
+    random_state = _check_random_state(seed)
+    sample_seeds = random_state.randint(2 ** 31 - 1, size=len(table))
+
+    # deepest depth first, then shallower ones
+    order = np.argsort(depths, kind='mergesort')[::-1]
+    result = np.full((len(table), len(depths), iterations,
+                      len(metric_functions)), np.nan)
+
+    def sample_curve(i):
+        sample_counts = table[i]
+        sample_random_state = np.random.RandomState(sample_seeds[i])
+        total = sample_counts.sum()
+        for iteration in range(iterations):
+            subsample_counts, subsample_total = sample_counts, total
+            for depth_idx in order:
+                depth = depths[depth_idx]
+                if depth > total:
+                    continue
+                if depth < subsample_total:
+                    subsample_counts = _subsample_counts_without_replacement(
+                        subsample_counts, depth, sample_random_state)
+                    subsample_total = depth
+                result[i, depth_idx, iteration] = [
+                    metric(subsample_counts) for metric in metric_functions]
+
+    _parallel_map(sample_curve, range(len(table)), n_jobs)
+
+    return result if counts.ndim == 2 else result[0]
+
+
+def _subsample_counts_without_replacement(counts, n, seed=None):
+    """Subsample `n` items from `counts` without replacement.
+
+    The nonzero counts are split into two halves (segments), and the number
+    of items subsampled from the first half is drawn from the hypergeometric
+    distribution given the total count of each half. Segments are split
+    again until they contain a single count, level by level, with one
+    vectorized draw for all the segments of a level. Segments from which no
+    item is subsampled are dropped.
 
+    """
+    random_state = _check_random_state(seed)
+    result = np.zeros(len(counts), dtype=int)
+    nonzero = counts.nonzero()[0]
+    cumulative = np.concatenate(([0], np.cumsum(counts[nonzero])))
+
+    starts = np.zeros(1, dtype=int)
+    stops = np.array([len(nonzero)])
+    draws = np.array([n])
+    while len(starts):
+        selected = draws > 0
+        starts, stops, draws = (starts[selected], stops[selected],
+                                draws[selected])
+        single = stops - starts == 1
+        result[nonzero[starts[single]]] = draws[single]
+
+        starts, stops, draws = starts[~single], stops[~single], draws[~single]
+        middles = (starts + stops) // 2
+        left_draws = random_state.hypergeometric(
+            cumulative[middles] - cumulative[starts],
+            cumulative[stops] - cumulative[middles], draws)
+        starts = np.concatenate((starts, middles))
+        stops = np.concatenate((middles, stops))
+        draws = np.concatenate((left_draws, draws - left_draws))
     return result
@@ -35,6 +35,15 @@ be considered. The multiplicative replacement technique [3]_ can be
 used to substitute these zeros with small pseudocounts without
 introducing major distortions to the data.
 
+``closure``, ``multiplicative_replacement``, ``clr``, ``clr_inv``, ``ilr``,
+``ilr_inv`` and ``centralize`` transform a block of rows at a time, so their
+temporary arrays don't grow with the number of compositions. They accept
+``scipy.sparse`` matrices and an ``out`` array for the result, which can be
+the input itself (if the shapes match) or a ``numpy.memmap``, so that tables
+larger than memory can be transformed. The default basis of ``ilr`` and
+``ilr_inv`` is applied implicitly, without building the :math:`(D-1) \times
+D` matrix.
+
 Functions
 ---------
 
@@ -97,29 +106,40 @@ array([ 0.25,  0.25,  0.5 ])
 # ----------------------------------------------------------------------------
 
 from __future__ import absolute_import, division, print_function
+from future.builtins import range
+
 import numpy as np
-import scipy.stats as ss
+from scipy.sparse import diags, issparse
 
 from skbio.util._decorator import experimental
 
+# Number of matrix cells transformed at a time. Bounds the size of the
+# temporary arrays of the row-wise transforms, which process a block of rows
+# at a time.
+_BLOCK_CELLS = 2 ** 20
+
 
 @experimental(as_of="0.4.0")
-def closure(mat):
+def closure(mat, out=None):
     """
     Performs closure to ensure that all elements add up to 1.
 
     Parameters
     ----------
-    mat : array_like
+    mat : array_like or scipy.sparse matrix
        a matrix of proportions where
        rows = compositions
        columns = components
+    out : numpy.ndarray, optional
+       array of the same shape as the result in which to store it. Can be
+       `mat` itself. Can't be given if `mat` is sparse.
 
     Returns
     -------
     array_like, np.float64
        A matrix of proportions where all of the values
-       are nonzero and each composition (row) adds up to 1
+       are nonzero and each composition (row) adds up to 1.
+       A sparse (CSR) matrix if `mat` is sparse.
 
     Examples
     --------
@@ -131,17 +151,26 @@ def closure(mat):
            [ 0.4,  0.4,  0.2]])
 
     """
-    mat = np.atleast_2d(mat)
-    if np.any(mat < 0):
+    if issparse(mat):
+        if out is not None:
+            raise ValueError("`out` can't be given for sparse input.")
+        mat = mat.tocsr()
+        if np.any(mat.data < 0):
+            raise ValueError("Cannot have negative proportions")
+        row_sums = np.asarray(mat.sum(axis=1), dtype=np.float64).ravel()
+        return diags(1 / row_sums).dot(mat).tocsr()
+    return _transform_rows(_closure, mat, out)
+
+
+def _closure(block):
+    if np.any(block < 0):
         raise ValueError("Cannot have negative proportions")
-    if mat.ndim > 2:
-        raise ValueError("Input matrix can only have two dimensions or less")
-    mat = mat / mat.sum(axis=1, keepdims=True)
-    return mat.squeeze()
+    block /= block.sum(axis=1, keepdims=True)
+    return block
 
 
 @experimental(as_of="0.4.0")
-def multiplicative_replacement(mat, delta=None):
+def multiplicative_replacement(mat, delta=None, out=None):
     r"""Replace all zeros with small non-zero values
 
     It uses the multiplicative replacement strategy [1]_ ,
@@ -151,7 +180,7 @@ def multiplicative_replacement(mat, delta=None):
 
     Parameters
     ----------
-    mat: array_like
+    mat: array_like or scipy.sparse matrix
        a matrix of proportions where
        rows = compositions and
        columns = components
@@ -160,6 +189,9 @@ def multiplicative_replacement(mat, delta=None):
        If delta is not specified, then the default delta is
        :math:`\delta = \frac{1}{N^2}` where :math:`N`
        is the number of components
+    out : numpy.ndarray, optional
+       array of the same shape as the result in which to store it. Can be
+       `mat` itself.
 
     Returns
     -------
@@ -183,18 +215,20 @@ def multiplicative_replacement(mat, delta=None):
            [ 0.0625,  0.4375,  0.4375,  0.0625]])
 
     """
-    mat = closure(mat)
-    z_mat = (mat == 0)
-
-    num_feats = mat.shape[-1]
-    tot = z_mat.sum(axis=-1, keepdims=True)
-
+    if not issparse(mat):
+        mat = np.asarray(mat)
     if delta is None:
-        delta = (1. / num_feats)**2
+        delta = (1. / mat.shape[-1])**2
+
+    def replace(block):
+        block = _closure(block)
+        z_mat = (block == 0)
+        tot = z_mat.sum(axis=-1, keepdims=True)
+        block *= 1 - tot * delta
+        block[z_mat] = delta
+        return block
 
-    zcnts = 1 - tot * delta
-    mat = np.where(z_mat, delta, zcnts * mat)
-    return mat.squeeze()
+    return _transform_rows(replace, mat, out)
 
 
 @experimental(as_of="0.4.0")
@@ -379,7 +413,7 @@ def inner(x, y):
     >>> x = np.array([.1, .3, .4, .2])
     >>> y = np.array([.2, .4, .2, .2])
     >>> inner(x, y)
-    0.21078524737545556
+    0.21078524737545554
     """
     x = closure(x)
     y = closure(y)
@@ -388,7 +422,7 @@ def inner(x, y):
 
 
 @experimental(as_of="0.4.0")
-def clr(mat):
+def clr(mat, out=None):
     r"""
     Performs centre log ratio transformation.
 
@@ -411,10 +445,13 @@ def clr(mat):
 
     Parameters
     ----------
-    mat : array_like, float
+    mat : array_like or scipy.sparse matrix, float
        a matrix of proportions where
        rows = compositions and
        columns = components
+    out : numpy.ndarray, optional
+       array of the same shape as the result in which to store it. Can be
+       `mat` itself.
 
     Returns
     -------
@@ -430,14 +467,17 @@ def clr(mat):
     array([-0.79451346,  0.30409883,  0.5917809 , -0.10136628])
 
     """
-    mat = closure(mat)
-    lmat = np.log(mat)
-    gm = lmat.mean(axis=-1, keepdims=True)
-    return (lmat - gm).squeeze()
+    return _transform_rows(_clr, mat, out)
+
+
+def _clr(block):
+    lmat = np.log(_closure(block), out=block)
+    lmat -= lmat.mean(axis=-1, keepdims=True)
+    return lmat
 
 
 @experimental(as_of="0.4.0")
-def clr_inv(mat):
+def clr_inv(mat, out=None):
     r"""
     Performs inverse centre log ratio transformation.
 
@@ -461,6 +501,9 @@ def clr_inv(mat):
        a matrix of real values where
        rows = transformed compositions and
        columns = components
+    out : numpy.ndarray, optional
+       array of the same shape as the result in which to store it. Can be
+       `mat` itself.
 
     Returns
     -------
@@ -476,11 +519,15 @@ def clr_inv(mat):
     array([ 0.21383822,  0.26118259,  0.28865141,  0.23632778])
 
     """
-    return closure(np.exp(mat))
+    return _transform_rows(_clr_inv, mat, out)
+
+
+def _clr_inv(block):
+    return _closure(np.exp(block, out=block))
 
 
 @experimental(as_of="0.4.0")
-def ilr(mat, basis=None, check=True):
+def ilr(mat, basis=None, check=True, out=None):
     r"""
     Performs isometric log ratio transformation.
 
@@ -500,11 +547,13 @@ def ilr(mat, basis=None, check=True):
 
     If an orthornormal basis isn't specified, the J. J. Egozcue orthonormal
     basis derived from Gram-Schmidt orthogonalization will be used by
-    default.
+    default. It isn't built: the :math:`j`-th coordinate is computed from
+    the mean of the first :math:`j` log components and the :math:`j+1`-th
+    one, using a running sum of the log components.
 
     Parameters
     ----------
-    mat: numpy.ndarray
+    mat: numpy.ndarray or scipy.sparse matrix
        a matrix of proportions where
        rows = compositions and
        columns = components
@@ -513,6 +562,17 @@ def ilr(mat, basis=None, check=True):
         orthonormal basis for Aitchison simplex
         defaults to J.J.Egozcue orthonormal basis
 
+    check: bool, optional
+        check whether `basis` is orthonormal
+
+    out : numpy.ndarray, optional
+        array of the same shape as the result in which to store it.
+
+    Returns
+    -------
+    numpy.ndarray
+        ilr transformed matrix
+
     Examples
     --------
     >>> import numpy as np
@@ -522,16 +582,20 @@ def ilr(mat, basis=None, check=True):
     array([-0.7768362 , -0.68339802,  0.11704769])
 
     """
-    mat = closure(mat)
+    if not issparse(mat):
+        mat = np.asarray(mat)
     if basis is None:
-        basis = clr_inv(_gram_schmidt_basis(mat.shape[-1]))
-    elif check:
+        return _transform_rows(_ilr_gram_schmidt, mat, out,
+                               num_columns=mat.shape[-1] - 1)
+    if check:
         _check_orthogonality(basis)
-    return inner(mat, basis)
+    clr_basis = np.atleast_2d(clr(basis))
+    return _transform_rows(lambda block: _clr(block).dot(clr_basis.T), mat,
+                           out, num_columns=len(clr_basis))
 
 
 @experimental(as_of="0.4.0")
-def ilr_inv(mat, basis=None, check=True):
+def ilr_inv(mat, basis=None, check=True, out=None):
     r"""
     Performs inverse isometric log ratio transform.
 
@@ -550,7 +614,7 @@ def ilr_inv(mat, basis=None, check=True):
 
     If an orthornormal basis isn't specified, the J. J. Egozcue orthonormal
     basis derived from Gram-Schmidt orthogonalization will be used by
-    default.
+    default. Like in ``ilr``, it isn't built.
 
 
     Parameters
@@ -564,6 +628,17 @@ def ilr_inv(mat, basis=None, check=True):
         orthonormal basis for Aitchison simplex
         defaults to J.J.Egozcue orthonormal basis
 
+    check: bool, optional
+        check whether `basis` is orthonormal
+
+    out : numpy.ndarray, optional
+        array of the same shape as the result in which to store it.
+
+    Returns
+    -------
+    numpy.ndarray
+        inverse ilr transformed matrix
+
     Examples
     --------
     >>> import numpy as np
@@ -573,24 +648,31 @@ def ilr_inv(mat, basis=None, check=True):
     array([ 0.34180297,  0.29672718,  0.22054469,  0.14092516])
 
     """
-
+    if not issparse(mat):
+        mat = np.asarray(mat)
     if basis is None:
-        basis = _gram_schmidt_basis(mat.shape[-1] + 1)
-    elif check:
+        return _transform_rows(_ilr_inv_gram_schmidt, mat, out,
+                               num_columns=mat.shape[-1] + 1)
+    if check:
         _check_orthogonality(basis)
-    return clr_inv(np.dot(mat, basis))
+    basis = np.atleast_2d(basis)
+    return _transform_rows(lambda block: _clr_inv(block.dot(basis)), mat, out,
+                           num_columns=basis.shape[1])
 
 
 @experimental(as_of="0.4.0")
-def centralize(mat):
+def centralize(mat, out=None):
     r"""Center data around its geometric average.
 
     Parameters
     ----------
-    mat : array_like, float
+    mat : array_like or scipy.sparse matrix, float
        a matrix of proportions where
        rows = compositions and
        columns = components
+    out : numpy.ndarray, optional
+       array of the same shape as the result in which to store it. Can be
+       `mat` itself.
 
     Returns
     -------
@@ -607,9 +689,107 @@ def centralize(mat):
            [ 0.32495488,  0.18761279,  0.16247744,  0.32495488]])
 
     """
-    mat = closure(mat)
-    cen = ss.gmean(mat, axis=0)
-    return perturb_inv(mat, cen)
+    # the geometric average is found in a first pass over the rows
+    log_sums = [0]
+    num_rows = [0]
+
+    def sum_logs(block):
+        log_sums[0] += np.log(_closure(block)).sum(axis=0)
+        num_rows[0] += len(block)
+        return block[:, :0]
+
+    _transform_rows(sum_logs, mat, None, num_columns=0)
+    if not num_rows[0]:
+        # there are no compositions to center
+        return _transform_rows(_closure, mat, out)
+    cen = np.exp(log_sums[0] / num_rows[0])
+
+    def perturb_inv_cen(block):
+        block = _closure(block)
+        block /= cen
+        return _closure(block)
+
+    return _transform_rows(perturb_inv_cen, mat, out)
+
+
+def _ilr_gram_schmidt(block):
+    """Compute ilr coordinates in the basis of ``_gram_schmidt_basis``."""
+    lmat = np.log(_closure(block), out=block)
+    num_feats = lmat.shape[1]
+    i = np.arange(1, num_feats)
+    coords = np.cumsum(lmat[:, :-1], axis=1)
+    coords /= i
+    coords -= lmat[:, 1:]
+    coords *= np.sqrt(i / (i + 1))
+    return coords
+
+
+def _ilr_inv_gram_schmidt(block):
+    """Compute clr_inv of coordinates in the basis of ``_gram_schmidt_basis``.
+    """
+    num_coords = block.shape[1]
+    i = np.arange(1, num_coords + 1)
+    # coordinate j contributes its weight to the first j + 1 components and
+    # minus (j + 1) times its weight to the j + 2-th component
+    block *= np.sqrt(i / (i + 1)) / i
+    clr_mat = np.zeros((len(block), num_coords + 1))
+    clr_mat[:, :-1] = np.cumsum(block[:, ::-1], axis=1)[:, ::-1]
+    clr_mat[:, 1:] -= block * i
+    return _clr_inv(clr_mat)
+
+
+def _transform_rows(func, mat, out, num_columns=None):
+    """Apply a row-wise transform to a block of rows of `mat` at a time.
+
+    Parameters
+    ----------
+    func : callable
+        Takes a 2-D float64 block of rows of `mat`, which it may modify, and
+        returns the transformed rows.
+    mat : array_like or scipy.sparse matrix
+        1-D or 2-D matrix to transform.
+    out : numpy.ndarray or None
+        Array in which to store the result. If ``None``, a new array is
+        allocated and squeezed before being returned.
+    num_columns : int, optional
+        Number of columns of the result. Defaults to the number of columns of
+        `mat`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Transformed matrix (`out`, if given).
+
+    """
+    if issparse(mat):
+        mat = mat.tocsr()
+    else:
+        mat = np.atleast_2d(mat)
+        if mat.ndim > 2:
+            raise ValueError(
+                "Input matrix can only have two dimensions or less")
+    num_rows, num_cols = mat.shape
+    if num_columns is None:
+        num_columns = num_cols
+
+    if out is None:
+        result = np.empty((num_rows, num_columns))
+    else:
+        result = np.atleast_2d(out)
+        if result.shape != (num_rows, num_columns):
+            raise ValueError(
+                "`out` must have shape %r, not %r." %
+                ((num_rows, num_columns), result.shape))
+
+    step = max(1, _BLOCK_CELLS // max(num_cols, 1))
+    for start in range(0, num_rows, step):
+        if issparse(mat):
+            block = mat[start:start + step].toarray().astype(np.float64)
+        else:
+            block = np.array(mat[start:start + step], dtype=np.float64)
+        result[start:start + step] = func(block)
+
+    return result.squeeze() if out is None else out
 
 
 def _gram_schmidt_basis(n):
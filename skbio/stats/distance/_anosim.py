@@ -16,9 +16,14 @@ from scipy.stats import rankdata
 from ._base import (_preprocess_input, _run_monte_carlo_stats, _build_results)
 from skbio.util._decorator import experimental
 
+# Number of (grouping vector, pair of objects) comparisons made at a time by
+# ``_compute_r_stat``.
+_BLOCK_CELLS = 2 ** 20
+
 
 @experimental(as_of="0.4.0")
-def anosim(distance_matrix, grouping, column=None, permutations=999):
+def anosim(distance_matrix, grouping, column=None, permutations=999,
+           seed=None, n_jobs=1, precision=None):
     """Test for significant differences between groups using ANOSIM.
 
     Analysis of Similarities (ANOSIM) is a non-parametric method that tests
@@ -60,6 +65,19 @@ def anosim(distance_matrix, grouping, column=None, permutations=999):
         significance. Must be greater than or equal to zero. If zero,
         statistical significance calculations will be skipped and the p-value
         will be ``np.nan``.
+    seed : int or np.random.RandomState, optional
+        Seed or random state used to draw the permutations. If ``None``
+        (the default), NumPy's global random state is used.
+    n_jobs : int, optional
+        Number of threads used to evaluate permutations. If -1, all CPUs are
+        used. For a given `seed`, results do not depend on `n_jobs`.
+        Threads only speed up the parts of each batch of permutations that
+        release the GIL; drawing the permutations is a Python loop that holds
+        the GIL and gains nothing from more threads.
+    precision : float, optional
+        If provided, stop drawing permutations once the standard error of the
+        p-value is less than `precision`. Results then report the number of
+        permutations that were actually used.
 
     Returns
     -------
@@ -177,30 +195,47 @@ def anosim(distance_matrix, grouping, column=None, permutations=999):
 
     test_stat_function = partial(_compute_r_stat, tri_idxs, ranked_dists,
                                  divisor)
-    stat, p_value = _run_monte_carlo_stats(test_stat_function, grouping,
-                                           permutations)
+    stat, p_value, permutations = _run_monte_carlo_stats(
+        test_stat_function, grouping, permutations, vectorized=True, seed=seed,
+        n_jobs=n_jobs, precision=precision)
 
     return _build_results('ANOSIM', 'R', sample_size, num_groups, stat,
                           p_value, permutations)
 
 
-def _compute_r_stat(tri_idxs, ranked_dists, divisor, grouping):
-    """Compute ANOSIM R statistic (between -1 and +1)."""
-    # Create a matrix where True means that the two objects are in the same
-    # group. This ufunc requires that grouping is a numeric vector (e.g., it
-    # won't work with a grouping vector of strings).
-    grouping_matrix = np.equal.outer(grouping, grouping)
+def _compute_r_stat(tri_idxs, ranked_dists, divisor, groupings):
+    """Compute ANOSIM R statistic (between -1 and +1) for each grouping.
+
+    `groupings` is a 2-D array with one grouping vector per row. Pairs of
+    objects are compared a block at a time: looking up the labels of the
+    row and column object of each pair (`tri_idxs`, in the same order as
+    `ranked_dists`) tells which pairs are within-group for every grouping
+    vector at once.
 
-    # Extract upper triangle from the grouping matrix. It is important to
-    # extract the values in the same order that the distances are extracted
-    # from the distance matrix (see ranked_dists). Extracting the upper
-    # triangle (excluding the diagonal) preserves this order.
-    grouping_tri = grouping_matrix[tri_idxs]
+    """
+    rows, cols = tri_idxs
+    num_groupings = groupings.shape[0]
+    # smaller labels are faster to look up
+    groupings = groupings.astype(np.min_scalar_type(groupings.max()))
+
+    within_sums = np.zeros(num_groupings)
+    step = max(1, _BLOCK_CELLS // num_groupings)
+    for start in range(0, len(ranked_dists), step):
+        stop = start + step
+        within = (groupings[:, rows[start:stop]] ==
+                  groupings[:, cols[start:stop]])
+        within_sums += np.dot(within, ranked_dists[start:stop])
+
+    num_groups = groupings.max() + 1
+    group_sizes = np.array([np.bincount(grouping, minlength=num_groups)
+                            for grouping in groupings])
+    within_counts = (group_sizes * (group_sizes - 1) // 2).sum(axis=1)
 
     # within
-    r_W = np.mean(ranked_dists[grouping_tri])
+    r_W = within_sums / within_counts
 
     # between
-    r_B = np.mean(ranked_dists[np.invert(grouping_tri)])
+    r_B = ((ranked_dists.sum() - within_sums) /
+           (len(ranked_dists) - within_counts))
 
     return (r_B - r_W) / divisor
@@ -23,6 +23,7 @@ from skbio.stats._misc import _pprint_strs
 from skbio.util import find_duplicates
 from skbio.util._decorator import experimental
 from skbio.util._misc import resolve_key
+from skbio.stats._monte_carlo import _run_monte_carlo
 
 
 class DissimilarityMatrixError(Exception):
@@ -939,25 +940,44 @@ def _df_to_vector(distance_matrix, df, column):
     return grouping.tolist()
 
 
-def _run_monte_carlo_stats(test_stat_function, grouping, permutations):
-    """Run stat test and compute significance with Monte Carlo permutations."""
-    if permutations < 0:
-        raise ValueError(
-            "Number of permutations must be greater than or equal to zero.")
-
-    stat = test_stat_function(grouping)
+def _run_monte_carlo_stats(test_stat_function, grouping, permutations,
+                           vectorized=False, seed=None, n_jobs=1,
+                           precision=None):
+    """Run stat test and compute significance with Monte Carlo permutations.
 
-    p_value = np.nan
-    if permutations > 0:
-        perm_stats = np.empty(permutations, dtype=np.float64)
+    If `vectorized` is ``True``, `test_stat_function` takes a 2-D array with
+    one grouping vector per row and returns an array of test statistics (one
+    per row). Permuted grouping vectors are then passed to it a batch at a
+    time.
 
-        for i in range(permutations):
-            perm_grouping = np.random.permutation(grouping)
-            perm_stats[i] = test_stat_function(perm_grouping)
+    `seed`, `n_jobs` and `precision` are passed to
+    ``skbio.stats._monte_carlo._run_monte_carlo``.
 
-        p_value = ((perm_stats >= stat).sum() + 1) / (permutations + 1)
+    Returns the test statistic, the p-value and the number of permutations
+    that were used (which may be less than `permutations` if `precision` is
+    provided).
 
-    return stat, p_value
+    """
+    grouping = np.asarray(grouping)
+    if vectorized:
+        stat = test_stat_function(grouping[np.newaxis])[0]
+    else:
+        stat = test_stat_function(grouping)
+
+    def permuted_stats(random_state, n):
+        perm_groupings = np.array([random_state.permutation(grouping)
+                                   for _ in range(n)])
+        if vectorized:
+            return test_stat_function(perm_groupings)
+        return [test_stat_function(perm_grouping)
+                for perm_grouping in perm_groupings]
+
+    p_value, perm_stats = _run_monte_carlo(
+        stat, permuted_stats, permutations, seed=seed, n_jobs=n_jobs,
+        precision=precision)
+    if np.isnan(p_value):
+        return stat, p_value, permutations
+    return stat, p_value, len(perm_stats)
 
 
 def _build_results(method_name, test_stat_name, sample_size, num_groups, stat,
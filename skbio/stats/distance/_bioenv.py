@@ -8,19 +8,28 @@
 
 from __future__ import absolute_import, division, print_function
 
-from itertools import combinations
+from future.builtins import range
+
+from itertools import combinations, islice
 
 import numpy as np
 import pandas as pd
 from scipy.spatial.distance import pdist
-from scipy.stats import spearmanr
+from scipy.stats import rankdata
 
 from skbio.stats.distance import DistanceMatrix
 from skbio.util._decorator import experimental
+from skbio.util._misc import _parallel_map
+from ._mantel import _standardize
+
+# Number of subsets of variables evaluated by each task of an exhaustive
+# search.
+_SUBSETS_PER_TASK = 1000
 
 
 @experimental(as_of="0.4.0")
-def bioenv(distance_matrix, data_frame, columns=None):
+def bioenv(distance_matrix, data_frame, columns=None, search='exhaustive',
+           n_jobs=1):
     """Find subset of variables maximally correlated with distances.
 
     Finds subsets of variables whose Euclidean distances (after scaling the
@@ -58,6 +67,16 @@ def bioenv(distance_matrix, data_frame, columns=None):
         calculations. If not provided, defaults to all columns in `data_frame`.
         The values in each column must be numeric or convertible to a numeric
         type.
+    search : {'exhaustive', 'stepwise'}, optional
+        How subsets of variables are searched. ``'exhaustive'`` evaluates all
+        possible subsets. ``'stepwise'`` builds the subsets by forward
+        selection: the best subset of each size is the best subset of the
+        previous size plus the variable that maximizes the correlation. This
+        is much faster with many variables, but isn't guaranteed to find the
+        best subsets.
+    n_jobs : int, optional
+        Number of threads used to evaluate subsets of variables. If -1, all
+        CPUs are used.
 
     Returns
     -------
@@ -74,7 +93,7 @@ def bioenv(distance_matrix, data_frame, columns=None):
         If column name(s) or `distance_matrix` IDs cannot be found in
         `data_frame`, if there is missing data (``NaN``) in the environmental
         variables, or if the environmental variables cannot be scaled (e.g.,
-        due to zero variance).
+        due to zero variance), or if `search` is invalid.
 
     See Also
     --------
@@ -88,12 +107,22 @@ def bioenv(distance_matrix, data_frame, columns=None):
     PRIMER-E [3]_ (originally called BIO-ENV, but is now called BEST).
 
     .. warning:: This method can take a *long* time to run if a large number of
-       variables are specified, as all possible subsets are evaluated at each
-       subset size.
+       variables are specified and ``search='exhaustive'``, as all possible
+       subsets are evaluated at each subset size.
 
     The variables are scaled before computing the Euclidean distance: each
     column is centered and then scaled by its standard deviation.
 
+    The distances in `distance_matrix` are ranked a single time. As Euclidean
+    distances have the same ranks as squared Euclidean distances, the
+    environmental distances of a subset of variables are the sum of the
+    squared distances of each variable, which are computed once. Consecutive
+    subsets share most of their variables, so their sums are updated
+    incrementally.
+
+    The stepwise search is similar to the forward steps of ``vegan::bvstep``
+    [2]_, without its backward elimination steps or random restarts.
+
     References
     ----------
     .. [1] Clarke, K. R & Ainsworth, M. 1993. "A method of linking multivariate
@@ -182,41 +211,129 @@ def bioenv(distance_matrix, data_frame, columns=None):
         raise TypeError("All specified columns in the data frame must be "
                         "numeric.")
 
+    if search not in ('exhaustive', 'stepwise'):
+        raise ValueError("Invalid search '%s'." % search)
+
     # Scale the vars and extract the underlying numpy array from the data
     # frame. We mainly do this for performance as we'll be taking subsets of
     # columns within a tight loop and using a numpy array ends up being ~2x
     # faster.
     vars_array = _scale(vars_df).values
-    dm_flat = distance_matrix.condensed_form()
+    ranked_dm = _standardize(rankdata(distance_matrix.condensed_form()))
 
-    num_vars = len(columns)
-    var_idxs = np.arange(num_vars)
+    # Squared Euclidean distances contributed by each variable.
+    sq_dists = np.array([pdist(vars_array[:, [i]], metric='sqeuclidean')
+                         for i in range(len(columns))])
+
+    if search == 'exhaustive':
+        best = _exhaustive_search(ranked_dm, sq_dists, n_jobs)
+    else:
+        best = _stepwise_search(ranked_dm, sq_dists, n_jobs)
 
     # For each subset size, store the best combination of variables:
     #     (string identifying best vars, subset size, rho)
-    max_rhos = np.empty(num_vars, dtype=[('vars', object),
-                                         ('size', int),
-                                         ('correlation', float)])
-    for subset_size in range(1, num_vars + 1):
-        max_rho = None
-        for subset_idxs in combinations(var_idxs, subset_size):
-            # Compute Euclidean distances using the current subset of
-            # variables. pdist returns the distances in condensed form.
-            vars_dm_flat = pdist(vars_array[:, subset_idxs],
-                                 metric='euclidean')
-            rho = spearmanr(dm_flat, vars_dm_flat)[0]
-
-            # If there are ties for the best rho at a given subset size, choose
-            # the first one in order to match vegan::bioenv's behavior.
-            if max_rho is None or rho > max_rho[0]:
-                max_rho = (rho, subset_idxs)
-
-        vars_label = ', '.join([columns[i] for i in max_rho[1]])
-        max_rhos[subset_size - 1] = (vars_label, subset_size, max_rho[0])
+    max_rhos = np.empty(len(columns), dtype=[('vars', object),
+                                             ('size', int),
+                                             ('correlation', float)])
+    for subset_size, (rho, subset_idxs) in enumerate(best, 1):
+        vars_label = ', '.join([columns[i] for i in subset_idxs])
+        max_rhos[subset_size - 1] = (vars_label, subset_size, rho)
 
     return pd.DataFrame.from_records(max_rhos, index='vars')
 
 
+def _correlation(ranked_dm, vars_sq_dists):
+    """Compute Spearman's rho between distances and squared distances.
+
+    `ranked_dm` must contain the standardized ranks of the distances.
+
+    """
+    return np.dot(ranked_dm, _standardize(rankdata(vars_sq_dists)))
+
+
+def _max_correlation(ranked_dm, sq_dists, subset_size, start, stop):
+    """Find the best of the `start`-th to `stop`-th subsets of a given size.
+
+    Subsets are visited in the order of ``itertools.combinations``. The sum of
+    the squared distances of the previous subset's variables is reused up to
+    the first variable that differs.
+
+    Returns the maximum correlation and the first subset that has it.
+
+    """
+    max_rho = None
+    partial_sums = np.zeros((subset_size + 1, sq_dists.shape[1]))
+    previous = ()
+    for subset_idxs in islice(combinations(range(len(sq_dists)),
+                                           subset_size), start, stop):
+        first_change = 0
+        while (first_change < len(previous) and
+               previous[first_change] == subset_idxs[first_change]):
+            first_change += 1
+        for i in range(first_change, subset_size):
+            np.add(partial_sums[i], sq_dists[subset_idxs[i]],
+                   out=partial_sums[i + 1])
+        previous = subset_idxs
+
+        rho = _correlation(ranked_dm, partial_sums[subset_size])
+
+        # If there are ties for the best rho at a given subset size, choose
+        # the first one in order to match vegan::bioenv's behavior.
+        if max_rho is None or rho > max_rho[0]:
+            max_rho = (rho, subset_idxs)
+    return max_rho
+
+
+def _exhaustive_search(ranked_dm, sq_dists, n_jobs):
+    """Return the best (rho, subset) of each size among all subsets."""
+    num_vars = len(sq_dists)
+    tasks = []
+    for subset_size in range(1, num_vars + 1):
+        num_subsets = _num_combinations(num_vars, subset_size)
+        tasks.extend((subset_size, start, start + _SUBSETS_PER_TASK)
+                     for start in range(0, num_subsets, _SUBSETS_PER_TASK))
+
+    results = _parallel_map(
+        lambda task: _max_correlation(ranked_dm, sq_dists, *task), tasks,
+        n_jobs)
+
+    # tasks are in subset size and then combination order, so keeping the
+    # first maximum keeps the first subset with the maximum rho
+    best = [None] * num_vars
+    for (subset_size, _, _), max_rho in zip(tasks, results):
+        current = best[subset_size - 1]
+        if current is None or max_rho[0] > current[0]:
+            best[subset_size - 1] = max_rho
+    return best
+
+
+def _stepwise_search(ranked_dm, sq_dists, n_jobs):
+    """Return the best (rho, subset) of each size by forward selection."""
+    num_vars = len(sq_dists)
+    selected = []
+    vars_sq_dists = np.zeros(sq_dists.shape[1])
+    best = []
+    for _ in range(num_vars):
+        candidates = [i for i in range(num_vars) if i not in selected]
+        rhos = _parallel_map(
+            lambda i: _correlation(ranked_dm, vars_sq_dists + sq_dists[i]),
+            candidates, n_jobs)
+        best_idx = int(np.argmax(rhos))
+
+        selected.append(candidates[best_idx])
+        vars_sq_dists = vars_sq_dists + sq_dists[candidates[best_idx]]
+        best.append((rhos[best_idx], tuple(sorted(selected))))
+    return best
+
+
+def _num_combinations(n, k):
+    """Return the number of combinations of `k` items out of `n`."""
+    num = 1
+    for i in range(k):
+        num = num * (n - i) // (i + 1)
+    return num
+
+
 def _scale(df):
     """Center and scale each column in a data frame.
 
@@ -7,23 +7,31 @@
 # ----------------------------------------------------------------------------
 
 from __future__ import absolute_import, division, print_function
-from future.builtins import zip
+from future.builtins import range, zip
 
+from functools import partial
 from itertools import combinations
 
 import six
 import numpy as np
 import pandas as pd
-import scipy.misc
-from scipy.stats import pearsonr, spearmanr
+from scipy.spatial.distance import squareform
+from scipy.stats import pearsonr, rankdata, spearmanr
 
 from skbio.stats.distance import DistanceMatrix
+from skbio.stats._monte_carlo import _run_monte_carlo, _check_random_state
+from skbio.util import cardinal_to_ordinal
+from skbio.util._misc import _parallel_map, _resolve_n_jobs
 from skbio.util._decorator import experimental
 
+# Number of permuted distances gathered at a time by
+# ``_permuted_correlations``.
+_BLOCK_CELLS = 2 ** 20
+
 
 @experimental(as_of="0.4.0")
 def mantel(x, y, method='pearson', permutations=999, alternative='two-sided',
-           strict=True, lookup=None):
+           strict=True, lookup=None, seed=None, n_jobs=1, precision=None):
     """Compute correlation between distance matrices using the Mantel test.
 
     The Mantel test compares two distance matrices by computing the correlation
@@ -106,6 +114,19 @@ def mantel(x, y, method='pearson', permutations=999, alternative='two-sided',
         already match between the distance matrices, this parameter is not
         necessary. This parameter is disallowed if `x` and `y` are
         ``array_like``.
+    seed : int or np.random.RandomState, optional
+        Seed or random state used to permute `x`. If ``None`` (the default),
+        NumPy's global random state is used.
+    n_jobs : int, optional
+        Number of threads used to evaluate permutations. If -1, all CPUs are
+        used. For a given `seed`, results do not depend on `n_jobs`.
+        Threads only speed up the parts of each batch of permutations that
+        release the GIL; drawing the permutations is a Python loop that holds
+        the GIL and gains nothing from more threads.
+    precision : float, optional
+        If provided, stop permuting `x` once the standard error of the p-value
+        is less than `precision`, even if fewer than `permutations`
+        permutations have been evaluated.
 
     Returns
     -------
@@ -254,54 +275,23 @@ def mantel(x, y, method='pearson', permutations=999, alternative='two-sided',
     ``array_like`` because there is no notion of IDs.
 
     """
-    if method == 'pearson':
-        corr_func = pearsonr
-    elif method == 'spearman':
-        corr_func = spearmanr
-    else:
-        raise ValueError("Invalid correlation method '%s'." % method)
-
-    if permutations < 0:
-        raise ValueError("Number of permutations must be greater than or "
-                         "equal to zero.")
-    if alternative not in ('two-sided', 'greater', 'less'):
-        raise ValueError("Invalid alternative hypothesis '%s'." % alternative)
+    _validate_mantel_params(method, permutations, alternative)
 
     x, y = _order_dms(x, y, strict=strict, lookup=lookup)
 
     n = x.shape[0]
-    if n < 3:
-        raise ValueError("Distance matrices must have at least 3 matching IDs "
-                         "between them (i.e., minimum 3x3 in size).")
-
-    x_flat = x.condensed_form()
-    y_flat = y.condensed_form()
-
-    orig_stat = corr_func(x_flat, y_flat)[0]
-
-    if permutations == 0 or np.isnan(orig_stat):
-        p_value = np.nan
-    else:
-        perm_gen = (corr_func(x.permute(condensed=True), y_flat)[0]
-                    for _ in range(permutations))
-        permuted_stats = np.fromiter(perm_gen, np.float, count=permutations)
-
-        if alternative == 'two-sided':
-            count_better = (np.absolute(permuted_stats) >=
-                            np.absolute(orig_stat)).sum()
-        elif alternative == 'greater':
-            count_better = (permuted_stats >= orig_stat).sum()
-        else:
-            count_better = (permuted_stats <= orig_stat).sum()
-
-        p_value = (count_better + 1) / (permutations + 1)
+    _check_min_size(n)
 
+    orig_stat, p_value, _ = _mantel(
+        _prepare_dm(x, method), _prepare_dm(y, method), method, permutations,
+        alternative, seed, n_jobs, precision)
     return orig_stat, p_value, n
 
 
 @experimental(as_of="0.4.0")
 def pwmantel(dms, labels=None, method='pearson', permutations=999,
-             alternative='two-sided', strict=True, lookup=None):
+             alternative='two-sided', strict=True, lookup=None, seed=None,
+             n_jobs=1, precision=None):
     """Run Mantel tests for every pair of given distance matrices.
 
     Runs a Mantel test for each pair of distance matrices and collates the
@@ -332,6 +322,18 @@ def pwmantel(dms, labels=None, method='pearson', permutations=999,
         Handling of nonmatching IDs. See ``mantel`` function for more details.
     lookup : dict, optional
         Map existing IDs to new IDs. See ``mantel`` function for more details.
+    seed : int or np.random.RandomState, optional
+        Seed or random state used to draw permutations. If provided, each
+        pairwise test draws from its own random state seeded from `seed`, so
+        results do not depend on `n_jobs`. If ``None`` (the default), NumPy's
+        global random state is used.
+    n_jobs : int, optional
+        Number of threads used to run pairwise tests. If -1, all CPUs are
+        used.
+    precision : float, optional
+        Early stopping of each pairwise test. See ``mantel`` function for more
+        details. The ``permutations`` column of the results then contains the
+        number of permutations that were actually used.
 
     Returns
     -------
@@ -354,6 +356,11 @@ def pwmantel(dms, labels=None, method='pearson', permutations=999,
     of memory consumption as it only loads two matrices at a time as opposed to
     loading all distance matrices into memory.
 
+    When `dms` are ``DistanceMatrix`` instances (or ``array_like``) whose IDs
+    (or shapes) are the same, each distance matrix is put in a common ID
+    order, flattened and (if ``method='spearman'``) ranked a single time
+    instead of once for every pair it is part of.
+
     Examples
     --------
     Import the functionality we'll use in the following examples:
@@ -402,27 +409,217 @@ def pwmantel(dms, labels=None, method='pearson', permutations=999,
         if len(set(labels)) != len(labels):
             raise ValueError("Labels must be unique.")
 
-    num_combs = scipy.misc.comb(num_dms, 2, exact=True)
+    _validate_mantel_params(method, permutations, alternative)
+    # a shared preprocessed version of each distance matrix, if possible
+    prepared = _prepare_dms(dms, labels, method, lookup)
+
+    pairs = list(combinations(range(num_dms), 2))
+    n_jobs = _resolve_n_jobs(n_jobs)
+    if seed is None and n_jobs == 1:
+        pair_seeds = [None] * len(pairs)
+    else:
+        pair_seeds = _check_random_state(seed).randint(2 ** 31 - 1,
+                                                       size=len(pairs))
+
+    def run_pair(pair_idx):
+        i, j = pairs[pair_idx]
+        if prepared is None:
+            x, y = dms[i], dms[j]
+            if isinstance(x, six.string_types):
+                x = DistanceMatrix.read(x)
+            if isinstance(y, six.string_types):
+                y = DistanceMatrix.read(y)
+            x, y = _order_dms(x, y, strict=strict, lookup=lookup)
+            n = x.shape[0]
+            _check_min_size(n)
+            x, y = _prepare_dm(x, method), _prepare_dm(y, method)
+        else:
+            x, y = prepared[i], prepared[j]
+            n = len(x[0].ids)
+        return _mantel(x, y, method, permutations, alternative,
+                       pair_seeds[pair_idx], 1, precision) + (n,)
+
     results_dtype = [('dm1', object), ('dm2', object), ('statistic', float),
                      ('p-value', float), ('n', int), ('method', object),
                      ('permutations', int), ('alternative', object)]
-    results = np.empty(num_combs, dtype=results_dtype)
+    results = np.empty(len(pairs), dtype=results_dtype)
 
-    for i, pair in enumerate(combinations(zip(labels, dms), 2)):
-        (xlabel, x), (ylabel, y) = pair
-        if isinstance(x, six.string_types):
-            x = DistanceMatrix.read(x)
-        if isinstance(y, six.string_types):
-            y = DistanceMatrix.read(y)
+    pair_results = _parallel_map(run_pair, range(len(pairs)), n_jobs)
+    for pair_idx, (stat, p_val, num_perms, n) in enumerate(pair_results):
+        i, j = pairs[pair_idx]
+        results[pair_idx] = (labels[i], labels[j], stat, p_val, n, method,
+                             num_perms, alternative)
 
-        stat, p_val, n = mantel(x, y, method=method, permutations=permutations,
-                                alternative=alternative, strict=strict,
-                                lookup=lookup)
+    return pd.DataFrame.from_records(results, index=('dm1', 'dm2'))
 
-        results[i] = (xlabel, ylabel, stat, p_val, n, method, permutations,
-                      alternative)
 
-    return pd.DataFrame.from_records(results, index=('dm1', 'dm2'))
+def _validate_mantel_params(method, permutations, alternative):
+    if method not in ('pearson', 'spearman'):
+        raise ValueError("Invalid correlation method '%s'." % method)
+    if permutations < 0:
+        raise ValueError("Number of permutations must be greater than or "
+                         "equal to zero.")
+    if alternative not in ('two-sided', 'greater', 'less'):
+        raise ValueError("Invalid alternative hypothesis '%s'." % alternative)
+
+
+def _check_min_size(n):
+    if n < 3:
+        raise ValueError("Distance matrices must have at least 3 matching IDs "
+                         "between them (i.e., minimum 3x3 in size).")
+
+
+def _standardize(a):
+    """Center `a` and scale it to unit norm (if it isn't all zeros)."""
+    a = a - a.mean()
+    norm = np.sqrt((a ** 2).sum())
+    return a / norm if norm > 0 else a
+
+
+def _prepare_dm(dm, method, own_order=None):
+    """Compute the values of a distance matrix used by the Mantel test.
+
+    Returns `dm`, its condensed distances, the standardized distances (or
+    standardized ranks if ``method='spearman'``) and `own_order`. If
+    provided, `own_order` gives the position in `dm` of each ID of the
+    distance matrix's own (original) ID order, which permutations are drawn
+    in.
+
+    """
+    values = dm.condensed_form()
+    if method == 'spearman':
+        std = _standardize(rankdata(values))
+    else:
+        std = _standardize(values)
+    return dm, values, std, own_order
+
+
+def _prepare_dms(dms, labels, method, lookup):
+    """Preprocess each distance matrix for pairwise Mantel tests.
+
+    Returns a list with the output of ``_prepare_dm`` for each distance
+    matrix in `dms`, after putting them all in the same ID order. Returns
+    ``None`` if this isn't possible (e.g., some `dms` are filepaths, or they
+    don't all have the same IDs), in which case each pair of distance matrices
+    must be prepared separately.
+
+    """
+    if any(isinstance(dm, six.string_types) for dm in dms):
+        return None
+
+    are_dms = [isinstance(dm, DistanceMatrix) for dm in dms]
+    if all(are_dms):
+        if lookup is not None:
+            dms = [_remap_ids(dm, lookup, label, cardinal_to_ordinal(i + 1))
+                   for i, (label, dm) in enumerate(zip(labels, dms))]
+        ids = dms[0].ids
+        if any(set(dm.ids) != set(ids) for dm in dms[1:]):
+            return None
+        index = {id_: i for i, id_ in enumerate(ids)}
+        own_orders = [None if dm.ids == ids else
+                      np.array([index[id_] for id_ in dm.ids]) for dm in dms]
+        dms = [dm if dm.ids == ids else dm.filter(ids) for dm in dms]
+    elif any(are_dms) or lookup is not None:
+        return None
+    else:
+        dms = [DistanceMatrix(dm) for dm in dms]
+        if any(dm.shape != dms[0].shape for dm in dms[1:]):
+            return None
+        own_orders = [None] * len(dms)
+
+    _check_min_size(dms[0].shape[0])
+    return [_prepare_dm(dm, method, own_order)
+            for dm, own_order in zip(dms, own_orders)]
+
+
+def _mantel(x, y, method, permutations, alternative, seed, n_jobs,
+            precision):
+    """Run a Mantel test on distance matrices prepared by ``_prepare_dm``.
+
+    Returns the correlation coefficient, the p-value and the number of
+    permutations that were used.
+
+    """
+    _, x_values, x_std, own_order = x
+    _, y_values, y_std, _ = y
+
+    if method == 'spearman' and (np.ptp(x_values) == 0 or
+                                 np.ptp(y_values) == 0):
+        # spearmanr is undefined if either input is constant
+        orig_stat = np.nan
+    elif method == 'spearman':
+        orig_stat = spearmanr(x_values, y_values)[0]
+    else:
+        orig_stat = pearsonr(x_values, y_values)[0]
+
+    permuted_stats = None
+    if permutations > 0 and not np.isnan(orig_stat):
+        # Permuting x doesn't change the mean or spread of its distances (or
+        # ranks), so each permuted correlation coefficient is the dot product
+        # of permuted standardized x with standardized y.
+        n = x[0].shape[0]
+        permuted_stats = partial(_permuted_correlations,
+                                 squareform(x_std, force='tomatrix',
+                                            checks=False),
+                                 y_std, np.triu_indices(n, k=1),
+                                 own_order=own_order)
+
+    p_value, perm_stats = _run_monte_carlo(
+        orig_stat, permuted_stats, permutations, alternative=alternative,
+        seed=seed, n_jobs=n_jobs, precision=precision)
+    if np.isnan(p_value):
+        return orig_stat, p_value, permutations
+    return orig_stat, p_value, len(perm_stats)
+
+
+def _permuted_correlations(x_std, y_std, tri_idxs, random_state,
+                           num_perms, own_order=None):
+    """Compute Pearson correlations between permuted `x_std` and `y_std`.
+
+    Parameters
+    ----------
+    x_std : 2-D np.ndarray
+        Redundant (square) form of standardized distances.
+    y_std : 1-D np.ndarray
+        Standardized distances in condensed form.
+    tri_idxs : tuple of 1-D np.ndarray
+        Row and column indices of the condensed distances.
+    random_state : np.random.RandomState
+        Random state used to permute the objects of `x_std`.
+    num_perms : int
+        Number of permutations.
+    own_order : 1-D np.ndarray, optional
+        Position in `x_std` of each object in the order permutations are
+        drawn in. Permutations of that order are converted to permutations of
+        `x_std`'s order, so that results don't depend on the order objects
+        were put in.
+
+    Returns
+    -------
+    1-D np.ndarray
+        Correlation coefficient for each permutation.
+
+    Notes
+    -----
+    The permuted condensed distances are gathered directly from `x_std`, a
+    block of distances at a time, so permuted matrices are never built.
+
+    """
+    rows, cols = tri_idxs
+    n = x_std.shape[0]
+    x_std = x_std.ravel()
+    orders = np.array([random_state.permutation(n) for _ in range(num_perms)])
+    if own_order is not None:
+        orders = own_order[orders][:, np.argsort(own_order)]
+
+    stats = np.zeros(num_perms)
+    step = max(1, _BLOCK_CELLS // num_perms)
+    for start in range(0, len(y_std), step):
+        stop = start + step
+        flat_idxs = (orders[:, rows[start:stop]] * n +
+                     orders[:, cols[start:stop]])
+        stats += np.dot(x_std.take(flat_idxs), y_std[start:stop])
+    return stats
 
 
 def _order_dms(x, y, strict=True, lookup=None):
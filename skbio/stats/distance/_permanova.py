@@ -16,9 +16,13 @@ import numpy as np
 from ._base import (_preprocess_input, _run_monte_carlo_stats, _build_results)
 from skbio.util._decorator import experimental
 
+# Number of squared distances computed at a time by ``_compute_f_stat``.
+_BLOCK_CELLS = 2 ** 20
+
 
 @experimental(as_of="0.4.0")
-def permanova(distance_matrix, grouping, column=None, permutations=999):
+def permanova(distance_matrix, grouping, column=None, permutations=999,
+              seed=None, n_jobs=1, precision=None):
     """Test for significant differences between groups using PERMANOVA.
 
     Permutational Multivariate Analysis of Variance (PERMANOVA) is a
@@ -61,6 +65,19 @@ def permanova(distance_matrix, grouping, column=None, permutations=999):
         significance. Must be greater than or equal to zero. If zero,
         statistical significance calculations will be skipped and the p-value
         will be ``np.nan``.
+    seed : int or np.random.RandomState, optional
+        Seed or random state used to draw the permutations. If ``None``
+        (the default), NumPy's global random state is used.
+    n_jobs : int, optional
+        Number of threads used to evaluate permutations. If -1, all CPUs are
+        used. For a given `seed`, results do not depend on `n_jobs`.
+        Threads only speed up the parts of each batch of permutations that
+        release the GIL; drawing the permutations is a Python loop that holds
+        the GIL and gains nothing from more threads.
+    precision : float, optional
+        If provided, stop drawing permutations once the standard error of the
+        p-value is less than `precision`. Results then report the number of
+        permutations that were actually used.
 
     Returns
     -------
@@ -100,39 +117,44 @@ def permanova(distance_matrix, grouping, column=None, permutations=999):
     s_T = (distances ** 2).sum() / sample_size
 
     test_stat_function = partial(_compute_f_stat, sample_size, num_groups,
-                                 tri_idxs, distances, group_sizes, s_T)
-    stat, p_value = _run_monte_carlo_stats(test_stat_function, grouping,
-                                           permutations)
+                                 distance_matrix.data, group_sizes, s_T)
+    stat, p_value, permutations = _run_monte_carlo_stats(
+        test_stat_function, grouping, permutations, vectorized=True, seed=seed,
+        n_jobs=n_jobs, precision=precision)
 
     return _build_results('PERMANOVA', 'pseudo-F', sample_size, num_groups,
                           stat, p_value, permutations)
 
 
-def _compute_f_stat(sample_size, num_groups, tri_idxs, distances, group_sizes,
-                    s_T, grouping):
-    """Compute PERMANOVA pseudo-F statistic."""
-    # Create a matrix where objects in the same group are marked with the group
-    # index (e.g. 0, 1, 2, etc.). objects that are not in the same group are
-    # marked with -1.
-    grouping_matrix = -1 * np.ones((sample_size, sample_size), dtype=int)
-    for group_idx in range(num_groups):
-        within_indices = _index_combinations(
-            np.where(grouping == group_idx)[0])
-        grouping_matrix[within_indices] = group_idx
+def _compute_f_stat(sample_size, num_groups, dm_data, group_sizes, s_T,
+                    groupings):
+    """Compute PERMANOVA pseudo-F statistic for each grouping vector.
 
-    # Extract upper triangle (in same order as distances were extracted
-    # from full distance matrix).
-    grouping_tri = grouping_matrix[tri_idxs]
+    `groupings` is a 2-D array with one grouping vector per row. The
+    within-group sums of squares of all grouping vectors are computed together
+    as a product of the squared distances with an indicator matrix that has
+    one column per (grouping vector, group) pair. Squared distances are only
+    computed for a block of rows of `dm_data` at a time.
 
-    # Calculate s_W for each group, accounting for different group sizes.
-    s_W = 0
-    for i in range(num_groups):
-        s_W += (distances[grouping_tri == i] ** 2).sum() / group_sizes[i]
+    """
+    num_groupings = groupings.shape[0]
 
-    s_A = s_T - s_W
-    return (s_A / (num_groups - 1)) / (s_W / (sample_size - num_groups))
+    indicators = np.zeros((sample_size, num_groupings * num_groups))
+    columns = groupings.T + np.arange(num_groupings) * num_groups
+    indicators[np.arange(sample_size)[:, np.newaxis], columns] = 1
 
+    within = np.zeros(num_groupings * num_groups)
+    step = max(1, _BLOCK_CELLS // sample_size)
+    for start in range(0, sample_size, step):
+        block = dm_data[start:start + step] ** 2
+        within += (np.dot(block, indicators) *
+                   indicators[start:start + step]).sum(axis=0)
 
-def _index_combinations(indices):
-    # Modified from http://stackoverflow.com/a/11144716
-    return np.tile(indices, len(indices)), np.repeat(indices, len(indices))
+    # Each within-group distance is counted twice, once for each object of
+    # the pair. Calculate s_W for each group, accounting for different group
+    # sizes.
+    s_W = (within.reshape(num_groupings, num_groups) /
+           group_sizes).sum(axis=1) / 2
+
+    s_A = s_T - s_W
+    return (s_A / (num_groups - 1)) / (s_W / (sample_size - num_groups))
@@ -13,11 +13,15 @@ from functools import partial
 from unittest import TestCase, main
 
 import numpy as np
+import numpy.testing as npt
 import pandas as pd
+from scipy.stats import rankdata
 from pandas.util.testing import assert_series_equal
 
 from skbio import DistanceMatrix
 from skbio.stats.distance import anosim
+import skbio.stats.distance._anosim as _anosim
+from skbio.stats.distance._anosim import _compute_r_stat
 
 
 class TestANOSIM(TestCase):
@@ -116,6 +120,46 @@ class TestANOSIM(TestCase):
         obs = anosim(self.dm_unequal, self.grouping_unequal_relabeled)
         self.assert_series_equal(obs, exp)
 
+    def test_multiple_blocks(self):
+        np.random.seed(0)
+        exp = anosim(self.dm_unequal, self.grouping_unequal)
+
+        block_cells = _anosim._BLOCK_CELLS
+        try:
+            # one and seven pairs of objects per block
+            for cells in 1, 7:
+                _anosim._BLOCK_CELLS = cells
+                np.random.seed(0)
+                obs = anosim(self.dm_unequal, self.grouping_unequal)
+                self.assert_series_equal(obs, exp)
+        finally:
+            _anosim._BLOCK_CELLS = block_cells
+
+    def test_compute_r_stat_batch(self):
+        # each row of a batch gives the same statistic as on its own, even
+        # if a grouping vector doesn't use every label
+        groupings = np.array([[0, 0, 1, 1],
+                              [0, 1, 0, 1],
+                              [1, 0, 0, 1],
+                              [0, 0, 0, 0],
+                              [0, 0, 1, 1]])
+        tri_idxs = np.triu_indices(4, k=1)
+        ranked_dists = rankdata(self.dm_no_ties.condensed_form())
+        obs = _compute_r_stat(tri_idxs, ranked_dists, 3, groupings)
+        exp = [_compute_r_stat(tri_idxs, ranked_dists, 3,
+                               grouping[np.newaxis])[0]
+               for grouping in groupings[[0, 1, 2, 4]]]
+        npt.assert_almost_equal(obs[[0, 1, 2, 4]], exp)
+        self.assertAlmostEqual(obs[0], 0.625)
+        self.assertTrue(np.isnan(obs[3]))
+
+    def test_seed_and_n_jobs(self):
+        exp = anosim(self.dm_unequal, self.grouping_unequal, seed=42)
+        for n_jobs in 1, 2:
+            obs = anosim(self.dm_unequal, self.grouping_unequal, seed=42,
+                         n_jobs=n_jobs)
+            self.assert_series_equal(obs, exp)
+
 
 if __name__ == '__main__':
     main()
@@ -693,11 +693,65 @@ class CategoricalStatsHelperFunctionTests(TestCase):
 
     def test_run_monte_carlo_stats_with_permutations(self):
         obs = _run_monte_carlo_stats(lambda e: 42, self.grouping, 50)
-        npt.assert_equal(obs, (42, 1.0))
+        npt.assert_equal(obs, (42, 1.0, 50))
+
+    def test_run_monte_carlo_stats_vectorized(self):
+        batches = []
+
+        def stat(groupings):
+            batches.append(groupings.shape)
+            return np.full(groupings.shape[0], 42.0)
+
+        # batches must not exceed the batch size and the last batch may be
+        # partial
+        obs = _run_monte_carlo_stats(stat, self.grouping, 250,
+                                     vectorized=True)
+        npt.assert_equal(obs, (42, 1.0, 250))
+        self.assertEqual(batches, [(1, 3), (100, 3), (100, 3), (50, 3)])
+
+    def test_run_monte_carlo_stats_vectorized_same_permutations(self):
+        # vectorized and per-permutation evaluation see the same permutations
+        grouping = np.arange(10)
+        observed = []
+
+        np.random.seed(0)
+        _run_monte_carlo_stats(lambda g: observed.append(g.copy()) or 0,
+                               grouping, 150)
+        np.random.seed(0)
+        batched = []
+        _run_monte_carlo_stats(lambda g: batched.extend(g) or np.zeros(len(g)),
+                               grouping, 150, vectorized=True)
+        npt.assert_array_equal(batched, observed)
+
+    def test_run_monte_carlo_stats_tolerance(self):
+        # statistics that differ from the original statistic by floating
+        # point error count as equal
+        stats = iter([0.3, 0.1 + 0.2, 0.29])
+        obs = _run_monte_carlo_stats(lambda g: next(stats), self.grouping, 2)
+        npt.assert_equal(obs, (0.3, 2 / 3, 2))
 
     def test_run_monte_carlo_stats_no_permutations(self):
         obs = _run_monte_carlo_stats(lambda e: 42, self.grouping, 0)
-        npt.assert_equal(obs, (42, np.nan))
+        npt.assert_equal(obs, (42, np.nan, 0))
+
+    def test_run_monte_carlo_stats_seed(self):
+        grouping = np.arange(10)
+
+        def stat(g):
+            return g[:5].sum()
+
+        exp = _run_monte_carlo_stats(stat, grouping, 250, seed=42)
+        for n_jobs in 1, 2:
+            obs = _run_monte_carlo_stats(stat, grouping, 250, seed=42,
+                                         n_jobs=n_jobs)
+            self.assertEqual(obs, exp)
+
+    def test_run_monte_carlo_stats_precision(self):
+        # no permuted statistic is as large, so the p-value is resolved after
+        # the first batch
+        obs = _run_monte_carlo_stats(lambda g: g[0], np.arange(1000, 0, -1),
+                                     999, seed=0, precision=0.01)
+        self.assertEqual(obs, (1000, 1 / 101, 100))
 
     def test_run_monte_carlo_stats_invalid_permutations(self):
         with self.assertRaises(ValueError):
@@ -9,12 +9,17 @@
 from __future__ import absolute_import, division, print_function
 from unittest import TestCase, main
 
+from itertools import combinations
+
 import numpy as np
 import pandas as pd
+from scipy.spatial.distance import pdist
+from scipy.stats import spearmanr
 
 from skbio import DistanceMatrix
 from skbio.stats.distance import bioenv
-from skbio.stats.distance._bioenv import _scale
+import skbio.stats.distance._bioenv as _bioenv
+from skbio.stats.distance._bioenv import _scale, _num_combinations
 from skbio.util import get_data_path, assert_data_frame_almost_equal
 
 
@@ -149,6 +154,64 @@ class BIOENVTests(TestCase):
         obs = bioenv(self.dm_vegan, self.df_vegan)
         assert_data_frame_almost_equal(obs, self.exp_results_vegan)
 
+    def test_bioenv_exhaustive_matches_direct_computation(self):
+        vars_df = self.df.loc[list(self.dm.ids), self.cols].astype(float)
+        vars_array = _scale(vars_df).values
+        dm_flat = self.dm.condensed_form()
+        exp = []
+        for subset_size in range(1, len(self.cols) + 1):
+            exp.append(max(
+                spearmanr(dm_flat, pdist(vars_array[:, list(subset_idxs)],
+                                         metric='euclidean'))[0]
+                for subset_idxs in combinations(range(len(self.cols)),
+                                                subset_size)))
+
+        obs = bioenv(self.dm, self.df)
+        np.testing.assert_almost_equal(obs['correlation'].values, exp)
+
+    def test_bioenv_multiple_tasks(self):
+        subsets_per_task = _bioenv._SUBSETS_PER_TASK
+        try:
+            _bioenv._SUBSETS_PER_TASK = 7
+            for n_jobs in 1, 3:
+                obs = bioenv(self.dm, self.df, n_jobs=n_jobs)
+                assert_data_frame_almost_equal(obs, self.exp_results)
+
+                obs = bioenv(self.dm_vegan, self.df_vegan, n_jobs=n_jobs)
+                assert_data_frame_almost_equal(obs, self.exp_results_vegan)
+        finally:
+            _bioenv._SUBSETS_PER_TASK = subsets_per_task
+
+    def test_bioenv_stepwise(self):
+        for n_jobs in 1, 2:
+            obs = bioenv(self.dm, self.df, search='stepwise', n_jobs=n_jobs)
+            self.assertEqual(obs['size'].tolist(),
+                             list(range(1, len(self.cols) + 1)))
+
+            # the best single variable and all variables are always found
+            assert_data_frame_almost_equal(obs.iloc[[0, -1]],
+                                           self.exp_results.iloc[[0, -1]])
+
+            # each subset extends the previous one
+            subsets = [set(label.split(', ')) for label in obs.index]
+            for previous, subset in zip(subsets[:-1], subsets[1:]):
+                self.assertTrue(previous < subset)
+
+            # stepwise subsets can't be better than the exhaustive search's
+            self.assertTrue(
+                (obs['correlation'].values <=
+                 self.exp_results['correlation'].values + 1e-10).all())
+
+    def test_bioenv_invalid_search(self):
+        with self.assertRaises(ValueError):
+            bioenv(self.dm, self.df, search='backward')
+
+    def test_num_combinations(self):
+        self.assertEqual(_num_combinations(11, 0), 1)
+        self.assertEqual(_num_combinations(11, 1), 11)
+        self.assertEqual(_num_combinations(11, 5), 462)
+        self.assertEqual(_num_combinations(11, 11), 1)
+
     def test_bioenv_no_distance_matrix(self):
         with self.assertRaises(TypeError):
             bioenv('breh', self.df)
@@ -14,11 +14,15 @@ from unittest import TestCase, main
 import numpy as np
 import numpy.testing as npt
 import pandas as pd
+from scipy.spatial.distance import squareform
+from scipy.stats import pearsonr, spearmanr, rankdata
 
 from skbio import DistanceMatrix
 from skbio.stats.distance import (DissimilarityMatrixError,
                                   DistanceMatrixError, mantel, pwmantel)
-from skbio.stats.distance._mantel import _order_dms
+import skbio.stats.distance._mantel as _mantel
+from skbio.stats.distance._mantel import (_order_dms, _standardize,
+                                          _permuted_correlations)
 from skbio.util import get_data_path, assert_data_frame_almost_equal
 
 
@@ -241,6 +245,21 @@ class MantelTests(MantelTestData):
         self.assertAlmostEqual(obs[1], 0.003)
         self.assertEqual(obs[2], 24)
 
+    def test_seed_and_n_jobs(self):
+        exp = mantel(self.veg_dm_vegan, self.env_dm_vegan, seed=42)
+        for n_jobs in 1, 2:
+            obs = mantel(self.veg_dm_vegan, self.env_dm_vegan, seed=42,
+                         n_jobs=n_jobs)
+            self.assertEqual(obs, exp)
+
+    def test_precision(self):
+        # a very strong correlation is resolved by the first batch
+        np.random.seed(0)
+        obs = mantel(self.veg_dm_vegan, self.veg_dm_vegan,
+                     alternative='greater', precision=0.01)
+        self.assertAlmostEqual(obs[0], 1.0)
+        self.assertAlmostEqual(obs[1], 1 / 101)
+
     def test_no_variation_pearson(self):
         # Output doesn't match vegan::mantel with method='pearson'. Consider
         # revising output and this test depending on outcome of
@@ -480,6 +499,81 @@ class PairwiseMantelTests(MantelTestData):
         obs = pwmantel(dms)
         assert_data_frame_almost_equal(obs, self.exp_results_all_dms)
 
+    def test_in_memory_matches_filepaths(self):
+        # the shared preprocessing of in-memory distance matrices gives the
+        # same results as preparing each pair of matrices from filepaths
+        filepaths = [get_data_path(fp)
+                     for fp in ('dm2.txt', 'dm.txt', 'dm4.txt', 'dm3.txt')]
+        dms = [DistanceMatrix.read(fp) for fp in filepaths]
+        for method in 'pearson', 'spearman':
+            np.random.seed(0)
+            exp = pwmantel(filepaths, method=method)
+            np.random.seed(0)
+            obs = pwmantel(dms, method=method)
+            assert_data_frame_almost_equal(obs, exp)
+
+    def test_seed_and_n_jobs(self):
+        exp = pwmantel(self.min_dms, seed=42)
+        for n_jobs in 1, 2:
+            obs = pwmantel(self.min_dms, seed=42, n_jobs=n_jobs)
+            assert_data_frame_almost_equal(obs, exp)
+
+    def test_precision(self):
+        obs = pwmantel(self.min_dms, alternative='greater', seed=42,
+                       precision=0.1)
+        npt.assert_array_equal(obs['permutations'], [100, 100, 100])
+
+    def test_missing_ids_in_lookup(self):
+        lookup = {'0': 'a', '1': 'b', '2': 'c'}
+        self.minz_dm.ids = ('0', '1', 'foo')
+        with six.assertRaisesRegex(self, KeyError, "3rd.*(z).*'foo'\"$"):
+            pwmantel(self.min_dms, labels=('x', 'y', 'z'), lookup=lookup)
+
+
+class PermutedCorrelationsTests(MantelTestData):
+    def setUp(self):
+        super(PermutedCorrelationsTests, self).setUp()
+        self.x = np.loadtxt(get_data_path('mantel_veg_dm_vegan.txt'))
+        self.y = np.loadtxt(get_data_path('mantel_env_dm_vegan.txt'))
+        self.n = self.x.shape[0]
+        self.x_flat = squareform(self.x, checks=False)
+        self.y_flat = squareform(self.y, checks=False)
+
+    def permuted_correlations(self, x_flat, y_flat, seed):
+        return _permuted_correlations(
+            squareform(_standardize(x_flat)), _standardize(y_flat),
+            np.triu_indices(self.n, k=1), np.random.RandomState(seed), 10)
+
+    def test_matches_pearsonr_of_permuted_matrix(self):
+        obs = self.permuted_correlations(self.x_flat, self.y_flat, 0)
+
+        random_state = np.random.RandomState(0)
+        for stat in obs:
+            order = random_state.permutation(self.n)
+            x_perm = squareform(self.x[order][:, order], checks=False)
+            self.assertAlmostEqual(stat, pearsonr(x_perm, self.y_flat)[0])
+
+    def test_ranks_match_spearmanr(self):
+        obs = self.permuted_correlations(rankdata(self.x_flat),
+                                         rankdata(self.y_flat), 1)
+
+        random_state = np.random.RandomState(1)
+        for stat in obs:
+            order = random_state.permutation(self.n)
+            x_perm = squareform(self.x[order][:, order], checks=False)
+            self.assertAlmostEqual(stat, spearmanr(x_perm, self.y_flat)[0])
+
+    def test_multiple_blocks(self):
+        exp = self.permuted_correlations(self.x_flat, self.y_flat, 0)
+        block_cells = _mantel._BLOCK_CELLS
+        try:
+            for cells in 1, 150:
+                _mantel._BLOCK_CELLS = cells
+                obs = self.permuted_correlations(self.x_flat, self.y_flat, 0)
+                npt.assert_almost_equal(obs, exp)
+        finally:
+            _mantel._BLOCK_CELLS = block_cells
+
 
 class OrderDistanceMatricesTests(MantelTestData):
     def setUp(self):
@@ -18,6 +18,8 @@ from pandas.util.testing import assert_series_equal
 
 from skbio import DistanceMatrix
 from skbio.stats.distance import permanova
+import skbio.stats.distance._permanova as _permanova
+from skbio.stats.distance._permanova import _compute_f_stat
 
 
 class TestPERMANOVA(TestCase):
@@ -116,6 +118,47 @@ class TestPERMANOVA(TestCase):
         obs = permanova(self.dm_unequal, self.grouping_unequal_relabeled)
         self.assert_series_equal(obs, exp)
 
+    def test_call_seed_and_n_jobs(self):
+        exp = permanova(self.dm_unequal, self.grouping_unequal, seed=42)
+        for n_jobs in 1, 2:
+            obs = permanova(self.dm_unequal, self.grouping_unequal, seed=42,
+                            n_jobs=n_jobs)
+            self.assert_series_equal(obs, exp)
+
+    def test_call_precision(self):
+        obs = permanova(self.dm_unequal, self.grouping_unequal, seed=42,
+                        precision=0.05)
+        self.assertEqual(obs['number of permutations'], 100)
+
+    def test_call_multiple_blocks(self):
+        block_cells = _permanova._BLOCK_CELLS
+        try:
+            # one and four rows of squared distances per block
+            for cells in 1, 24:
+                _permanova._BLOCK_CELLS = cells
+                np.random.seed(0)
+                obs = permanova(self.dm_unequal, self.grouping_unequal)
+                self.assertAlmostEqual(obs['test statistic'], 0.578848, 6)
+                self.assertEqual(obs['p-value'], 0.645)
+        finally:
+            _permanova._BLOCK_CELLS = block_cells
+
+    def test_compute_f_stat_batch(self):
+        # each row of a batch gives the same statistic as on its own
+        groupings = np.array([[0, 0, 1, 1],
+                              [0, 1, 0, 1],
+                              [1, 0, 0, 1],
+                              [0, 0, 1, 1]])
+        data = self.dm_no_ties.data
+        s_T = (self.dm_no_ties.condensed_form() ** 2).sum() / 4
+        obs = _compute_f_stat(4, 2, data, np.array([2, 2]), s_T, groupings)
+        exp = [_compute_f_stat(4, 2, data, np.array([2, 2]), s_T,
+                               grouping[np.newaxis])[0]
+               for grouping in groupings]
+        np.testing.assert_almost_equal(obs, exp)
+        self.assertAlmostEqual(obs[0], 4.4)
+        self.assertAlmostEqual(obs[3], 4.4)
+
 
 if __name__ == '__main__':
     main()
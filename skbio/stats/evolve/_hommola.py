@@ -10,14 +10,16 @@ from __future__ import absolute_import, division, print_function
 from future.builtins import range
 
 import numpy as np
-from scipy.stats import pearsonr
+from scipy.sparse import csr_matrix
 
 from skbio import DistanceMatrix
+from skbio.stats._monte_carlo import _run_monte_carlo
 from skbio.util._decorator import experimental
 
 
 @experimental(as_of="0.4.0")
-def hommola_cospeciation(host_dist, par_dist, interaction, permutations=999):
+def hommola_cospeciation(host_dist, par_dist, interaction, permutations=999,
+                         seed=None, n_jobs=1, precision=None):
     """Perform Hommola et al (2009) host/parasite cospeciation test.
 
     This test for host/parasite cospeciation is as described in [1]_. This test
@@ -77,6 +79,19 @@ def hommola_cospeciation(host_dist, par_dist, interaction, permutations=999):
         Number of permutations used to compute p-value. Must be greater than or
         equal to zero. If zero, statistical significance calculations will be
         skipped and the p-value will be ``np.nan``.
+    seed : int or np.random.RandomState, optional
+        Seed or random state used to shuffle hosts and parasites. If ``None``
+        (the default), NumPy's global random state is used.
+    n_jobs : int, optional
+        Number of threads used to evaluate permutations. If -1, all CPUs are
+        used. For a given `seed`, results do not depend on `n_jobs`.
+        Threads only speed up the parts of each batch of permutations that
+        release the GIL; drawing the permutations is a Python loop that holds
+        the GIL and gains nothing from more threads.
+    precision : float, optional
+        If provided, stop permuting once the standard error of the p-value is
+        less than `precision`, even if fewer than `permutations` permutations
+        have been evaluated.
 
     Returns
     -------
@@ -88,7 +103,8 @@ def hommola_cospeciation(host_dist, par_dist, interaction, permutations=999):
     perm_stats : 1-D numpy.ndarray, float
         Correlation coefficients observed using permuted host : parasite
         interactions. Length will be equal to the number of permutations used
-        to compute p-value (see `permutations` parameter above).
+        to compute p-value (see `permutations` and `precision` parameters
+        above).
 
     See Also
     --------
@@ -129,8 +145,8 @@ def hommola_cospeciation(host_dist, par_dist, interaction, permutations=999):
 
     >>> corr_coeff, p_value, perm_stats = hommola_cospeciation(
     ...     hdist, pdist, interaction, permutations=99)
-    >>> corr_coeff
-    0.83170965463247903
+    >>> print(round(corr_coeff, 4))
+    0.8317
 
     In this case, the host distances have a fairly strong positive correlation
     with the symbiont distances. However, this may also reflect structure
@@ -165,104 +181,140 @@ def hommola_cospeciation(host_dist, par_dist, interaction, permutations=999):
         raise ValueError("Must have at least 3 host-parasite interactions in "
                          "`interaction`.")
 
-    # shortcut to eliminate nested for-loops specifying pairwise interaction
-    # partners as randomizeable indices
+    # each interaction edge is a (parasite, host) pair of indices. the
+    # correlation is computed between the host distances and the parasite
+    # distances of all pairs of edges
     pars, hosts = np.nonzero(interaction)
-    pars_k_labels, pars_t_labels = _gen_lists(pars)
-    hosts_k_labels, hosts_t_labels = _gen_lists(hosts)
-
-    # get a vector of pairwise distances for each interaction edge
-    x = _get_dist(hosts_k_labels, hosts_t_labels, host_dist.data,
-                  np.arange(num_hosts))
-    y = _get_dist(pars_k_labels, pars_t_labels, par_dist.data,
-                  np.arange(num_pars))
-
-    # calculate the observed correlation coefficient for these hosts/symbionts
-    corr_coeff = pearsonr(x, y)[0]
-
-    # now do permutatitons. initialize index lists of the appropriate size
-    mp = np.arange(num_pars)
-    mh = np.arange(num_hosts)
-
-    # initialize list of shuffled correlation vals
-    perm_stats = np.empty(permutations)
-
-    if permutations == 0 or np.isnan(corr_coeff):
-        p_value = np.nan
-        perm_stats.fill(np.nan)
-    else:
-        for i in range(permutations):
+    corr_coeff = _edge_correlations(host_dist.data, par_dist.data,
+                                    hosts[np.newaxis], pars[np.newaxis])[0]
+
+    # now do permutatitons. each random state shuffles its own index lists,
+    # which are kept across the batches that draw from it (all batches draw
+    # from NumPy's global random state if no seed is given), so shuffles
+    # build on each other as in a single loop over all permutations
+    index_lists = {}
+
+    def permuted_stats(random_state, num_perms):
+        mp, mh = index_lists.setdefault(
+            id(random_state), (np.arange(num_pars), np.arange(num_hosts)))
+
+        perm_pars = np.empty((num_perms, len(pars)), dtype=int)
+        perm_hosts = np.empty((num_perms, len(hosts)), dtype=int)
+        for i in range(num_perms):
             # generate a shuffled list of indexes for each permutation. this
             # effectively randomizes which host is associated with which
             # symbiont, but maintains the distribution of genetic distances
-            np.random.shuffle(mp)
-            np.random.shuffle(mh)
+            random_state.shuffle(mp)
+            random_state.shuffle(mh)
+            perm_pars[i] = mp[pars]
+            perm_hosts[i] = mh[hosts]
 
-            # get pairwise distances in shuffled order
-            y_p = _get_dist(pars_k_labels, pars_t_labels, par_dist.data, mp)
-            x_p = _get_dist(hosts_k_labels, hosts_t_labels, host_dist.data, mh)
+        return _edge_correlations(host_dist.data, par_dist.data,
+                                  perm_hosts, perm_pars)
 
-            # calculate shuffled correlation coefficient
-            perm_stats[i] = pearsonr(x_p, y_p)[0]
-
-        p_value = ((perm_stats >= corr_coeff).sum() + 1) / (permutations + 1)
+    p_value, perm_stats = _run_monte_carlo(
+        corr_coeff, permuted_stats, permutations, seed=seed, n_jobs=n_jobs,
+        precision=precision)
+    if np.isnan(corr_coeff):
+        perm_stats = np.full(permutations, np.nan)
 
     return corr_coeff, p_value, perm_stats
 
 
-def _get_dist(k_labels, t_labels, dists, index):
-    """Subset a distance matrix using a set of (randomizable) index labels.
-
-    Parameters
-    ----------
-    k_labels : numpy.array
-        index labels specifying row-wise member of pairwise interaction
-    t_labels : numpy.array
-        index labels specifying column-wise member of pairwise interaction
-    dists : numpy.array
-        pairwise distance matrix
-    index : numpy.array of int
-        permutable indices for changing order in pairwise distance matrix
-
-    Returns
-    -------
-    vec : list of float
-        List of distances associated with host:parasite edges.
-
-    """
-    return dists[index[k_labels], index[t_labels]]
-
+def _edge_correlations(host_dists, par_dists, hosts, pars):
+    """Correlate host and parasite distances between interaction edges.
 
-def _gen_lists(labels):
-    """Generate matched lists of row and column index labels.
-
-    Shortcut function for generating matched lists of row and col index
-    labels for the set of pairwise comparisons specified by the list of those
-    indices recovered using ``np.nonzero(interaction)``.
-
-    Reproduces values of iterated indices from the nested for-loops contained
-    in ``get_dist`` function in original code from [1]_.
+    Computes, for each row of `hosts` and `pars`, the Pearson correlation
+    coefficient between host and parasite distances of every pair of edges
+    without building the vectors of these distances, whose length is
+    quadratic in the number of edges.
 
     Parameters
     ----------
-    labels : numpy.array
-        array containing the indices of nonzero elements in one dimension of an
-        interaction matrix
+    host_dists : 2-D numpy.array
+        m x m pairwise distance matrix of hosts.
+    par_dists : 2-D numpy.array
+        n x n pairwise distance matrix of parasites.
+    hosts : 2-D numpy.array of int
+        Permutations (rows) by edges (columns) matrix of the host of each
+        interaction edge.
+    pars : 2-D numpy.array of int
+        Permutations (rows) by edges (columns) matrix of the parasite of each
+        interaction edge.
 
     Returns
     -------
-    k_labels : numpy.array
-        index labels specifying row-wise member of pairwise interaction
-    t_labels : numpy.array
-        index labels specifying column-wise member of pairwise interaction
+    1-D numpy.array of float
+        Correlation coefficient of each permutation.
 
-    References
-    ----------
-    .. [1] Hommola K, Smith JE, Qiu Y, Gilks WR (2009) A Permutation Test of
-       Host-Parasite Cospeciation. Molecular Biology and Evolution, 26,
-       1457-1468.
+    Notes
+    -----
+    The sums over pairs of edges that the correlation coefficients are
+    computed from are sums over pairs of hosts and parasites. For instance,
+    the sum of host distances is ``c.dot(host_dists).dot(c) / 2``, where
+    ``c`` is the number of edges of each host (distances between edges of the
+    same host are zero), and the sum of products of host and parasite
+    distances is ``(E.T.dot(par_dists).dot(E) * host_dists).sum() / 2``, where
+    ``E`` is the permuted interaction matrix.
+
+    Sums of squares and products are computed in a second pass on distances
+    centered on their mean (computed in the first pass), which avoids the
+    cancellation of ``n * sum(x ** 2) - sum(x) ** 2`` when the variance is
+    small relative to the mean. The centered distance between two edges of
+    the same host (parasite) is ``-mean``, so these pairs of edges are
+    counted separately rather than through the diagonal of the distance
+    matrix.
 
     """
-    i_array, j_array = np.transpose(np.tri(len(labels)-1)).nonzero()
-    j_array = j_array + 1
-    return labels[i_array], labels[j_array]
+    num_perms, num_edges = hosts.shape
+    num_pairs = num_edges * (num_edges - 1) / 2
+
+    host_counts = _count_rows(hosts, len(host_dists))
+    par_counts = _count_rows(pars, len(par_dists))
+    mean_x = _half_quadratic_forms(host_counts, host_dists) / num_pairs
+    mean_y = _half_quadratic_forms(par_counts, par_dists) / num_pairs
+
+    # sums over pairs of distinct edges, with each pair counted twice
+    ss_x = np.empty(num_perms)
+    ss_y = np.empty(num_perms)
+    sum_xy = np.empty(num_perms)
+    for i in range(num_perms):
+        x = host_dists - mean_x[i]
+        y = par_dists - mean_y[i]
+        np.fill_diagonal(x, 0)
+        np.fill_diagonal(y, 0)
+
+        # transposed (hosts x parasites) interaction matrix
+        edges_t = csr_matrix((np.ones(num_edges), (hosts[i], pars[i])),
+                             shape=(len(host_dists), len(par_dists)))
+        par_by_edge = edges_t.dot(y)
+        host_by_edge = edges_t.T.dot(x).T
+        par_by_host = edges_t.dot(par_by_edge.T)
+
+        same_host_pairs = (host_counts[i] ** 2).sum() - num_edges
+        same_par_pairs = (par_counts[i] ** 2).sum() - num_edges
+        ss_x[i] = (host_counts[i].dot(x ** 2).dot(host_counts[i]) +
+                   same_host_pairs * mean_x[i] ** 2)
+        ss_y[i] = (par_counts[i].dot(y ** 2).dot(par_counts[i]) +
+                   same_par_pairs * mean_y[i] ** 2)
+        # pairs of edges of the same host (parasite) have a centered host
+        # (parasite) distance of -mean_x[i] (-mean_y[i])
+        sum_xy[i] = ((par_by_host * x).sum() -
+                     mean_x[i] * edges_t.multiply(par_by_edge).sum() -
+                     mean_y[i] * edges_t.multiply(host_by_edge).sum())
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return sum_xy / np.sqrt(ss_x * ss_y)
+
+
+def _count_rows(labels, num_labels):
+    """Count the occurrences of each label in each row of `labels`."""
+    offsets = np.arange(len(labels))[:, np.newaxis] * num_labels
+    counts = np.bincount((labels + offsets).ravel(),
+                         minlength=len(labels) * num_labels)
+    return counts.reshape(len(labels), num_labels)
+
+
+def _half_quadratic_forms(vectors, matrix):
+    """Compute ``v.dot(matrix).dot(v) / 2`` for each row ``v`` of `vectors`."""
+    return np.einsum('ij,ij->i', vectors.dot(matrix), vectors) / 2
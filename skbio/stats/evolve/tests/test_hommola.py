@@ -8,13 +8,16 @@
 
 from __future__ import absolute_import, division, print_function
 import unittest
+from itertools import combinations
 
 import numpy as np
 import numpy.testing as npt
+from scipy.spatial.distance import pdist, squareform
+from scipy.stats import pearsonr
 
 from skbio.stats.distance import mantel
 from skbio.stats.evolve import hommola_cospeciation
-from skbio.stats.evolve._hommola import _get_dist, _gen_lists
+from skbio.stats.evolve._hommola import _edge_correlations
 
 
 class HommolaCospeciationTests(unittest.TestCase):
@@ -100,6 +103,43 @@ class HommolaCospeciationTests(unittest.TestCase):
         self.assertAlmostEqual(obs_r, exp_r)
         npt.assert_allclose(obs_perm_stats, exp_perm_stats)
 
+    def test_hommola_cospeciation_seed_and_n_jobs(self):
+        exp = hommola_cospeciation(self.hdist, self.pdist, self.interact,
+                                   250, seed=42)
+        self.assertEqual(len(exp[2]), 250)
+        for n_jobs in 1, 2:
+            obs = hommola_cospeciation(self.hdist, self.pdist, self.interact,
+                                       250, seed=42, n_jobs=n_jobs)
+            self.assertEqual(obs[:2], exp[:2])
+            npt.assert_array_equal(obs[2], exp[2])
+
+    def test_hommola_cospeciation_precision(self):
+        obs_r, obs_p, obs_perm_stats = hommola_cospeciation(
+            self.hdist, self.pdist, self.interact, 999, seed=0,
+            precision=0.1)
+        self.assertEqual(len(obs_perm_stats), 100)
+        self.assertEqual(obs_p, ((obs_perm_stats >= obs_r).sum() + 1) / 101)
+
+    def test_hommola_cospeciation_global_random_state(self):
+        # without a seed, permutations spanning several batches are the same
+        # as those of a single loop of shuffles of NumPy's global random state
+        np.random.seed(7)
+        obs_perm_stats = hommola_cospeciation(
+            self.hdist, self.pdist, self.interact, 250)[2]
+
+        np.random.seed(7)
+        pars, hosts = np.nonzero(self.interact)
+        mp = np.arange(5)
+        mh = np.arange(5)
+        exp_perm_stats = []
+        for _ in range(250):
+            np.random.shuffle(mp)
+            np.random.shuffle(mh)
+            exp_perm_stats.append(_edge_correlations(
+                self.hdist, self.pdist, mh[hosts][np.newaxis],
+                mp[pars][np.newaxis])[0])
+        npt.assert_allclose(obs_perm_stats, exp_perm_stats)
+
     def test_hommola_vs_mantel(self):
         # we don't compare p-values because the two methods use different
         # permutation strategies
@@ -126,37 +166,47 @@ class HommolaCospeciationTests(unittest.TestCase):
         self.assertAlmostEqual(obs_r, exp_r)
         npt.assert_equal(obs_perm_stats, exp_perm_stats)
 
-    def test_get_dist(self):
-        labels = np.array([0, 1, 1, 2, 3])
-        k_labels, t_labels = _gen_lists(labels)
-        dists = np.array([[0, 2, 6, 3], [2, 0, 5, 4], [6, 5, 0, 7],
-                          [3, 4, 7, 0]])
-        index = np.array([2, 3, 1, 0])
-
-        expected_vec = np.array([7, 7, 5, 6, 0, 4, 3, 4, 3, 2])
-        actual_vec = _get_dist(k_labels, t_labels, dists, index)
-
-        npt.assert_allclose(actual_vec, expected_vec)
-
-    def test_gen_lists(self):
-        exp_pars_k_labels = np.array([0, 0, 0, 0, 0, 1, 1, 1,
-                                      1, 2, 2, 2, 3, 3, 4])
-        exp_pars_t_labels = np.array([1, 2, 3, 4, 4, 2, 3, 4,
-                                      4, 3, 4, 4, 4, 4, 4])
-        exp_host_k_labels = np.array([0, 0, 0, 0, 0, 1, 1, 1,
-                                      1, 2, 2, 2, 3, 3, 3])
-        exp_host_t_labels = np.array([1, 2, 3, 3, 4, 2, 3, 3,
-                                      4, 3, 3, 4, 3, 4, 4])
-
-        pars, hosts = np.nonzero(self.interact)
-
-        obs_pars_k_labels, obs_pars_t_labels = _gen_lists(pars)
-        obs_hosts_k_labels, obs_hosts_t_labels = _gen_lists(hosts)
-
-        npt.assert_allclose(exp_pars_k_labels, obs_pars_k_labels)
-        npt.assert_allclose(exp_pars_t_labels, obs_pars_t_labels)
-        npt.assert_allclose(exp_host_k_labels, obs_hosts_k_labels)
-        npt.assert_allclose(exp_host_t_labels, obs_hosts_t_labels)
+    def _check_edge_correlations(self, host_dists, par_dists, interaction,
+                                 num_perms=20):
+        rs = np.random.RandomState(0)
+        pars, hosts = np.nonzero(interaction)
+        num_pars, num_hosts = interaction.shape
+        edge_pairs = np.array(list(combinations(range(len(pars)), 2))).T
+        perm_pars = np.array([rs.permutation(num_pars)[pars]
+                              for _ in range(num_perms)])
+        perm_hosts = np.array([rs.permutation(num_hosts)[hosts]
+                               for _ in range(num_perms)])
+
+        exp = []
+        for perm_host, perm_par in zip(perm_hosts, perm_pars):
+            x = host_dists[perm_host[edge_pairs[0]], perm_host[edge_pairs[1]]]
+            y = par_dists[perm_par[edge_pairs[0]], perm_par[edge_pairs[1]]]
+            exp.append(pearsonr(x, y)[0])
+
+        obs = _edge_correlations(host_dists, par_dists, perm_hosts,
+                                 perm_pars)
+        npt.assert_allclose(obs, exp)
+
+    def test_edge_correlations(self):
+        rs = np.random.RandomState(0)
+        self._check_edge_correlations(squareform(pdist(rs.rand(7, 3))),
+                                      squareform(pdist(rs.rand(9, 3))),
+                                      rs.rand(9, 7) < 0.3)
+
+    def test_edge_correlations_small_variance(self):
+        # no two edges share a host or a parasite, so all distances between
+        # edges are close to 1e7
+        rs = np.random.RandomState(0)
+        self._check_edge_correlations(squareform(pdist(rs.rand(7, 3)) + 1e7),
+                                      squareform(pdist(rs.rand(9, 3))),
+                                      np.eye(9, 7, dtype=bool))
+
+    def test_edge_correlations_no_variance(self):
+        # a single host: all host distances between edges are zero
+        obs = _edge_correlations(np.zeros((1, 1)), self.pdist,
+                                 np.zeros((2, 3), dtype=int),
+                                 np.array([[0, 1, 2], [2, 3, 4]]))
+        npt.assert_equal(obs, [np.nan, np.nan])
 
     def test_dm_too_small(self):
         with self.assertRaises(ValueError):
@@ -17,12 +17,16 @@ Functions
 
    ca
    pcoa
+   pcoa_condensed
+   pcoa_project
    cca
    rda
+   rda_test
    mean_and_std
    corr
    scale
    svd_rank
+   center_distance_matrix
 
 
 Examples
@@ -116,14 +120,16 @@ from __future__ import absolute_import, division, print_function
 
 from skbio.util import TestRunner
 
-from ._redundancy_analysis import rda
+from ._redundancy_analysis import rda, rda_test
 from ._correspondence_analysis import ca
 from ._canonical_correspondence_analysis import cca
-from ._principal_coordinate_analysis import pcoa
-from ._utils import (mean_and_std, scale, svd_rank, corr, e_matrix, f_matrix)
-
-__all__ = ['ca', 'rda', 'cca', 'pcoa',
-           'mean_and_std', 'scale', 'svd_rank', 'corr',
-           'e_matrix', 'f_matrix']
+from ._principal_coordinate_analysis import (pcoa, pcoa_condensed,
+                                             pcoa_project)
+from ._utils import (mean_and_std, scale, svd_rank, corr, e_matrix, f_matrix,
+                     center_distance_matrix)
+
+__all__ = ['ca', 'rda', 'rda_test', 'cca', 'pcoa', 'pcoa_condensed',
+           'pcoa_project', 'mean_and_std', 'scale', 'svd_rank', 'corr',
+           'e_matrix', 'f_matrix', 'center_distance_matrix']
 
 test = TestRunner(__file__).test
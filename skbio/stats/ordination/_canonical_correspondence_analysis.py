@@ -11,14 +11,16 @@ from __future__ import absolute_import, division, print_function
 import numpy as np
 import pandas as pd
 from scipy.linalg import svd, lstsq
+from scipy.sparse import issparse
 
 from skbio._base import OrdinationResults
-from ._utils import corr, svd_rank, scale
+from ._utils import (corr, svd_rank, scale, _chi_square_operator,
+                     _truncated_svd)
 from skbio.util._decorator import experimental
 
 
 @experimental(as_of="0.4.0")
-def cca(y, x, scaling=1):
+def cca(y, x, scaling=1, number_of_dimensions=0, feature_ids=None):
     r"""Compute canonical (also known as constrained) correspondence
     analysis.
 
@@ -40,7 +42,7 @@ def cca(y, x, scaling=1):
 
     Parameters
     ----------
-    y : DataFrame
+    y : DataFrame or scipy.sparse matrix
         Samples by features table (n, m)
     x : DataFrame
         Samples by constraints table (n, q)
@@ -49,6 +51,17 @@ def cca(y, x, scaling=1):
         Scaling type 2 preserver :math:`\chi^2` distances between columns.
         For a more detailed explanation of the interpretation, check Legendre &
         Legendre 1998, section 9.4.3.
+    number_of_dimensions : int, optional
+        Number of unconstrained (residual) ordination axes to compute. If 0
+        (the default), all axes are computed with a full SVD. Otherwise, only
+        the leading residual axes are computed with a truncated SVD, which
+        never forms the standardized matrix, so that sparse tables are not
+        densified. Must be less than ``min(n, m)``. All constrained axes are
+        always computed.
+    feature_ids : list of str, optional
+        Ids of the columns of `y` if it is a sparse matrix. If not provided,
+        columns are identified by their positions. Sample ids are taken from
+        `x`.
 
     Returns
     -------
@@ -61,6 +74,7 @@ def cca(y, x, scaling=1):
         If `x` and `y` have different number of rows
         If `y` contains negative values
         If `y` contains a row of only 0's.
+        If `number_of_dimensions` is negative or not less than ``min(n, m)``.
     NotImplementedError
         If scaling is not 1 or 2.
 
@@ -73,6 +87,13 @@ def cca(y, x, scaling=1):
     perfect collinearity: the user needs to choose which ones to
     input.
 
+    If `number_of_dimensions` is given, the constrained axes are found from
+    the projection of the standardized matrix onto the (at most q-dimensional)
+    space spanned by the constraints, and the leading residual axes with
+    ARPACK, using only products of `y` (and of its transpose) with dense
+    blocks of vectors. The proportion of the total inertia explained by each
+    axis is still reported, even though the eigenvalues don't sum to one.
+
     Canonical *correspondence* analysis shouldn't be confused with
     canonical *correlation* analysis (CCorA, but sometimes called
     CCA), a different technique to search for multivariate
@@ -103,7 +124,19 @@ def cca(y, x, scaling=1):
        Ecology. Elsevier, Amsterdam.
 
     """
-    Y = y.as_matrix()
+    if issparse(y):
+        sample_ids = x.index
+        feature_ids = (pd.RangeIndex(y.shape[1]) if feature_ids is None else
+                       pd.Index(feature_ids))
+        Y = y.astype(np.float64).tocsr()
+        row_max = Y.max(axis=1).toarray().ravel()
+        if number_of_dimensions == 0:
+            Y = Y.toarray()
+    else:
+        sample_ids = y.index
+        feature_ids = y.columns
+        Y = y.as_matrix()
+        row_max = Y.max(axis=1)
     X = x.as_matrix()
 
     # Perform parameter sanity checks
@@ -115,7 +148,6 @@ def cca(y, x, scaling=1):
     if Y.min() < 0:
         raise ValueError(
             "The samples by features table 'y' must be nonnegative")
-    row_max = Y.max(axis=1)
     if np.any(row_max <= 0):
         # Or else the lstsq call to compute Y_hat breaks
         raise ValueError("The samples by features table 'y' cannot contain a "
@@ -123,6 +155,13 @@ def cca(y, x, scaling=1):
     if scaling not in {1, 2}:
         raise NotImplementedError(
             "Scaling {0} not implemented.".format(scaling))
+    if not 0 <= number_of_dimensions < min(Y.shape):
+        raise ValueError("number_of_dimensions must be between 0 and %d, "
+                         "not %d." % (min(Y.shape) - 1, number_of_dimensions))
+
+    if number_of_dimensions > 0:
+        return _truncated_cca(Y, X, scaling, number_of_dimensions,
+                              sample_ids, feature_ids)
 
     # Step 1 (similar to Pearson chi-square statistic)
     grand_total = Y.sum()
@@ -170,6 +209,61 @@ def cca(y, x, scaling=1):
     U_res = vt_res.T
     U_hat_res = Y_res.dot(U_res) * s_res**-1
 
+    return _cca_results(s, U, U_hat, Y_hat.dot(U), s_res, U_res, U_hat_res,
+                        row_marginals, column_marginals, X_weighted, u,
+                        scaling, sample_ids, feature_ids)
+
+
+def _truncated_cca(Y, X, scaling, number_of_dimensions, sample_ids,
+                   feature_ids):
+    """Compute CCA with an implicit standardized matrix and truncated SVD."""
+    # Step 1, without forming Q_bar
+    matmat, rmatmat, row_marginals, column_marginals, inertia = \
+        _chi_square_operator(Y)
+
+    # Step 2
+    X = scale(X, weights=row_marginals, ddof=0)
+
+    # Step 3. The fitted values Y_hat = Qx Qx' Q_bar are kept factored
+    # through an orthonormal basis Qx of the weighted constraints.
+    X_weighted = row_marginals[:, None]**0.5 * X
+    ux, sx, _ = svd(X_weighted, full_matrices=False)
+    Qx = ux[:, :svd_rank(X_weighted.shape, sx)]
+    M = rmatmat(Qx).T
+
+    # Step 4. The SVD of Y_hat follows from the (small) SVD of M
+    u_m, s, vt = svd(M, full_matrices=False)
+    rank = svd_rank(Y.shape, s)
+    s = s[:rank]
+    u = Qx.dot(u_m[:, :rank])
+    U = vt[:rank].T
+
+    # Step 5. Eq. 9.38
+    U_hat = matmat(U) * s**-1
+
+    # Residuals analysis, Y_res = Q_bar - Qx M
+    def res_matmat(V):
+        return matmat(V) - Qx.dot(M.dot(V))
+
+    def res_rmatmat(V):
+        return rmatmat(V) - M.T.dot(Qx.T.dot(V))
+
+    _, s_res, vt_res = _truncated_svd(res_matmat, res_rmatmat, Y.shape,
+                                      number_of_dimensions)
+    rank = svd_rank(Y.shape, s_res)
+    s_res = s_res[:rank]
+    U_res = vt_res[:rank].T
+    U_hat_res = res_matmat(U_res) * s_res**-1
+
+    return _cca_results(s, U, U_hat, u * s, s_res, U_res, U_hat_res,
+                        row_marginals, column_marginals, X_weighted, u,
+                        scaling, sample_ids, feature_ids, inertia=inertia)
+
+
+def _cca_results(s, U, U_hat, Y_hat_U, s_res, U_res, U_hat_res,
+                 row_marginals, column_marginals, X_weighted, u, scaling,
+                 sample_ids, feature_ids, inertia=None):
+    """Scale the constrained and residual axes and build the results."""
     eigenvalues = np.r_[s, s_res]**2
 
     # Scalings (p. 596 L&L 1998):
@@ -187,8 +281,7 @@ def cca(y, x, scaling=1):
 
     # Sample scores which are linear combinations of constraint
     # variables
-    Z_scaling1 = ((row_marginals**-0.5)[:, None] *
-                  Y_hat.dot(U))
+    Z_scaling1 = (row_marginals**-0.5)[:, None] * Y_hat_U
     Z_scaling2 = Z_scaling1 * s**-1
 
     # Feature residual scores, scaling 1
@@ -216,8 +309,6 @@ def cca(y, x, scaling=1):
     biplot_scores = corr(X_weighted, u)
 
     pc_ids = ['CCA%d' % (i+1) for i in range(len(eigenvalues))]
-    sample_ids = y.index
-    feature_ids = y.columns
     eigvals = pd.Series(eigenvalues, index=pc_ids)
     samples = pd.DataFrame(sample_scores,
                            columns=pc_ids, index=sample_ids)
@@ -231,4 +322,5 @@ def cca(y, x, scaling=1):
         "CCA", "Canonical Correspondence Analysis", eigvals, samples,
         features=features, biplot_scores=biplot_scores,
         sample_constraints=sample_constraints,
-        proportion_explained=eigvals / eigvals.sum())
+        proportion_explained=eigvals / (eigvals.sum() if inertia is None
+                                        else inertia))
@@ -11,14 +11,16 @@ from __future__ import absolute_import, division, print_function
 import numpy as np
 import pandas as pd
 from scipy.linalg import svd
+from scipy.sparse import issparse
 
 from skbio._base import OrdinationResults
-from ._utils import svd_rank
+from ._utils import svd_rank, _chi_square_operator, _truncated_svd
 from skbio.util._decorator import experimental
 
 
 @experimental(as_of="0.4.0")
-def ca(X, scaling=1):
+def ca(X, scaling=1, number_of_dimensions=0, sample_ids=None,
+       feature_ids=None):
     r"""Compute correspondence analysis, a multivariate statistical
     technique for ordination.
 
@@ -36,7 +38,7 @@ def ca(X, scaling=1):
 
     Parameters
     ----------
-    X : pd.DataFrame
+    X : pd.DataFrame or scipy.sparse matrix
         Samples by features table (n, m). It can be applied to different kinds
         of data tables but data must be non-negative and dimensionally
         homogeneous (quantitative or binary). The rows correspond to the
@@ -67,6 +69,15 @@ def ca(X, scaling=1):
         far from its edges will probably exhibit better relationships than
         features either in the center (may be multimodal features, not related
         to the shown ordination axes...) or the edges (sparse features...).
+    number_of_dimensions : int, optional
+        Number of ordination axes to compute. If 0 (the default), all axes
+        are computed with a full SVD. Otherwise, only the leading axes are
+        computed with a truncated SVD, which never forms the standardized
+        matrix, so that sparse tables are not densified. Must be less than
+        ``min(n, m)``.
+    sample_ids, feature_ids : list of str, optional
+        Ids of the rows and columns of `X` if it is a sparse matrix. If not
+        provided, rows and columns are identified by their positions.
 
     Returns
     -------
@@ -80,12 +91,19 @@ def ca(X, scaling=1):
         If the scaling value is not either `1` or `2`.
     ValueError
         If any of the input matrix elements are negative.
+    ValueError
+        If `number_of_dimensions` is negative or not less than ``min(n, m)``.
 
     Notes
     -----
     The algorithm is based on [1]_, \S 9.4.1., and is expected to give the same
     results as ``cca(X)`` in R's package vegan.
 
+    If `number_of_dimensions` is given, the leading singular vectors of the
+    standardized matrix are found with ARPACK, using only products of `X` (and
+    of its transpose) with dense blocks of vectors. This makes it possible to
+    ordinate full, sparse feature tables.
+
     See Also
     --------
     cca
@@ -104,36 +122,55 @@ def ca(X, scaling=1):
     short_method_name = 'CA'
     long_method_name = 'Correspondance Analysis'
 
-    # we deconstruct the dataframe to avoid duplicating the data and be able
-    # to perform operations on the matrix
-    row_ids = X.index
-    column_ids = X.columns
-    X = np.asarray(X.values, dtype=np.float64)
+    if issparse(X):
+        row_ids = (pd.RangeIndex(X.shape[0]) if sample_ids is None else
+                   pd.Index(sample_ids))
+        column_ids = (pd.RangeIndex(X.shape[1]) if feature_ids is None else
+                      pd.Index(feature_ids))
+        X = X.astype(np.float64)
+        if number_of_dimensions == 0:
+            X = X.toarray()
+    else:
+        # we deconstruct the dataframe to avoid duplicating the data and be
+        # able to perform operations on the matrix
+        row_ids = X.index
+        column_ids = X.columns
+        X = np.asarray(X.values, dtype=np.float64)
 
     # Correspondance Analysis
     r, c = X.shape
 
     if X.min() < 0:
         raise ValueError("Input matrix elements must be non-negative.")
-
-    # Step 1 (similar to Pearson chi-square statistic)
-    grand_total = X.sum()
-    Q = X / grand_total
-
-    column_marginals = Q.sum(axis=0)
-    row_marginals = Q.sum(axis=1)
-
-    # Formula 9.32 in Lagrange & Lagrange (1998). Notice that it's
-    # an scaled version of the contribution of each cell towards
-    # Pearson chi-square statistic.
-    expected = np.outer(row_marginals, column_marginals)
-    Q_bar = (Q - expected) / np.sqrt(expected)  # Eq. 9.32
-
-    # Step 2 (Singular Value Decomposition)
-    U_hat, W, Ut = svd(Q_bar, full_matrices=False)
+    if not 0 <= number_of_dimensions < min(r, c):
+        raise ValueError("number_of_dimensions must be between 0 and %d, "
+                         "not %d." % (min(r, c) - 1, number_of_dimensions))
+
+    if number_of_dimensions == 0:
+        # Step 1 (similar to Pearson chi-square statistic)
+        grand_total = X.sum()
+        Q = X / grand_total
+
+        column_marginals = Q.sum(axis=0)
+        row_marginals = Q.sum(axis=1)
+
+        # Formula 9.32 in Lagrange & Lagrange (1998). Notice that it's
+        # an scaled version of the contribution of each cell towards
+        # Pearson chi-square statistic.
+        expected = np.outer(row_marginals, column_marginals)
+        Q_bar = (Q - expected) / np.sqrt(expected)  # Eq. 9.32
+
+        # Step 2 (Singular Value Decomposition)
+        U_hat, W, Ut = svd(Q_bar, full_matrices=False)
+    else:
+        # Steps 1 and 2, without forming Q_bar
+        matmat, rmatmat, row_marginals, column_marginals, _ = \
+            _chi_square_operator(X)
+        U_hat, W, Ut = _truncated_svd(matmat, rmatmat, (r, c),
+                                      number_of_dimensions)
     # Due to the centering, there are at most min(r, c) - 1 non-zero
     # eigenvalues (which are all positive)
-    rank = svd_rank(Q_bar.shape, W)
+    rank = svd_rank((r, c), W)
     assert rank <= min(r, c) - 1
     U_hat = U_hat[:, :rank]
     W = W[:rank]
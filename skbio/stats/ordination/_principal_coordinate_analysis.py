@@ -7,18 +7,28 @@
 # ----------------------------------------------------------------------------
 
 from __future__ import absolute_import, division, print_function
+from future.builtins import range
 
 from warnings import warn
 
 import pandas as pd
 import numpy as np
-from scipy.linalg import eigh
+from scipy.linalg import eigh, qr
 
 from skbio._base import OrdinationResults
 from skbio.stats.distance import DistanceMatrix
-from ._utils import e_matrix, f_matrix
+from skbio.stats._monte_carlo import _check_random_state
+from ._utils import center_distance_matrix
 from skbio.util._decorator import experimental
 
+# Number of matrix cells of each block of rows read by `pcoa_condensed`.
+_BLOCK_CELLS = 2 ** 20
+
+# Number of extra random vectors used by the randomized eigensolver, and
+# number of power iterations it performs. See `_fsvd`.
+_FSVD_OVERSAMPLES = 20
+_FSVD_POWER_ITERATIONS = 4
+
 # - In cogent, after computing eigenvalues/vectors, the imaginary part
 #   is dropped, if any. We know for a fact that the eigenvalues are
 #   real, so that's not necessary, but eigenvectors can in principle
@@ -29,7 +39,8 @@ from skbio.util._decorator import experimental
 
 
 @experimental(as_of="0.4.0")
-def pcoa(distance_matrix):
+def pcoa(distance_matrix, method='eigh', number_of_dimensions=0,
+         inplace=False, seed=None):
     r"""Perform Principal Coordinate Analysis.
 
     Principal Coordinate Analysis (PCoA) is a method similar to PCA
@@ -50,6 +61,36 @@ def pcoa(distance_matrix):
     ==========
     distance_matrix : DistanceMatrix
         A distance matrix.
+    method : {'eigh', 'fsvd'}, optional
+        Eigendecomposition method. ``'eigh'`` computes exact eigenvalues and
+        eigenvectors. ``'fsvd'`` approximates the largest ones with a
+        randomized algorithm (see Notes), which is much faster and uses less
+        memory when `number_of_dimensions` is small compared to the number of
+        samples.
+    number_of_dimensions : int, optional
+        Number of principal coordinates to compute and return. If ``0`` (the
+        default), all of them are returned.
+    inplace : bool, optional
+        If ``True``, the data of `distance_matrix` is overwritten with the
+        centered matrix instead of being copied, which halves the memory
+        needed. `distance_matrix` must not be used afterwards.
+    seed : int or np.random.RandomState, optional
+        Seed or random state of the randomized algorithm used when `method`
+        is ``'fsvd'``. If ``None`` (the default), NumPy's global random state
+        is used.
+
+    Returns
+    =======
+    OrdinationResults
+        Object that stores the PCoA results, including eigenvalues, the
+        proportion explained by each of them, and transformed sample
+        coordinates.
+
+    Raises
+    ======
+    ValueError
+        If `method` is invalid, or if `number_of_dimensions` is negative or
+        greater than the number of samples.
 
     Notes
     =====
@@ -67,21 +108,344 @@ def pcoa(distance_matrix):
        However, a warning is raised whenever negative eigenvalues
        appear, allowing the user to decide if they can be safely
        ignored.
+
+    When `number_of_dimensions` is given, ``'eigh'`` only computes the
+    requested eigenpairs, and ``'fsvd'`` approximates them by the
+    randomized range finder of [1]_ (with a few power iterations), followed
+    by an exact eigendecomposition of the matrix restricted to that range.
+    The proportion explained by each axis is then relative to the sum of
+    all eigenvalues, i.e., the trace of the centered matrix, since the
+    eigenvalues that are not computed are unknown. If all dimensions are
+    computed, negative eigenvalues are instead set to zero and proportions
+    are relative to the sum of the positive eigenvalues. Both agree if the
+    distances are Euclidean, but if there are negative eigenvalues the
+    proportions of truncated results are larger (and may sum to more than
+    one). If all dimensions are requested, both methods compute the exact
+    eigendecomposition.
+
+    References
+    ==========
+    .. [1] Halko N, Martinsson PG, Tropp JA (2011) Finding structure with
+       randomness: Probabilistic algorithms for constructing approximate
+       matrix decompositions. SIAM Review, 53(2), 217-288.
     """
     distance_matrix = DistanceMatrix(distance_matrix)
+    num_samples = distance_matrix.shape[0]
 
-    E_matrix = e_matrix(distance_matrix.data)
+    if method not in ('eigh', 'fsvd'):
+        raise ValueError("PCoA eigendecomposition method '%s' is not "
+                         "supported." % method)
+    if not 0 <= number_of_dimensions <= num_samples:
+        raise ValueError("number_of_dimensions must be between 0 and the "
+                         "number of samples (%d), not %d."
+                         % (num_samples, number_of_dimensions))
+    if number_of_dimensions == 0:
+        number_of_dimensions = num_samples
+        truncated = False
+    else:
+        truncated = number_of_dimensions < num_samples
 
     # If the used distance was euclidean, pairwise distances
     # needn't be computed from the data table Y because F_matrix =
     # Y.dot(Y.T) (if Y has been centred).
-    F_matrix = f_matrix(E_matrix)
+    F_matrix = center_distance_matrix(distance_matrix.data, inplace=inplace)
+    if truncated:
+        sum_eigvals = np.trace(F_matrix)
+
+    if method == 'fsvd' and truncated:
+        eigvals, eigvecs = _fsvd(F_matrix.dot, num_samples,
+                                 number_of_dimensions, seed=seed)
+    elif truncated:
+        eigvals, eigvecs = eigh(
+            F_matrix, overwrite_a=True,
+            eigvals=(num_samples - number_of_dimensions, num_samples - 1))
+    else:
+        # the centered matrix is our own (or may be overwritten)
+        eigvals, eigvecs = eigh(F_matrix, overwrite_a=True)
+
+    return _pcoa_results(eigvals, eigvecs, distance_matrix.ids,
+                         sum_eigvals if truncated else None)
+
+
+@experimental(as_of="0.4.0-dev")
+def pcoa_condensed(condensed, ids, number_of_dimensions=10, seed=None):
+    r"""Perform an out-of-core Principal Coordinate Analysis.
+
+    Approximates the first principal coordinates of a distance matrix stored
+    in condensed form, reading it a block of rows at a time. This allows the
+    ordination of distance matrices that are larger than memory, e.g., when
+    `condensed` is memory-mapped from disk.
+
+    Parameters
+    ==========
+    condensed : 1-D array_like
+        Distances in condensed form (see ``DistanceMatrix.condensed_form``),
+        i.e., the upper triangle of the distance matrix in row-major order.
+        Any object that supports slicing into a numpy array (e.g., a
+        ``numpy.memmap``) can be used.
+    ids : sequence of str
+        IDs of the samples, in the order of the rows of the distance matrix.
+    number_of_dimensions : int, optional
+        Number of principal coordinates to compute. Must be between 1 and the
+        number of samples.
+    seed : int or np.random.RandomState, optional
+        Seed or random state of the randomized eigensolver. If ``None`` (the
+        default), NumPy's global random state is used.
+
+    Returns
+    =======
+    OrdinationResults
+        Object that stores the PCoA results, including eigenvalues, the
+        proportion explained by each of them, and transformed sample
+        coordinates.
+
+    Raises
+    ======
+    ValueError
+        If the length of `condensed` does not match the number of `ids`, if
+        `ids` are not unique, if `number_of_dimensions` is invalid, or if
+        distances are negative or NaN.
+
+    See Also
+    ========
+    pcoa
+
+    Notes
+    =====
+    The centered matrix used by ``pcoa`` (see ``center_distance_matrix``) is
+    never stored. Its row means are computed in a first pass over
+    `condensed`, after which each product of the centered matrix with a
+    block of vectors is computed from the squared distances in a single
+    pass. Coordinates are then found with the randomized eigensolver of
+    ``pcoa(..., method='fsvd')``, which needs a few such passes. Apart from
+    `condensed`, memory use is proportional to the number of samples times
+    `number_of_dimensions`.
+
+    As for truncated results of ``pcoa``, the proportion explained by each
+    axis is relative to the trace of the centered matrix, which includes any
+    negative eigenvalues.
+
+    Examples
+    ========
+    Store the condensed form of a distance matrix on disk, and memory-map it.
+    The samples are the corners of a 3 x 4 rectangle:
+
+    >>> import os
+    >>> import tempfile
+    >>> import numpy as np
+    >>> from skbio import DistanceMatrix
+    >>> from skbio.stats.ordination import pcoa_condensed
+    >>> dm = DistanceMatrix([[0, 3, 4, 5], [3, 0, 5, 4], [4, 5, 0, 3],
+    ...                      [5, 4, 3, 0]], ['a', 'b', 'c', 'd'])
+    >>> path = os.path.join(tempfile.mkdtemp(), 'distances.npy')
+    >>> np.save(path, dm.condensed_form())
+    >>> condensed = np.load(path, mmap_mode='r')
+
+    Compute the first two principal coordinates:
+
+    >>> results = pcoa_condensed(condensed, dm.ids, number_of_dimensions=2,
+    ...                          seed=42)
+    >>> print(np.round(results.eigvals.values, 6))
+    [ 16.   9.]
+    >>> print(np.round(results.proportion_explained.values, 6))
+    [ 0.64  0.36]
+
+    """
+    ids = tuple(ids)
+    num_samples = len(ids)
+    if len(set(ids)) != num_samples:
+        raise ValueError("IDs must be unique.")
+    if len(condensed) != num_samples * (num_samples - 1) // 2:
+        raise ValueError("A condensed distance matrix of %d samples must "
+                         "have %d distances, not %d."
+                         % (num_samples, num_samples * (num_samples - 1) // 2,
+                            len(condensed)))
+    if not 1 <= number_of_dimensions <= num_samples:
+        raise ValueError("number_of_dimensions must be between 1 and the "
+                         "number of samples (%d), not %d."
+                         % (num_samples, number_of_dimensions))
+
+    row_means = np.zeros(num_samples)
+    for start, stop, block in _condensed_e_blocks(condensed, num_samples):
+        row_means[start:stop] += block.sum(axis=1)
+        row_means += block.sum(axis=0)
+    row_means /= num_samples
+    matrix_mean = row_means.mean()
+
+    def matmat(X):
+        # F.dot(X) with F = E - row_means - col_means + matrix_mean, and E
+        # the sum of its (streamed) upper triangle and its transpose
+        product = np.zeros(X.shape)
+        for start, stop, block in _condensed_e_blocks(condensed, num_samples):
+            product[start:stop] += block.dot(X)
+            product += block.T.dot(X[start:stop])
+        col_sums = X.sum(axis=0)
+        product -= np.outer(row_means, col_sums)
+        product -= row_means.dot(X)
+        product += matrix_mean * col_sums
+        return product
+
+    eigvals, eigvecs = _fsvd(matmat, num_samples, number_of_dimensions,
+                             seed=seed)
+    # the diagonal of E is zero, so F's is matrix_mean - 2 * row_means
+    sum_eigvals = num_samples * matrix_mean - 2 * row_means.sum()
+    return _pcoa_results(eigvals, eigvecs, ids, sum_eigvals)
+
+
+@experimental(as_of="0.4.0-dev")
+def pcoa_project(ordination, distance_matrix, distances):
+    r"""Project new samples into an existing Principal Coordinate Analysis.
+
+    Places new samples in the space of an existing PCoA using only their
+    distances to the samples it was computed from (the reference samples),
+    using Gower's add-a-point formula [1]_. The ordination itself (its axes
+    and the coordinates of the reference samples) is left unchanged.
+
+    Parameters
+    ==========
+    ordination : OrdinationResults
+        Results of ``pcoa`` (or ``pcoa_condensed``) on `distance_matrix`.
+    distance_matrix : DistanceMatrix
+        Distance matrix of the reference samples.
+    distances : pd.DataFrame
+        Distances from each new sample (rows) to each reference sample
+        (columns, labeled with their IDs). Additional columns are ignored.
+
+    Returns
+    =======
+    pd.DataFrame
+        Coordinates of the new samples (rows) on each axis of `ordination`
+        (columns).
+
+    Raises
+    ======
+    ValueError
+        If the samples of `ordination` are not the samples of
+        `distance_matrix`, if `distances` is missing any reference sample,
+        or if `distances` are negative or NaN.
 
-    # If the eigendecomposition ever became a bottleneck, it could
-    # be replaced with an iterative version that computes the
-    # largest k eigenvectors.
-    eigvals, eigvecs = eigh(F_matrix)
+    See Also
+    ========
+    pcoa
 
+    Notes
+    =====
+    The coordinate of a new sample on an axis with positive eigenvalue
+    :math:`\lambda` is :math:`-\frac{1}{2\lambda} \sum_i x_i (d_i^2 -
+    \overline{D_i^2})`, where :math:`x_i` is the coordinate of reference
+    sample :math:`i`, :math:`d_i` is the distance between the new sample and
+    reference sample :math:`i`, and :math:`\overline{D_i^2}` is the mean of
+    the squared distances between reference sample :math:`i` and all
+    reference samples. This is the position of the new sample if the
+    distances are Euclidean, and projecting a reference sample gives back
+    its coordinates. Coordinates on axes whose eigenvalue is zero (including
+    those that ``pcoa`` set to zero because they were negative) are zero.
+
+    References
+    ==========
+    .. [1] Gower JC (1968) Adding a point to vector diagrams in multivariate
+       analysis. Biometrika, 55(3), 582-585.
+
+    Examples
+    ========
+    The reference samples are three corners of a 3 x 4 rectangle:
+
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> from skbio import DistanceMatrix
+    >>> from skbio.stats.ordination import pcoa, pcoa_project
+    >>> dm = DistanceMatrix([[0, 3, 5], [3, 0, 4], [5, 4, 0]],
+    ...                     ['a', 'b', 'c'])
+    >>> ordination = pcoa(dm)
+
+    Project the fourth corner of the rectangle:
+
+    >>> distances = pd.DataFrame([[4, 5, 3]], index=['d'],
+    ...                          columns=['a', 'b', 'c'])
+    >>> coordinates = pcoa_project(ordination, dm, distances)
+
+    The projected corner is at the expected distances from the reference
+    samples:
+
+    >>> d = coordinates.loc['d'].values
+    >>> print(np.round(np.sqrt(((ordination.samples.values - d) ** 2).sum(
+    ...     axis=1)), 6))
+    [ 4.  5.  3.]
+
+    """
+    distance_matrix = DistanceMatrix(distance_matrix)
+    ids = list(distance_matrix.ids)
+    if (len(ordination.samples.index) != len(ids) or
+            set(ordination.samples.index) != set(ids)):
+        raise ValueError("The samples of the ordination must be the samples "
+                         "of the distance matrix.")
+    missing = [id_ for id_ in ids if id_ not in distances.columns]
+    if missing:
+        raise ValueError("Distances to reference samples %r are missing."
+                         % missing[:5])
+
+    new_distances = np.asarray(distances[ids], dtype=float)
+    if not (new_distances >= 0).all():
+        raise ValueError("Distances must be non-negative and not NaN.")
+
+    coordinates = ordination.samples.loc[ids].values
+    eigvals = ordination.eigvals.values
+    data = distance_matrix.data
+    mean_sq_distances = np.einsum('ij,ij->j', data, data) / len(ids)
+
+    # constant terms are dropped, as the coordinates of each axis sum to zero
+    products = -0.5 * (new_distances ** 2 - mean_sq_distances).dot(
+        coordinates)
+    positive = eigvals > 0
+    projected = np.zeros(products.shape)
+    projected[:, positive] = products[:, positive] / eigvals[positive]
+    return pd.DataFrame(projected, index=distances.index,
+                        columns=ordination.samples.columns)
+
+
+def _condensed_e_blocks(condensed, num_samples):
+    """Stream the upper triangle of the E matrix from condensed distances.
+
+    Yields
+    ------
+    start, stop : int
+        Range of rows of the block.
+    block : 2D np.ndarray (float)
+        Rows `start` to `stop` of the E matrix (see ``e_matrix``), with
+        zeros on and below the diagonal.
+
+    """
+    step = max(1, _BLOCK_CELLS // max(num_samples, 1))
+    columns = np.arange(num_samples)
+    for start in range(0, num_samples, step):
+        stop = min(start + step, num_samples)
+        distances = np.asarray(
+            condensed[_condensed_index(start, num_samples):
+                      _condensed_index(stop, num_samples)], dtype=float)
+        if distances.size and not (distances.min() >= 0):
+            raise ValueError("Distances must be non-negative and not NaN.")
+
+        upper = columns > np.arange(start, stop)[:, np.newaxis]
+        block = np.zeros((stop - start, num_samples))
+        block[upper] = distances
+        block *= block
+        block *= -0.5
+        yield start, stop, block
+
+
+def _condensed_index(row, num_samples):
+    """Index in condensed form of the first distance of `row`."""
+    return row * num_samples - row * (row + 1) // 2
+
+
+def _pcoa_results(eigvals, eigvecs, ids, sum_eigvals=None):
+    """Build the ``OrdinationResults`` of a PCoA from eigenpairs.
+
+    `sum_eigvals` is the sum of all the eigenvalues of the centered matrix,
+    which is needed when `eigvals` is a subset of them. If ``None``, the sum
+    of the (non-negative) `eigvals` is used.
+
+    """
     # eigvals might not be ordered, so we order them (at least one
     # is zero). cogent makes eigenvalues positive by taking the
     # abs value, but that doesn't seem to be an approach accepted
@@ -122,14 +486,64 @@ def pcoa(distance_matrix):
     eigvals[num_positive:] = np.zeros(eigvals[num_positive:].shape)
 
     coordinates = eigvecs * np.sqrt(eigvals)
-    proportion_explained = eigvals / eigvals.sum()
+    if sum_eigvals is None:
+        sum_eigvals = eigvals.sum()
+    proportion_explained = eigvals / sum_eigvals
 
     axis_labels = ['PC%d' % i for i in range(1, eigvals.size + 1)]
     return OrdinationResults(
         short_method_name='PCoA',
         long_method_name='Principal Coordinate Analysis',
         eigvals=pd.Series(eigvals, index=axis_labels),
-        samples=pd.DataFrame(coordinates, index=distance_matrix.ids,
+        samples=pd.DataFrame(coordinates, index=ids,
                              columns=axis_labels),
         proportion_explained=pd.Series(proportion_explained,
                                        index=axis_labels))
+
+
+def _fsvd(matmat, num_rows, number_of_dimensions, seed=None):
+    """Approximate the largest eigenpairs of a symmetric matrix.
+
+    Parameters
+    ----------
+    matmat : callable
+        ``matmat(X)`` returns the product of the symmetric matrix with the 2D
+        array `X`.
+    num_rows : int
+        Number of rows (and columns) of the matrix.
+    number_of_dimensions : int
+        Number of eigenpairs to compute.
+    seed : int or np.random.RandomState, optional
+        Source of the random test matrix.
+
+    Returns
+    -------
+    eigvals : 1D np.ndarray (float)
+        Largest `number_of_dimensions` eigenvalues, in ascending order.
+    eigvecs : 2D np.ndarray (float)
+        Corresponding (orthonormal) eigenvectors, as columns.
+
+    Notes
+    -----
+    An orthonormal basis of the range of the matrix is found by multiplying
+    it with a Gaussian random matrix, followed by power iterations that are
+    re-orthonormalized after each product. Eigenpairs of the matrix
+    projected onto this basis (Rayleigh-Ritz) approximate the eigenpairs of
+    the matrix. Unlike its singular values, this keeps the sign of negative
+    eigenvalues.
+
+    """
+    random_state = _check_random_state(seed)
+    num_vectors = min(number_of_dimensions + _FSVD_OVERSAMPLES, num_rows)
+
+    basis = matmat(random_state.standard_normal((num_rows, num_vectors)))
+    basis = qr(basis, mode='economic')[0]
+    for _ in range(_FSVD_POWER_ITERATIONS):
+        basis = qr(matmat(basis), mode='economic')[0]
+
+    product = matmat(basis)
+    projected = basis.T.dot(product)
+    eigvals, vecs = eigh((projected + projected.T) / 2)
+    eigvals = eigvals[-number_of_dimensions:]
+    eigvecs = basis.dot(vecs[:, -number_of_dimensions:])
+    return eigvals, eigvecs
@@ -10,15 +10,16 @@ from __future__ import absolute_import, division, print_function
 
 import numpy as np
 import pandas as pd
-from scipy.linalg import svd, lstsq
+from scipy.linalg import qr, svd
 
 from skbio._base import OrdinationResults
-from ._utils import corr, svd_rank, scale
+from skbio.stats._monte_carlo import _run_monte_carlo
+from ._utils import corr, svd_rank, scale, _truncated_svd
 from skbio.util._decorator import experimental
 
 
 @experimental(as_of="0.4.0")
-def rda(y, x, scale_Y=False, scaling=1):
+def rda(y, x, scale_Y=False, scaling=1, number_of_dimensions=0):
     r"""Compute redundancy analysis, a type of canonical analysis.
 
     It is related to PCA and multiple regression because the explained
@@ -61,6 +62,12 @@ def rda(y, x, scale_Y=False, scaling=1):
 
         See more details about distance and correlation biplots in
         [1]_, \S 9.1.4.
+    number_of_dimensions : int, optional
+        Number of unconstrained (residual) ordination axes to compute. If 0
+        (the default), all axes are computed with a full SVD of the residuals.
+        Otherwise, only the leading residual axes are computed with a
+        truncated SVD, which never forms the matrix of residuals. Must be less
+        than ``min(n, p)``. All constrained axes are always computed.
 
     Returns
     -------
@@ -70,14 +77,31 @@ def rda(y, x, scale_Y=False, scaling=1):
         transformed coordinates for feature and samples, biplot
         scores, sample constraints, etc.
 
+    Raises
+    ------
+    ValueError
+        If `x` and `y` have different number of rows, `x` has more columns
+        than rows, or `number_of_dimensions` is negative or not less than
+        ``min(n, p)``.
+    NotImplementedError
+        If scaling is not 1 or 2.
+
     Notes
     -----
     The algorithm is based on [1]_, \S 11.1, and is expected to
     give the same results as ``rda(y, x)`` in R's package vegan.
 
+    If `number_of_dimensions` is given, the constrained axes are found from
+    the (small) SVD of the projection of `y` onto an orthonormal basis of `x`.
+    The proportion explained by each axis is its squared eigenvalue divided
+    by the total inertia (the sum of squares of the centered `y`), i.e., the
+    proportion of the variance of `y` along the axis. It therefore doesn't
+    depend on `number_of_dimensions`.
+
     See Also
     --------
     cca
+    rda_test
 
     References
     ----------
@@ -85,26 +109,14 @@ def rda(y, x, scale_Y=False, scaling=1):
        Ecology. Elsevier, Amsterdam.
 
     """
-    Y = y.as_matrix()
-    X = x.as_matrix()
-
-    n, p = y.shape
-    n_, m = x.shape
-    if n != n_:
-        raise ValueError(
-            "Both data matrices must have the same number of rows.")
-    if n < m:
-        # Mmm actually vegan is able to do this case, too
-        raise ValueError(
-            "Explanatory variables cannot have less rows than columns.")
+    Y, X, Q = _rda_fit(y, x, scale_Y)
+    n, p = Y.shape
+    if not 0 <= number_of_dimensions < min(n, p):
+        raise ValueError("number_of_dimensions must be between 0 and %d, "
+                         "not %d." % (min(n, p) - 1, number_of_dimensions))
 
     sample_ids = y.index
     feature_ids = y.columns
-    # Centre response variables (they must be dimensionally
-    # homogeneous)
-    Y = scale(Y, with_std=scale_Y)
-    # Centre explanatory variables
-    X = scale(X, with_std=False)
 
     # Distribution of variables should be examined and transformed
     # if necessary (see paragraph 4 in p. 580 L&L 1998)
@@ -112,9 +124,9 @@ def rda(y, x, scale_Y=False, scaling=1):
     # Compute Y_hat (fitted values by multivariate linear
     # regression, that is, linear least squares). Formula 11.6 in
     # L&L 1998 involves solving the normal equations, but that fails
-    # when cond(X) ~ eps**(-0.5). A more expensive but much more
-    # stable solution (fails when cond(X) ~ eps**-1) is computed
-    # using the QR decomposition of X = QR:
+    # when cond(X) ~ eps**(-0.5). A more stable solution (fails when
+    # cond(X) ~ eps**-1) is computed using the QR decomposition of
+    # X = QR:
     # (11.6) Y_hat = X [X' X]^{-1} X' Y
     #              = QR [R'Q' QR]^{-1} R'Q' Y
     #              = QR [R' R]^{-1} R'Q' Y
@@ -124,17 +136,15 @@ def rda(y, x, scale_Y=False, scaling=1):
     # (11.4) B = [X' X]^{-1} X' Y
     #          = R^{-1} R'^{-1} R' Q' Y
     #          = R^{-1} Q'
-    # Q, R = np.linalg.qr(X)
-    # Y_hat = Q.dot(Q.T).dot(Y)
-    # B = scipy.linalg.solve_triangular(R, Q.T.dot(Y))
-    # This works provided X has full rank. When not, you can still
-    # fix it using R's pseudoinverse or partitioning R. To avoid any
-    # issues, like the numerical instability when trying to
-    # reproduce an example in L&L where X was rank-deficient, we'll
-    # just use `np.linalg.lstsq`, which uses the SVD decomposition
-    # under the hood and so it's also more expensive.
-    B, _, rank_X, _ = lstsq(X, Y)
-    Y_hat = X.dot(B)
+    # This works provided X has full rank. When not (like in an example
+    # in L&L where X was rank-deficient), `_rda_fit` keeps only the
+    # columns of Q that span the columns of X, found with a
+    # rank-revealing (column pivoting) QR decomposition. The same Q is
+    # reused by `rda_test` for every permutation.
+    if number_of_dimensions > 0:
+        return _truncated_rda(Y, X, Q, scaling, number_of_dimensions,
+                              sample_ids, feature_ids)
+    Y_hat = Q.dot(Q.T.dot(Y))
     # Now let's perform PCA on the fitted values from the multiple
     # regression
     u, s, vt = svd(Y_hat, full_matrices=False)
@@ -169,7 +179,216 @@ def rda(y, x, scale_Y=False, scaling=1):
     U_res = vt_res[:rank_res].T
     F_res = Y_res.dot(U_res)  # Ordination in the space of residuals
 
-    eigenvalues = np.r_[s[:rank], s_res[:rank_res]]
+    return _rda_results(s[:rank], U, F, Z, s_res[:rank_res], U_res, F_res,
+                        (Y ** 2).sum(), X, u, scaling, sample_ids,
+                        feature_ids)
+
+
+@experimental(as_of="0.4.0-dev")
+def rda_test(y, x, scale_Y=False, permutations=999, seed=None, n_jobs=1,
+             precision=None):
+    r"""Test the significance of the constrained axes of an RDA.
+
+    The statistic is the pseudo-F ratio of the inertia (variance) of `y`
+    explained by `x` to its residual inertia, each divided by its degrees of
+    freedom. Its significance is assessed by permuting the rows of `y` and
+    refitting the constraints, like ``anova.cca(rda(y, x))`` in R's package
+    vegan.
+
+    Parameters
+    ----------
+    y : pd.DataFrame
+        :math:`n \times p` response matrix. See ``rda``.
+    x : pd.DataFrame
+        :math:`n \times m, n \geq m` matrix of explanatory variables. See
+        ``rda``.
+    scale_Y : bool, optional
+        Controls whether the response matrix columns are scaled to
+        have unit standard deviation. Defaults to `False`.
+    permutations : int, optional
+        Number of permutations to use when assessing statistical
+        significance. Must be greater than or equal to zero. If zero,
+        statistical significance calculations will be skipped and the p-value
+        will be ``np.nan``.
+    seed : int or np.random.RandomState, optional
+        Seed or random state used to draw the permutations. If ``None``
+        (the default), NumPy's global random state is used.
+    n_jobs : int, optional
+        Number of threads used to evaluate permutations. If -1, all CPUs are
+        used. For a given `seed`, results do not depend on `n_jobs`.
+    precision : float, optional
+        If provided, stop drawing permutations once the standard error of the
+        p-value is less than `precision`. Results then report the number of
+        permutations that were actually used.
+
+    Returns
+    -------
+    pandas.Series
+        Results of the statistical test, including ``test statistic``,
+        ``p-value`` and the ``constrained inertia`` (proportion of the total
+        inertia explained by `x`).
+
+    Raises
+    ------
+    ValueError
+        If `x` and `y` have different number of rows, `x` has more columns
+        than rows, or there are no degrees of freedom left for either the
+        constrained or the residual inertia.
+
+    See Also
+    --------
+    rda
+    skbio.stats.distance.permanova
+
+    Notes
+    -----
+    The centred explanatory variables are decomposed once, as
+    :math:`X = QR`. For a permutation :math:`P` of the rows of `y`, the
+    constrained inertia is :math:`\|Q^T P Y\|^2`, computed for a batch of
+    permutations at once by permuting the rows of :math:`Q` instead of those
+    of :math:`Y` (and, if :math:`p > n`, using a :math:`n \times n` factor of
+    :math:`Y Y^T` in place of :math:`Y`). The total inertia doesn't change
+    with the permutations.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> from skbio.stats.ordination import rda_test
+    >>> x = pd.DataFrame([[1, 0], [2, 0], [3, 1], [4, 1], [5, 0], [6, 1]])
+    >>> y = pd.DataFrame([[2, 1], [4, 1], [5, 3], [8, 2], [9, 1], [13, 4]])
+    >>> rda_test(y, x, permutations=99, seed=0)
+    method name                    RDA
+    test statistic name       pseudo-F
+    sample size                      6
+    number of constraints            2
+    constrained inertia       0.950096
+    test statistic             28.5577
+    p-value                       0.02
+    number of permutations          99
+    Name: RDA results, dtype: object
+
+    """
+    Y, X, Q = _rda_fit(y, x, scale_Y)
+    n, p = Y.shape
+    num_constraints = Q.shape[1]
+    df_res = n - num_constraints - 1
+    if num_constraints == 0 or df_res <= 0:
+        raise ValueError(
+            "The constrained inertia can only be tested if the explanatory "
+            "variables have a rank (%d) between 1 and the number of samples "
+            "minus 2 (%d)." % (num_constraints, n - 2))
+
+    if p > n:
+        # A A' = Y Y', so that ||Q' P Y|| = ||Q' P A||
+        u, s_Y, _ = svd(Y, full_matrices=False)
+        A = u * s_Y
+    else:
+        A = Y
+    total = (A ** 2).sum()
+
+    def pseudo_f(constrained):
+        return ((constrained / num_constraints) /
+                ((total - constrained) / df_res))
+
+    def permuted_stats(random_state, num_perms):
+        perms = np.array([random_state.permutation(n)
+                          for _ in range(num_perms)])
+        # one (permutation, constraint) pair per row
+        Q_perm = Q[perms].transpose(0, 2, 1).reshape(-1, n)
+        fitted = Q_perm.dot(A).reshape(num_perms, -1)
+        return pseudo_f((fitted ** 2).sum(axis=1))
+
+    constrained = (Q.T.dot(A) ** 2).sum()
+    stat = pseudo_f(constrained)
+    p_value, perm_stats = _run_monte_carlo(
+        stat, permuted_stats, permutations, seed=seed, n_jobs=n_jobs,
+        precision=precision)
+
+    return pd.Series(
+        data=['RDA', 'pseudo-F', n, num_constraints, constrained / total,
+              stat, p_value, len(perm_stats)],
+        index=['method name', 'test statistic name', 'sample size',
+               'number of constraints', 'constrained inertia',
+               'test statistic', 'p-value', 'number of permutations'],
+        name='RDA results')
+
+
+def _rda_fit(y, x, scale_Y):
+    """Centre (and scale) `y` and `x` and find an orthonormal basis of `x`.
+
+    Returns
+    -------
+    Y, X : 2D np.ndarray
+        Centred response and explanatory variables.
+    Q : 2D np.ndarray
+        Orthonormal basis of the column space of `X`, with one column per
+        linearly independent column of `X`.
+
+    """
+    Y = np.asarray(y.as_matrix(), dtype=np.float64)
+    X = np.asarray(x.as_matrix(), dtype=np.float64)
+
+    n, p = y.shape
+    n_, m = x.shape
+    if n != n_:
+        raise ValueError(
+            "Both data matrices must have the same number of rows.")
+    if n < m:
+        # Mmm actually vegan is able to do this case, too
+        raise ValueError(
+            "Explanatory variables cannot have less rows than columns.")
+
+    # Centre response variables (they must be dimensionally
+    # homogeneous)
+    Y = scale(Y, with_std=scale_Y)
+    # Centre explanatory variables
+    X = scale(X, with_std=False)
+
+    Q, R, _ = qr(X, mode='economic', pivoting=True)
+    diagonal = np.abs(np.diag(R))
+    if diagonal.size == 0 or diagonal[0] == 0:
+        return Y, X, Q[:, :0]
+    rank_X = (diagonal > diagonal[0] * max(X.shape) *
+              np.finfo(float).eps).sum()
+    return Y, X, Q[:, :rank_X]
+
+
+def _truncated_rda(Y, X, Q, scaling, number_of_dimensions, sample_ids,
+                   feature_ids):
+    """Compute RDA from the projection of `Y` and a truncated SVD."""
+    # Y_hat = Q M, so its SVD follows from the SVD of M
+    M = Q.T.dot(Y)
+    u_m, s, vt = svd(M, full_matrices=False)
+    rank = svd_rank(Y.shape, s)
+    s = s[:rank]
+    u = Q.dot(u_m[:, :rank])
+    U = vt[:rank].T
+    F = Y.dot(U)
+    Z = u * s
+
+    # Residuals, Y_res = Y - Q M
+    def res_matmat(V):
+        return Y.dot(V) - Q.dot(M.dot(V))
+
+    def res_rmatmat(V):
+        return Y.T.dot(V) - M.T.dot(Q.T.dot(V))
+
+    _, s_res, vt_res = _truncated_svd(res_matmat, res_rmatmat, Y.shape,
+                                      number_of_dimensions)
+    rank_res = svd_rank(Y.shape, s_res)
+    s_res = s_res[:rank_res]
+    U_res = vt_res[:rank_res].T
+    F_res = res_matmat(U_res)
+
+    return _rda_results(s, U, F, Z, s_res, U_res, F_res, (Y ** 2).sum(), X,
+                        u, scaling, sample_ids, feature_ids)
+
+
+def _rda_results(s, U, F, Z, s_res, U_res, F_res, total_inertia, X, u,
+                 scaling, sample_ids, feature_ids):
+    """Scale the constrained and residual axes and build the results."""
+    eigenvalues = np.r_[s, s_res]
 
     # Compute scores
     if scaling not in {1, 2}:
@@ -179,7 +398,9 @@ def rda(y, x, scale_Y=False, scaling=1):
     # doesn't affect the interpretation of a biplot):
     pc_ids = ['RDA%d' % (i+1) for i in range(len(eigenvalues))]
     eigvals = pd.Series(eigenvalues, index=pc_ids)
-    const = np.sum(eigenvalues**2)**0.25
+    # The sum of all the squared eigenvalues is the sum of squares of
+    # (centred) Y, so it doesn't need all of the axes to be computed
+    const = total_inertia**0.25
     if scaling == 1:
         scaling_factor = const
     elif scaling == 2:
@@ -208,7 +429,9 @@ def rda(y, x, scale_Y=False, scaling=1):
     # scores" from table 11.4 are quite similar to vegan's biplot
     # scores, but they're computed like this:
     # corr(X, F))
-    p_explained = pd.Series(eigenvalues / eigenvalues.sum(), index=pc_ids)
+    # The sum of the squared eigenvalues of all the axes is the total
+    # inertia, so the proportions don't depend on the axes being computed
+    p_explained = pd.Series(eigenvalues ** 2 / total_inertia, index=pc_ids)
     return OrdinationResults('RDA', 'Redundancy Analysis',
                              eigvals=eigvals,
                              proportion_explained=p_explained,
@@ -9,6 +9,8 @@
 from __future__ import absolute_import, division, print_function
 
 import numpy as np
+from scipy.sparse import diags, issparse
+from scipy.sparse.linalg import LinearOperator, svds
 
 from skbio.util._decorator import experimental
 
@@ -197,3 +199,137 @@ def f_matrix(E_matrix):
     col_means = E_matrix.mean(axis=0, keepdims=True)
     matrix_mean = E_matrix.mean()
     return E_matrix - row_means - col_means + matrix_mean
+
+
+@experimental(as_of="0.4.0-dev")
+def center_distance_matrix(distance_matrix, inplace=False):
+    """Compute the double-centered F matrix from a distance matrix.
+
+    Equivalent to ``f_matrix(e_matrix(distance_matrix))``, but without
+    creating intermediate copies of the matrix.
+
+    Parameters
+    ----------
+    distance_matrix : 2D np.ndarray (float)
+        Symmetric matrix of distances.
+    inplace : bool, optional
+        If ``True``, `distance_matrix` is overwritten with the result and no
+        additional N x N matrix is allocated.
+
+    Returns
+    -------
+    2D np.ndarray (float)
+        Centered matrix (`distance_matrix` itself if `inplace` is ``True``).
+
+    Notes
+    -----
+    As `distance_matrix` is symmetric, the row and column means of the E
+    matrix are the same, so only the row means are computed.
+    """
+    if inplace:
+        centered = distance_matrix
+        np.multiply(centered, centered, out=centered)
+    else:
+        centered = np.multiply(distance_matrix, distance_matrix)
+    centered *= -0.5
+
+    row_means = centered.mean(axis=1)
+    matrix_mean = row_means.mean()
+    centered -= row_means[:, np.newaxis]
+    centered -= row_means
+    centered += matrix_mean
+    return centered
+
+
+def _chi_square_operator(X):
+    r"""Represent the Chi-square standardized matrix of a table implicitly.
+
+    Parameters
+    ----------
+    X : 2D np.ndarray or scipy.sparse matrix
+        Non-negative contingency table.
+
+    Returns
+    -------
+    matmat, rmatmat : callable
+        ``matmat(M)`` and ``rmatmat(M)`` return the products of the
+        standardized matrix (Eq. 9.32 in Legendre & Legendre 1998) and of its
+        transpose with a 2D array `M`.
+    row_marginals, column_marginals : 1D np.ndarray
+        Marginal totals of the relative frequencies of `X`.
+    inertia : float
+        Total inertia, i.e., the squared Frobenius norm of the standardized
+        matrix.
+
+    Notes
+    -----
+    The standardized matrix is
+    :math:`D_r^{-1/2} Q D_c^{-1/2} - \sqrt{r} \sqrt{c}^T`, where
+    :math:`Q` are the relative frequencies of `X` and :math:`r` and :math:`c`
+    its row and column marginals. The first term has the same sparsity as
+    `X`, and the second is never formed.
+
+    """
+    grand_total = X.sum()
+    row_marginals = np.asarray(X.sum(axis=1)).ravel() / grand_total
+    column_marginals = np.asarray(X.sum(axis=0)).ravel() / grand_total
+    row_weights = (row_marginals * grand_total) ** -0.5
+    column_weights = (column_marginals * grand_total) ** -0.5
+    if issparse(X):
+        Q_tilde = diags(row_weights).dot(X).dot(diags(column_weights))
+        Q_tilde = Q_tilde.tocsr()
+        inertia = Q_tilde.multiply(Q_tilde).sum() - 1
+    else:
+        Q_tilde = row_weights[:, np.newaxis] * X * column_weights
+        inertia = (Q_tilde ** 2).sum() - 1
+    sqrt_rows = row_marginals ** 0.5
+    sqrt_columns = column_marginals ** 0.5
+
+    def matmat(M):
+        return Q_tilde.dot(M) - np.outer(sqrt_rows, sqrt_columns.dot(M))
+
+    def rmatmat(M):
+        return Q_tilde.T.dot(M) - np.outer(sqrt_columns, sqrt_rows.dot(M))
+
+    return matmat, rmatmat, row_marginals, column_marginals, inertia
+
+
+def _truncated_svd(matmat, rmatmat, shape, k):
+    """Compute the `k` largest singular triplets of an implicit matrix.
+
+    Parameters
+    ----------
+    matmat, rmatmat : callable
+        Return the products of the matrix and of its transpose with a 2D
+        array.
+    shape : tuple of int
+        Shape of the matrix.
+    k : int
+        Number of singular triplets. Must be less than ``min(shape)``.
+
+    Returns
+    -------
+    u : 2D np.ndarray
+        Left singular vectors, ``shape[0]`` by `k`.
+    s : 1D np.ndarray
+        Singular values, in decreasing order.
+    vt : 2D np.ndarray
+        Right singular vectors, `k` by ``shape[1]``. The largest entry (in
+        magnitude) of each of them is positive.
+
+    """
+    operator = LinearOperator(
+        shape, dtype=np.float64,
+        matvec=lambda v: matmat(v.reshape(-1, 1)).ravel(),
+        rmatvec=lambda v: rmatmat(v.reshape(-1, 1)).ravel(),
+        matmat=matmat)
+    # ARPACK's starting vector is fixed so that results are reproducible
+    v0 = np.ones(min(shape)) / np.sqrt(min(shape))
+    u, s, vt = svds(operator, k=k, v0=v0)
+    order = np.argsort(s)[::-1]
+    u, s, vt = u[:, order], s[order], vt[order]
+    # the signs of singular vectors are arbitrary and depend on the ARPACK
+    # build, so the largest entry (in magnitude) of each right singular
+    # vector is made positive
+    signs = np.sign(vt[np.arange(k), np.abs(vt).argmax(axis=1)])
+    return u * signs, s, vt * signs[:, np.newaxis]
@@ -12,6 +12,7 @@ from __future__ import absolute_import, division, print_function
 import numpy as np
 import numpy.testing as npt
 import pandas as pd
+from scipy.sparse import csr_matrix
 from unittest import TestCase, main
 
 from skbio import OrdinationResults
@@ -48,6 +49,56 @@ class TestCCAErrors(TestCase):
         X, Y = pd.DataFrame(np.zeros((3, 3))), pd.DataFrame(np.zeros((3, 3)))
         with npt.assert_raises(ValueError):
             cca(X, Y)
+        with npt.assert_raises(ValueError):
+            cca(csr_matrix(X.values), Y, number_of_dimensions=1)
+
+    def test_number_of_dimensions(self):
+        X, Y = self.X, self.Y
+        for number_of_dimensions in -1, 9:
+            with npt.assert_raises(ValueError):
+                cca(Y, X, number_of_dimensions=number_of_dimensions)
+
+
+class TestCCATruncated(TestCase):
+    def setUp(self):
+        """Data from table 11.3 in Legendre & Legendre 1998."""
+        self.Y = np.loadtxt(get_data_path('example3_Y'))
+        self.sample_ids = ['Sample%d' % i for i in range(self.Y.shape[0])]
+        self.feature_ids = ['Feature%d' % i for i in range(self.Y.shape[1])]
+        self.X = pd.DataFrame(np.loadtxt(get_data_path('example3_X'))[:, :-1],
+                              index=self.sample_ids)
+
+    def leading_axes(self, res, k):
+        pc_ids = res.eigvals.index[:k]
+        return OrdinationResults(
+            res.short_method_name, res.long_method_name,
+            res.eigvals[pc_ids], res.samples[pc_ids],
+            features=res.features[pc_ids], biplot_scores=res.biplot_scores,
+            sample_constraints=res.sample_constraints[pc_ids],
+            proportion_explained=res.proportion_explained[pc_ids])
+
+    def test_dense(self):
+        Y = pd.DataFrame(self.Y, self.sample_ids, self.feature_ids)
+        for scaling in 1, 2:
+            # 3 constrained axes and 2 residual axes
+            exp = self.leading_axes(cca(Y, self.X, scaling), 5)
+            obs = cca(Y, self.X, scaling, number_of_dimensions=2)
+            assert_ordination_results_equal(obs, exp,
+                                            ignore_directionality=True)
+
+    def test_sparse(self):
+        Y = pd.DataFrame(self.Y, self.sample_ids, self.feature_ids)
+        for scaling in 1, 2:
+            exp = self.leading_axes(cca(Y, self.X, scaling), 5)
+            obs = cca(csr_matrix(self.Y), self.X, scaling,
+                      number_of_dimensions=2, feature_ids=self.feature_ids)
+            assert_ordination_results_equal(obs, exp,
+                                            ignore_directionality=True)
+
+    def test_sparse_all_dimensions(self):
+        exp = cca(pd.DataFrame(self.Y, self.sample_ids), self.X)
+        obs = cca(csr_matrix(self.Y), self.X)
+        assert_ordination_results_equal(obs, exp, ignore_directionality=True)
 
 
 class TestCCAResults1(TestCase):
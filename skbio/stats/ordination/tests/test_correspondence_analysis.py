@@ -11,6 +11,7 @@ from __future__ import absolute_import, division, print_function
 import numpy as np
 import numpy.testing as npt
 import pandas as pd
+from scipy.sparse import csr_matrix
 from scipy.spatial.distance import pdist
 from unittest import TestCase, main
 
@@ -180,6 +181,52 @@ class TestCAResults(TestCase):
         npt.assert_almost_equal(chi2_distances, euclidean_distances)
 
 
+class TestCATruncated(TestCase):
+    def setUp(self):
+        rs = np.random.RandomState(0)
+        X = rs.poisson(rs.rand(15, 30), size=(15, 30))
+        X = X[:, X.sum(axis=0) > 0]
+        X[:, 0] += 1
+        self.X = X
+        self.sample_ids = ['S%d' % i for i in range(X.shape[0])]
+        self.feature_ids = ['F%d' % i for i in range(X.shape[1])]
+        self.table = pd.DataFrame(X, self.sample_ids, self.feature_ids)
+
+    def leading_axes(self, res, k):
+        pc_ids = res.eigvals.index[:k]
+        return OrdinationResults(
+            res.short_method_name, res.long_method_name,
+            res.eigvals[pc_ids], res.samples[pc_ids],
+            features=res.features[pc_ids])
+
+    def test_dense(self):
+        for scaling in 1, 2:
+            exp = self.leading_axes(ca(self.table, scaling), 4)
+            obs = ca(self.table, scaling, number_of_dimensions=4)
+            assert_ordination_results_equal(obs, exp,
+                                            ignore_directionality=True)
+
+    def test_sparse(self):
+        X = csr_matrix(self.X)
+        for scaling in 1, 2:
+            exp = self.leading_axes(ca(self.table, scaling), 4)
+            obs = ca(X, scaling, number_of_dimensions=4,
+                     sample_ids=self.sample_ids, feature_ids=self.feature_ids)
+            assert_ordination_results_equal(obs, exp,
+                                            ignore_directionality=True)
+
+    def test_sparse_all_dimensions(self):
+        obs = ca(csr_matrix(self.X))
+        exp = ca(pd.DataFrame(self.X))
+        assert_ordination_results_equal(obs, exp, ignore_directionality=True)
+
+    def test_sparse_default_ids(self):
+        obs = ca(csr_matrix(self.X), number_of_dimensions=2)
+        npt.assert_array_equal(obs.samples.index, np.arange(self.X.shape[0]))
+        npt.assert_array_equal(obs.features.index,
+                               np.arange(self.X.shape[1]))
+
+
 class TestCAErrors(TestCase):
     def setUp(self):
         pass
@@ -188,6 +235,14 @@ class TestCAErrors(TestCase):
         X = np.array([[1, 2], [-0.1, -2]])
         with npt.assert_raises(ValueError):
             ca(pd.DataFrame(X))
+        with npt.assert_raises(ValueError):
+            ca(csr_matrix(X), number_of_dimensions=1)
+
+    def test_number_of_dimensions(self):
+        X = pd.DataFrame(np.array([[1, 2, 3], [4, 5, 6]]))
+        for number_of_dimensions in -1, 2:
+            with npt.assert_raises(ValueError):
+                ca(X, number_of_dimensions=number_of_dimensions)
 
 
 if __name__ == '__main__':
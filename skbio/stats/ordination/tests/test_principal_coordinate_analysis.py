@@ -8,14 +8,20 @@
 
 from __future__ import absolute_import, division, print_function
 
+import os
+import shutil
+import tempfile
+
 import pandas as pd
 import numpy as np
 import numpy.testing as npt
 from unittest import TestCase, main
+from scipy.spatial.distance import pdist, squareform
 
 from skbio import DistanceMatrix, OrdinationResults
 from skbio.stats.distance import DissimilarityMatrixError
-from skbio.stats.ordination import pcoa
+from skbio.stats.ordination import pcoa, pcoa_condensed, pcoa_project
+import skbio.stats.ordination._principal_coordinate_analysis as _pcoa
 from skbio.util import get_data_path, assert_ordination_results_equal
 
 
@@ -127,6 +133,211 @@ class TestPCoA(TestCase):
         with npt.assert_raises(DissimilarityMatrixError):
             pcoa([[1, 2], [3, 4]])
 
+    def test_invalid_method(self):
+        with npt.assert_raises(ValueError):
+            pcoa(self.dm, method='svd')
+
+    def test_invalid_number_of_dimensions(self):
+        with npt.assert_raises(ValueError):
+            pcoa(self.dm, number_of_dimensions=-1)
+        with npt.assert_raises(ValueError):
+            pcoa(self.dm, number_of_dimensions=15)
+
+    def test_number_of_dimensions(self):
+        data = np.loadtxt(get_data_path('PCoA_sample_data_2'))
+        full = pcoa(data)
+        F = -0.5 * data ** 2
+        F = F - F.mean(axis=0) - F.mean(axis=1)[:, np.newaxis] + F.mean()
+
+        for method in 'eigh', 'fsvd':
+            results = pcoa(data, method=method, number_of_dimensions=3,
+                           seed=0)
+            axis_labels = ['PC1', 'PC2', 'PC3']
+            expected_results = OrdinationResults(
+                short_method_name='PCoA',
+                long_method_name='Principal Coordinate Analysis',
+                eigvals=full.eigvals[axis_labels],
+                samples=full.samples[axis_labels],
+                proportion_explained=full.eigvals[axis_labels] / np.trace(F))
+            assert_ordination_results_equal(results, expected_results,
+                                            ignore_directionality=True)
+
+        # requesting all dimensions is the same as the default
+        for method in 'eigh', 'fsvd':
+            results = pcoa(data, method=method, number_of_dimensions=6)
+            assert_ordination_results_equal(results, full,
+                                            ignore_directionality=True)
+
+    def test_fsvd_larger_matrix(self):
+        # Euclidean distances between points in 4 dimensions: only 4
+        # eigenvalues are nonzero, and the randomized solver finds them
+        rs = np.random.RandomState(42)
+        points = rs.standard_normal((300, 4)) * [4, 3, 2, 1]
+        dm = squareform(pdist(points))
+
+        exp = pcoa(dm, number_of_dimensions=5)
+        obs = pcoa(dm, method='fsvd', number_of_dimensions=5, seed=0)
+        assert_ordination_results_equal(obs, exp, ignore_directionality=True)
+        npt.assert_almost_equal(obs.eigvals[-1], 0.0)
+
+    def test_fsvd_seed(self):
+        dm = squareform(pdist(np.random.RandomState(0).rand(50, 5)))
+        results = [pcoa(dm, method='fsvd', number_of_dimensions=2, seed=seed)
+                   for seed in (7, 7, np.random.RandomState(7))]
+        for result in results[1:]:
+            assert_ordination_results_equal(result, results[0])
+
+    def test_inplace(self):
+        data = np.loadtxt(get_data_path('PCoA_sample_data_2'))
+        exp = pcoa(data)
+
+        dm = DistanceMatrix(data.copy())
+        obs = pcoa(dm, inplace=True)
+        assert_ordination_results_equal(obs, exp)
+        # the distances have been overwritten
+        self.assertFalse(np.allclose(dm.data, data))
+
+        obs = pcoa(data.copy(), number_of_dimensions=2, inplace=True)
+        assert_ordination_results_equal(
+            obs, pcoa(data, number_of_dimensions=2))
+
+
+class TestPCoACondensed(TestCase):
+    def setUp(self):
+        rs = np.random.RandomState(42)
+        self.euclidean = DistanceMatrix(
+            squareform(pdist(rs.standard_normal((200, 4)) * [4, 3, 2, 1])),
+            ['S%d' % i for i in range(200)])
+        self.bray_curtis = DistanceMatrix(
+            squareform(pdist(rs.rand(100, 30), 'braycurtis')))
+
+    def test_matches_pcoa(self):
+        # the randomized eigensolver is exact when there are few nonzero
+        # eigenvalues, and approximate otherwise
+        for dm, decimal in (self.euclidean, 7), (self.bray_curtis, 3):
+            exp = pcoa(dm, number_of_dimensions=3)
+            obs = pcoa_condensed(dm.condensed_form(), dm.ids,
+                                 number_of_dimensions=3, seed=0)
+            assert_ordination_results_equal(obs, exp,
+                                            ignore_directionality=True,
+                                            decimal=decimal)
+
+    def test_multiple_blocks(self):
+        dm = self.euclidean
+        exp = pcoa_condensed(dm.condensed_form(), dm.ids, seed=0)
+        block_cells = _pcoa._BLOCK_CELLS
+        try:
+            # blocks of 1 and 3 rows
+            for cells in 1, 600:
+                _pcoa._BLOCK_CELLS = cells
+                obs = pcoa_condensed(dm.condensed_form(), dm.ids, seed=0)
+                assert_ordination_results_equal(obs, exp)
+        finally:
+            _pcoa._BLOCK_CELLS = block_cells
+
+    def test_memory_mapped(self):
+        dm = self.euclidean
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'condensed.npy')
+            np.save(path, dm.condensed_form())
+            condensed = np.load(path, mmap_mode='r')
+            obs = pcoa_condensed(condensed, dm.ids, number_of_dimensions=4,
+                                 seed=0)
+            del condensed
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        exp = pcoa(dm, number_of_dimensions=4)
+        assert_ordination_results_equal(obs, exp, ignore_directionality=True)
+
+    def test_invalid_input(self):
+        condensed = self.euclidean.condensed_form()
+        ids = self.euclidean.ids
+        with npt.assert_raises(ValueError):
+            pcoa_condensed(condensed[1:], ids)
+        with npt.assert_raises(ValueError):
+            pcoa_condensed(condensed, ('a',) * len(ids))
+        with npt.assert_raises(ValueError):
+            pcoa_condensed(condensed, ids, number_of_dimensions=0)
+        with npt.assert_raises(ValueError):
+            pcoa_condensed(condensed, ids, number_of_dimensions=201)
+
+        condensed = condensed.copy()
+        condensed[-1] = -1
+        with npt.assert_raises(ValueError):
+            pcoa_condensed(condensed, ids)
+        condensed[-1] = np.nan
+        with npt.assert_raises(ValueError):
+            pcoa_condensed(condensed, ids)
+
+
+class TestPCoAProject(TestCase):
+    def setUp(self):
+        rs = np.random.RandomState(0)
+        points = rs.standard_normal((30, 3)) * [3, 2, 1]
+        self.ids = ['S%d' % i for i in range(30)]
+        self.dm = DistanceMatrix(squareform(pdist(points[:25])),
+                                 self.ids[:25])
+        # distances from new samples 25-29 to the reference samples
+        self.new = pd.DataFrame(
+            np.sqrt(((points[25:, np.newaxis] - points[:25]) ** 2).sum(-1)),
+            index=self.ids[25:], columns=self.ids[:25])
+
+    def test_reference_samples(self):
+        ordination = pcoa(self.dm)
+        reference = pd.DataFrame(self.dm.data, index=self.dm.ids,
+                                 columns=self.dm.ids)
+        obs = pcoa_project(ordination, self.dm, reference)
+        npt.assert_almost_equal(obs.values, ordination.samples.values)
+        self.assertEqual(list(obs.columns), list(ordination.samples.columns))
+
+        # same for a truncated ordination
+        ordination = pcoa(self.dm, number_of_dimensions=2)
+        obs = pcoa_project(ordination, self.dm, reference)
+        npt.assert_almost_equal(obs.values, ordination.samples.values)
+
+    def test_euclidean_distances_preserved(self):
+        ordination = pcoa(self.dm)
+        obs = pcoa_project(ordination, self.dm, self.new)
+        self.assertEqual(list(obs.index), self.ids[25:])
+
+        # Euclidean distances in 3 dimensions are reproduced exactly, and
+        # the remaining axes have zero eigenvalues and coordinates
+        npt.assert_almost_equal(obs.values[:, 3:], 0)
+        distances = np.sqrt(((obs.values[:, np.newaxis] -
+                              ordination.samples.values) ** 2).sum(-1))
+        npt.assert_almost_equal(distances, self.new.values)
+
+    def test_column_order_and_extra_columns(self):
+        ordination = pcoa(self.dm)
+        exp = pcoa_project(ordination, self.dm, self.new)
+        shuffled = self.new[self.new.columns[::-1]].copy()
+        shuffled['extra'] = 1.0
+        obs = pcoa_project(ordination, self.dm, shuffled)
+        npt.assert_almost_equal(obs.values, exp.values)
+
+    def test_non_euclidean(self):
+        rs = np.random.RandomState(1)
+        dm = DistanceMatrix(squareform(pdist(rs.rand(20, 10), 'braycurtis')))
+        ordination = npt.assert_warns(RuntimeWarning, pcoa, dm)
+        reference = pd.DataFrame(dm.data, index=dm.ids, columns=dm.ids)
+        obs = pcoa_project(ordination, dm, reference)
+        # axes with negative eigenvalues have zero coordinates
+        npt.assert_almost_equal(obs.values, ordination.samples.values)
+
+    def test_invalid_input(self):
+        ordination = pcoa(self.dm)
+        with npt.assert_raises(ValueError):
+            pcoa_project(ordination, self.dm, self.new.iloc[:, 1:])
+        with npt.assert_raises(ValueError):
+            pcoa_project(pcoa(self.dm.filter(self.ids[:24])), self.dm,
+                         self.new)
+        negative = self.new.copy()
+        negative.iloc[0, 0] = -1
+        with npt.assert_raises(ValueError):
+            pcoa_project(ordination, self.dm, negative)
+
 
 if __name__ == "__main__":
     main()
@@ -12,10 +12,11 @@ from __future__ import absolute_import, division, print_function
 import numpy as np
 import numpy.testing as npt
 import pandas as pd
+import pandas.util.testing as pdt
 from unittest import TestCase, main
 
 from skbio import OrdinationResults
-from skbio.stats.ordination import rda
+from skbio.stats.ordination import rda, rda_test
 from skbio.util import get_data_path, assert_ordination_results_equal
 
 
@@ -85,11 +86,11 @@ class TestRDAResults(TestCase):
             np.loadtxt(get_data_path(
                 'example2_biplot_scaling1')))
 
-        # These are wrong. See issue #1002
-        proportion_explained = pd.Series([0.44275783, 0.25614586,
-                                          0.15280354, 0.10497021,
-                                          0.02873375, 0.00987052,
-                                          0.00471828],
+        # Squared eigenvalues relative to the total inertia
+        proportion_explained = pd.Series([0.66014176, 0.22094256,
+                                          0.07862697, 0.03710538,
+                                          0.00278029, 0.00032808,
+                                          0.00007497],
                                          index=self.pc_ids)
         # These are wrong. See issue #1002
         eigvals = pd.Series([25.897954, 14.982578, 8.937841, 6.139956,
@@ -142,11 +143,11 @@ class TestRDAResults(TestCase):
             np.loadtxt(get_data_path(
                 'example2_biplot_scaling2')))
 
-        # These are wrong. See issue #1002
-        proportion_explained = pd.Series([0.44275783, 0.25614586,
-                                          0.15280354, 0.10497021,
-                                          0.02873375, 0.00987052,
-                                          0.00471828],
+        # Squared eigenvalues relative to the total inertia
+        proportion_explained = pd.Series([0.66014176, 0.22094256,
+                                          0.07862697, 0.03710538,
+                                          0.00278029, 0.00032808,
+                                          0.00007497],
                                          index=self.pc_ids)
         # These are wrong. See issue #1002
         eigvals = pd.Series([25.897954, 14.982578, 8.937841, 6.139956,
@@ -167,5 +168,101 @@ class TestRDAResults(TestCase):
                                         decimal=6)
 
 
+class TestRDATruncated(TestCase):
+    def setUp(self):
+        """Data from table 11.3 in Legendre & Legendre 1998."""
+        self.Y = pd.DataFrame(np.loadtxt(get_data_path('example2_Y')))
+        self.X = pd.DataFrame(np.loadtxt(get_data_path('example2_X')))
+
+    def test_leading_axes(self):
+        for scaling in 1, 2:
+            exp = rda(self.Y, self.X, scaling=scaling)
+            obs = rda(self.Y, self.X, scaling=scaling, number_of_dimensions=2)
+            # 3 constrained axes and 2 residual axes
+            pc_ids = exp.eigvals.index[:5]
+            npt.assert_array_equal(obs.eigvals.index, pc_ids)
+            npt.assert_almost_equal(obs.eigvals.values,
+                                    exp.eigvals[pc_ids].values)
+            # axes can be reflected
+            for attr in 'samples', 'features', 'sample_constraints':
+                npt.assert_almost_equal(
+                    np.abs(getattr(obs, attr).values),
+                    np.abs(getattr(exp, attr)[pc_ids].values))
+            # proportions of the total inertia
+            total_inertia = ((self.Y - self.Y.mean()) ** 2).values.sum()
+            npt.assert_almost_equal(obs.proportion_explained.values,
+                                    exp.eigvals[pc_ids].values ** 2 /
+                                    total_inertia)
+
+    def test_number_of_dimensions(self):
+        for number_of_dimensions in -1, 6:
+            with npt.assert_raises(ValueError):
+                rda(self.Y, self.X, number_of_dimensions=number_of_dimensions)
+
+
+class TestRDATest(TestCase):
+    def setUp(self):
+        """Data from table 11.3 in Legendre & Legendre 1998."""
+        self.Y = pd.DataFrame(np.loadtxt(get_data_path('example2_Y')))
+        self.X = pd.DataFrame(np.loadtxt(get_data_path('example2_X')))
+
+    def test_statistic(self):
+        obs = rda_test(self.Y, self.X, permutations=0)
+        # the explanatory variables have rank 3
+        Y = self.Y.values - self.Y.values.mean(axis=0)
+        X = self.X.values - self.X.values.mean(axis=0)
+        Y_hat = X.dot(np.linalg.lstsq(X, Y)[0])
+        constrained = (Y_hat ** 2).sum() / (Y ** 2).sum()
+        self.assertEqual(obs['number of constraints'], 3)
+        self.assertAlmostEqual(obs['constrained inertia'], constrained)
+        self.assertAlmostEqual(obs['test statistic'],
+                               (constrained / 3) / ((1 - constrained) / 6))
+        npt.assert_equal(obs['p-value'], np.nan)
+        self.assertEqual(obs['number of permutations'], 0)
+
+    def test_p_value(self):
+        obs = rda_test(self.Y, self.X, permutations=999, seed=0)
+        self.assertEqual(obs['number of permutations'], 999)
+        self.assertLess(obs['p-value'], 0.05)
+
+        # unrelated responses
+        rs = np.random.RandomState(0)
+        Y = pd.DataFrame(rs.randn(10, 20))
+        obs = rda_test(Y, self.X, permutations=999, seed=0)
+        self.assertGreater(obs['p-value'], 0.05)
+
+    def test_many_responses(self):
+        # the responses are replaced by a square root of Y Y'
+        rs = np.random.RandomState(0)
+        Y = pd.DataFrame(rs.randn(10, 20))
+        obs = rda_test(Y, self.X, permutations=99, seed=0)
+        exp = rda_test(Y.iloc[:, :10], self.X, permutations=99, seed=0)
+        self.assertNotAlmostEqual(obs['test statistic'],
+                                  exp['test statistic'])
+        Y_small = pd.DataFrame(np.linalg.svd(Y.values - Y.values.mean(0),
+                                             full_matrices=False)[0])
+        Y_small *= np.linalg.svd(Y.values - Y.values.mean(0))[1]
+        exp = rda_test(Y_small, self.X, permutations=99, seed=0)
+        self.assertAlmostEqual(obs['test statistic'], exp['test statistic'])
+        self.assertEqual(obs['p-value'], exp['p-value'])
+
+    def test_seed_reproducible_across_n_jobs(self):
+        exp = rda_test(self.Y, self.X, permutations=250, seed=42)
+        for n_jobs in 2, 3:
+            obs = rda_test(self.Y, self.X, permutations=250, seed=42,
+                           n_jobs=n_jobs)
+            pdt.assert_series_equal(obs, exp)
+
+    def test_errors(self):
+        with npt.assert_raises(ValueError):
+            rda_test(self.Y, self.X[:-1])
+        # no residual degrees of freedom
+        with npt.assert_raises(ValueError):
+            rda_test(self.Y.iloc[:3], self.X.iloc[:3])
+        # no constraints
+        with npt.assert_raises(ValueError):
+            rda_test(self.Y, pd.DataFrame(np.ones((10, 1))))
+
+
 if __name__ == '__main__':
     main()
@@ -14,7 +14,9 @@ import numpy.testing as npt
 
 from unittest import TestCase, main
 
-from skbio.stats.ordination import corr, mean_and_std, e_matrix, f_matrix
+from skbio.stats.ordination import (corr, mean_and_std, e_matrix, f_matrix,
+                                    center_distance_matrix)
+from skbio.stats.ordination._utils import _truncated_svd
 
 
 class TestUtils(TestCase):
@@ -64,6 +66,35 @@ class TestUtils(TestCase):
         # Note that `test_make_F_matrix` in cogent is wrong
         npt.assert_almost_equal(F, expected_F)
 
+    def test_center_distance_matrix(self):
+        dm = np.array([[0.0, 2.0, 6.0], [2.0, 0.0, 5.0], [6.0, 5.0, 0.0]])
+        expected = f_matrix(e_matrix(dm))
+
+        obs = center_distance_matrix(dm)
+        npt.assert_almost_equal(obs, expected)
+        self.assertEqual(dm[0, 1], 2.0)
+
+        obs = center_distance_matrix(dm, inplace=True)
+        self.assertIs(obs, dm)
+        npt.assert_almost_equal(dm, expected)
+
+    def test_truncated_svd(self):
+        X = np.random.RandomState(0).randn(8, 6)
+        exp_u, exp_s, exp_vt = np.linalg.svd(X)
+        exp = (exp_u[:, :3] * exp_s[:3]).dot(exp_vt[:3])
+        results = []
+        for sign in 1, -1:
+            u, s, vt = _truncated_svd(lambda A: sign * X.dot(A),
+                                      lambda A: sign * X.T.dot(A),
+                                      X.shape, 3)
+            npt.assert_almost_equal(s, exp_s[:3])
+            npt.assert_almost_equal((u * s).dot(vt), sign * exp)
+            largest = vt[np.arange(3), np.abs(vt).argmax(axis=1)]
+            self.assertTrue((largest > 0).all())
+            results.append(vt)
+        # the signs of the singular vectors don't depend on the input's
+        npt.assert_almost_equal(results[0], results[1])
+
 
 if __name__ == '__main__':
     main()
@@ -121,11 +121,11 @@ estimate for the critical value of 0.01, and a critical value of 0.001.
 >>> counts_100
 array([3, 4, 5, 6, 7, 8, 9])
 >>> pwr_100.mean(0)
-array([ 0.484,  0.844,  0.932,  0.984,  1.   ,  1.   ,  1.   ])
+array([ 0.528,  0.832,  0.948,  0.988,  1.   ,  1.   ,  1.   ])
 >>> pwr_010.mean(0)
-array([ 0.044,  0.224,  0.572,  0.836,  0.928,  0.996,  1.   ])
+array([ 0.036,  0.252,  0.548,  0.816,  0.932,  0.98 ,  0.988])
 >>> pwr_001.mean(0)
-array([ 0.   ,  0.016,  0.108,  0.332,  0.572,  0.848,  0.956])
+array([ 0.   ,  0.012,  0.056,  0.368,  0.648,  0.844,  0.952])
 
 Based on this power estimate, as we increase our confidence that we have not
 committed a type I error and identified a false positive, the number of samples
@@ -142,23 +142,31 @@ we need to be confident that we have not committed a type II error increases.
 # ----------------------------------------------------------------------------
 
 from __future__ import absolute_import, division, print_function
-from future.utils import viewitems
 from future.builtins import range
 
 import collections
 import copy
 
 import numpy as np
+import pandas as pd
 import scipy.stats
 import six
 
 from skbio.util._decorator import experimental, deprecated
+from skbio.util._misc import _parallel_map
+
+# Number of random keys generated at a time when drawing subsample indices
+# for many iterations at once.
+_DRAW_BLOCK_CELLS = 2 ** 20
+
+_SampleIndex = collections.namedtuple(
+    'SampleIndex', ['ids', 'slots', 'members', 'starts', 'sizes'])
 
 
 @experimental(as_of="0.4.0")
 def subsample_power(test, samples, draw_mode='ind', alpha_pwr=0.05, ratio=None,
                     max_counts=50, counts_interval=10, min_counts=None,
-                    num_iter=500, num_runs=10):
+                    num_iter=500, num_runs=10, n_jobs=1):
     r"""Subsamples data to iteratively calculate power
 
     Parameters
@@ -200,6 +208,10 @@ def subsample_power(test, samples, draw_mode='ind', alpha_pwr=0.05, ratio=None,
         on the curve.
     num_runs : positive int, optional
         The number of times to calculate each curve.
+    n_jobs : int, optional
+        Number of threads used to call `test` on the subsamples. If -1, all
+        CPUs are used. This only results in a speedup if `test` spends most of
+        its time in code that releases the GIL.
 
     Returns
     -------
@@ -262,7 +274,7 @@ def subsample_power(test, samples, draw_mode='ind', alpha_pwr=0.05, ratio=None,
     `scipy.stats.chisquare` to look for the difference in frequency between
     groups.
 
-    >>> from scipy.stats import chisquare, nanmean
+    >>> from scipy.stats import chisquare
     >>> test = lambda x: chisquare(np.array([x[i].sum() for i in
     ...     range(len(x))]))[1]
 
@@ -288,10 +300,10 @@ def subsample_power(test, samples, draw_mode='ind', alpha_pwr=0.05, ratio=None,
     ...                                   counts_interval=5)
     >>> counts
     array([ 5, 10, 15, 20, 25, 30, 35, 40, 45])
-    >>> nanmean(pwr_est, 0) # doctest: +NORMALIZE_WHITESPACE
-    array([ 0.056,  0.074,  0.226,  0.46 ,  0.61 ,  0.806,  0.952,  1.   ,
+    >>> np.nanmean(pwr_est, 0) # doctest: +NORMALIZE_WHITESPACE
+    array([ 0.052,  0.078,  0.3  ,  0.466,  0.634,  0.82 ,  0.964,  1.   ,
             1.   ])
-    >>> counts[nanmean(pwr_est, 0) > 0.8].min()
+    >>> counts[np.nanmean(pwr_est, 0) > 0.8].min()
     30
 
     So, we can estimate that we will see a significant difference in the
@@ -307,6 +319,7 @@ def subsample_power(test, samples, draw_mode='ind', alpha_pwr=0.05, ratio=None,
     the presence of *G vaginalis* to see if it is also correlated with UTIs. We
     can model the abundance of the metabolite as a normal distribution.
 
+    >>> np.random.seed(35)
     >>> met_pos = (np.random.randn(pre_rate.sum() + pos_rate.sum()) * 2000 +
     ...     2500)
     >>> met_pos[met_pos < 0] = 0
@@ -323,7 +336,7 @@ def subsample_power(test, samples, draw_mode='ind', alpha_pwr=0.05, ratio=None,
     >>> def metabolite_test(x):
     ...     return kruskal(x[0], x[1])[1]
     >>> print(round(metabolite_test([met_pos, met_neg]), 3))
-    0.005
+    0.002
 
     When we go to perform the statistical test on all the data, you might
     notice that there are twice as many samples from women with *G. vaginalis*
@@ -339,9 +352,9 @@ def subsample_power(test, samples, draw_mode='ind', alpha_pwr=0.05, ratio=None,
     ...                                     ratio=[2, 1])
     >>> counts2
     array([  5.,  10.,  15.,  20.,  25.,  30.])
-    >>> nanmean(pwr_est2, 0)
-    array([ 0.14 ,  0.272,  0.426,  0.646,  0.824,  0.996])
-    >>> counts2[nanmean(pwr_est2, 0) > 0.8].min()
+    >>> np.nanmean(pwr_est2, 0)
+    array([ 0.18 ,  0.38 ,  0.556,  0.74 ,  0.928,  1.   ])
+    >>> counts2[np.nanmean(pwr_est2, 0) > 0.8].min()
     25.0
 
     When we consider the number of samples per group needed in the power
@@ -366,17 +379,19 @@ def subsample_power(test, samples, draw_mode='ind', alpha_pwr=0.05, ratio=None,
     # Prealocates the power array
     power = np.zeros((num_runs, len(sample_counts), num_p))
 
-    # Calculates the power instances
+    # Calculates the power instances. The subsamples of all runs are drawn at
+    # once and split into runs of `num_iter` p values.
     for id2, c in enumerate(sample_counts):
         count = np.round(c * ratio, 0).astype(int)
-        for id1 in range(num_runs):
-            ps = _compare_distributions(test=test,
-                                        samples=samples,
-                                        num_p=num_p,
-                                        counts=count,
-                                        num_iter=num_iter,
-                                        mode=draw_mode)
-            power[id1, id2, :] = _calculate_power(ps, alpha_pwr)
+        ps = _compare_distributions(test=test,
+                                    samples=samples,
+                                    num_p=num_p,
+                                    counts=count,
+                                    num_iter=num_runs * num_iter,
+                                    mode=draw_mode,
+                                    n_jobs=n_jobs)
+        ps = ps.reshape(num_p, num_runs, num_iter)
+        power[:, id2, :] = (ps < alpha_pwr).mean(axis=2).T
 
     power = power.squeeze()
 
@@ -387,7 +402,7 @@ def subsample_power(test, samples, draw_mode='ind', alpha_pwr=0.05, ratio=None,
 def subsample_paired_power(test, meta, cat, control_cats, order=None,
                            strict_match=True, alpha_pwr=0.05,
                            max_counts=50, counts_interval=10, min_counts=None,
-                           num_iter=500, num_runs=10):
+                           num_iter=500, num_runs=10, n_jobs=1):
     r"""Estimates power iteratively using samples with matching metadata
 
     Parameters
@@ -430,6 +445,10 @@ def subsample_paired_power(test, meta, cat, control_cats, order=None,
         The number of p-values to generate for each point on the curve.
     num_runs : positive int, optional
         The number of times to calculate each curve.
+    n_jobs : int, optional
+        Number of threads used to call `test` on the subsamples. If -1, all
+        CPUs are used. This only results in a speedup if `test` spends most of
+        its time in code that releases the GIL.
 
     Returns
     -------
@@ -521,9 +540,9 @@ def subsample_paired_power(test, meta, cat, control_cats, order=None,
     >>> cnt
     array([  5.,  10.,  15.,  20.])
     >>> pwr.mean(0)
-    array([ 0.24 ,  0.528,  0.68 ,  0.88 ])
+    array([ 0.192,  0.448,  0.6  ,  0.88 ])
     >>> pwr.std(0).round(3)
-    array([ 0.088,  0.127,  0.168,  0.08 ])
+    array([ 0.039,  0.078,  0.072,  0.057])
 
     Estimating off the power curve, it looks like 20 cells per group may
     provide adequate power for this experiment, although the large variance
@@ -538,11 +557,11 @@ def subsample_paired_power(test, meta, cat, control_cats, order=None,
     order = np.array(order)
 
     # Checks for the number of sampling pairs available
-    meta_pairs, index = _identify_sample_groups(meta, cat, control_cats, order,
-                                                strict_match)
+    sample_index = _index_sample_groups(meta, cat, control_cats, order,
+                                        strict_match)
     min_obs = min([_get_min_size(meta, cat, control_cats, order, strict_match),
-                  np.floor(len(index)*0.9)])
-    sub_ids = _draw_paired_samples(meta_pairs, index, min_obs)
+                  np.floor(len(sample_index.slots)*0.9)])
+    sub_ids = _draw_indexed_samples(sample_index, min_obs)
 
     ratio, num_p, sample_counts = \
         _check_subsample_power_inputs(test=test,
@@ -555,14 +574,14 @@ def subsample_paired_power(test, meta, cat, control_cats, order=None,
     # Prealocates the power array
     power = np.zeros((num_runs, len(sample_counts), num_p))
 
-    # Calculates power instances
+    # Calculates power instances. The subsamples of all runs are drawn
+    # before `test` is called on them.
     for id2, c in enumerate(sample_counts):
-        for id1 in range(num_runs):
-            ps = np.zeros((num_p, num_iter))
-            for id3 in range(num_iter):
-                subs = _draw_paired_samples(meta_pairs, index, c)
-                ps[:, id3] = test(subs)
-            power[id1, id2, :] = _calculate_power(ps, alpha_pwr)
+        subs = [_draw_indexed_samples(sample_index, c)
+                for _ in range(num_runs * num_iter)]
+        ps = np.array(_parallel_map(test, subs, n_jobs),
+                      dtype=float).reshape(num_runs, num_iter, num_p)
+        power[:, id2, :] = (ps < alpha_pwr).mean(axis=1)
 
     power = power.squeeze()
 
@@ -701,20 +720,18 @@ def bootstrap_power_curve(test, samples, sample_counts, ratio=None,
 
     """
 
-    # Corrects the alpha value into a matrix
-    alpha = np.ones((num_runs)) * alpha
-
     # Boot straps the power curve
-    power = _calculate_power_curve(test=test,
-                                   samples=samples,
-                                   sample_counts=sample_counts,
-                                   ratio=ratio,
-                                   num_iter=num_iter,
-                                   alpha=alpha,
-                                   mode=mode)
+    power = np.array([_calculate_power_curve(test=test,
+                                             samples=samples,
+                                             sample_counts=sample_counts,
+                                             ratio=ratio,
+                                             num_iter=num_iter,
+                                             alpha=alpha,
+                                             mode=mode)
+                      for _ in range(num_runs)])
     # Calculates two summary statistics
     power_mean = power.mean(0)
-    power_bound = confidence_bound(power, alpha=alpha[0], axis=0)
+    power_bound = confidence_bound(power, alpha=alpha, axis=0)
 
     # Calculates summary statistics
     return power_mean, power_bound
@@ -802,16 +819,14 @@ def paired_subsamples(meta, cat, control_cats, order=None, strict_match=True):
     min_obs = _get_min_size(meta, cat, control_cats, order, strict_match)
 
     # Identifies all possible subsamples
-    meta_pairs, index = _identify_sample_groups(meta=meta,
-                                                cat=cat,
-                                                control_cats=control_cats,
-                                                order=order,
-                                                strict_match=strict_match)
+    sample_index = _index_sample_groups(meta=meta,
+                                        cat=cat,
+                                        control_cats=control_cats,
+                                        order=order,
+                                        strict_match=strict_match)
 
     # Draws paired ids
-    ids = _draw_paired_samples(meta_pairs=meta_pairs,
-                               index=index,
-                               num_samps=min_obs)
+    ids = _draw_indexed_samples(sample_index, min_obs)
 
     return ids
 
@@ -869,7 +884,7 @@ def _calculate_power(p_values, alpha=0.05):
 
 
 def _compare_distributions(test, samples, num_p, counts=5, mode="ind",
-                           num_iter=100):
+                           num_iter=100, n_jobs=1):
     r"""Compares two distribution arrays iteratively
 
     Parameters
@@ -899,6 +914,8 @@ def _compare_distributions(test, samples, num_p, counts=5, mode="ind",
     num_iter : positive int, optional
         Default 1000. The number of p-values to generate for each point on the
         curve.
+    n_jobs : int, optional
+        Number of threads used to call `test` on the subsamples.
 
     Returns
     -------
@@ -918,26 +935,26 @@ def _compare_distributions(test, samples, num_p, counts=5, mode="ind",
 
     """
 
-    # Prealocates the pvalue matrix
-    p_values = np.zeros((num_p, num_iter))
-
-    # Determines the number of samples per group
+    samples = [np.asarray(sample) for sample in samples]
     num_groups = len(samples)
-    samp_lens = [len(sample) for sample in samples]
 
     if isinstance(counts, int):
         counts = np.array([counts] * num_groups)
 
-    for idx in range(num_iter):
-        if mode == "matched":
-            pos = np.random.choice(np.arange(0, samp_lens[0]), counts[0],
-                                   replace=False)
-            subs = [sample[pos] for sample in samples]
-        else:
-            subs = [np.random.choice(np.array(pop), counts[i], replace=False)
-                    for i, pop in enumerate(samples)]
+    # Draws the positions of the subsamples of all iterations up front
+    if mode == "matched":
+        pos = _draw_subsample_indices(len(samples[0]), counts[0], num_iter)
+        positions = [pos] * num_groups
+    else:
+        positions = [_draw_subsample_indices(len(sample), counts[i], num_iter)
+                     for i, sample in enumerate(samples)]
+
+    def run_test(idx):
+        return test([sample[pos[idx]]
+                     for sample, pos in zip(samples, positions)])
 
-        p_values[:, idx] = test(subs)
+    p_values = np.array(_parallel_map(run_test, range(num_iter), n_jobs),
+                        dtype=float).reshape(num_iter, num_p).T
 
     if num_p == 1:
         p_values = p_values.squeeze()
@@ -945,6 +962,53 @@ def _compare_distributions(test, samples, num_p, counts=5, mode="ind",
     return p_values
 
 
+def _draw_subsample_indices(num_obs, count, num_draws):
+    r"""Draws many random subsets of positions, without replacement
+
+    Parameters
+    ----------
+    num_obs : int
+        The number of observations to draw from.
+    count : int
+        The number of positions in each subset.
+    num_draws : int
+        The number of subsets to draw.
+
+    Returns
+    -------
+    indices : 2-D array
+        A `num_draws` by `count` array, where each row holds the positions of
+        one subset. Positions within a row are not in random order.
+
+    Raises
+    ------
+    ValueError
+        If `count` is greater than `num_obs`.
+
+    Notes
+    -----
+    Each subset holds the positions of the `count` smallest of `num_obs`
+    uniform random keys, which are found for many subsets at once with
+    ``np.argpartition``. Keys are generated for blocks of subsets to bound
+    memory use.
+
+    """
+    if count > num_obs:
+        raise ValueError("Cannot draw %d observations without replacement "
+                         "from %d observations." % (count, num_obs))
+
+    indices = np.empty((num_draws, count), dtype=int)
+    if count == 0:
+        return indices
+    step = max(1, _DRAW_BLOCK_CELLS // num_obs)
+    for start in range(0, num_draws, step):
+        keys = np.random.random_sample((min(step, num_draws - start),
+                                        num_obs))
+        indices[start:start + step] = \
+            np.argpartition(keys, count - 1, axis=1)[:, :count]
+    return indices
+
+
 def _check_subsample_power_inputs(test, samples, draw_mode='ind', ratio=None,
                                   max_counts=50, counts_interval=10,
                                   min_counts=None):
@@ -1062,15 +1126,20 @@ def _check_subsample_power_inputs(test, samples, draw_mode='ind', ratio=None,
     return ratio, num_p, sample_counts
 
 
-def _identify_sample_groups(meta, cat, control_cats, order, strict_match):
-    """Aggregates samples matches for `control_cats` that vary by `cat`
+def _index_sample_groups(meta, cat, control_cats, order, strict_match):
+    """Builds an integer index of the samples matched for `control_cats`
+
+    Samples are stratified by their values of `control_cats`, and only the
+    strata with samples from every group in `order` are kept. The index is
+    built once so that paired subsamples can be drawn from it with array
+    operations alone (see `_draw_indexed_samples`).
 
     Parameters
     ----------
     meta : pandas.DataFrame
         The metadata associated with the samples.
-    cat : str, list
-        The metadata category (or a list of categories) for comparison.
+    cat : str
+        The metadata category for comparison.
     control_cats : list
         The metadata categories to be used as controls. For example, if you
         wanted to vary age (`cat` = "AGE"), you might want to control for
@@ -1080,8 +1149,6 @@ def _identify_sample_groups(meta, cat, control_cats, order, strict_match):
         to limit the groups selected. For example, if there's a category with
         groups 'A', 'B' and 'C', and you only want to look at A vs B, `order`
         would be set to ['A', 'B'].
-    ctrl_pos : int
-        The location of the smallest group in `order`.
     strict_match: bool, optional
         This determines how data is grouped using `control_cats`. If a sample
         within `meta` has an undefined value (`NaN`) for any of the columns in
@@ -1092,102 +1159,141 @@ def _identify_sample_groups(meta, cat, control_cats, order, strict_match):
 
     Returns
     -------
-    meta_pairs : dict
-        Describes the categories matched for metadata. The
-        `control_cat`-grouped samples are numbered, corresponding to the
-        second list in `index`. The group is keyed to the list of sample arrays
-        with the same length of `order`.
-    index : list
-        A list of numpy arrays describing the positions of samples to be drawn.
-        The first array is an index array. The second gives an integer
-        corresponding to the `control_cat`-group, and the third lists the
-        position of the reference group sample in the list of samples.
+    _SampleIndex
+        A named tuple with the fields:
+
+        - ``ids``: the ids of `meta`.
+        - ``slots``: the stratum of each position that can be drawn. Each
+          stratum has as many positions as its smallest group.
+        - ``members``: for each group in `order`, the positions in ``ids`` of
+          the samples of the group that belong to a stratum, sorted by
+          stratum.
+        - ``starts``, ``sizes``: groups by strata arrays of the offset and
+          number of the samples of each stratum in ``members``.
 
     """
+    ids = np.asarray(meta.index)
+
+    # Numbers the combinations of control category values (including
+    # missing values) and finds the groups of `cat` of each sample
+    codes = []
+    uniques = []
+    for control_cat in control_cats:
+        col_codes, col_uniques = pd.factorize(meta[control_cat])
+        codes.append(col_codes)
+        uniques.append(col_uniques)
+    # codes are shifted so that missing values (-1) are numbered too
+    shape = [len(col_uniques) + 1 for col_uniques in uniques]
+    flat_keys, row_keys = np.unique(
+        np.ravel_multi_index([col_codes + 1 for col_codes in codes], shape),
+        return_inverse=True)
+    keys = np.column_stack(np.unravel_index(flat_keys, shape)) - 1
+    row_groups = pd.Index(order).get_indexer(meta[cat])
+
+    # Strata are numbered by sorted control category values, so that results
+    # don't depend on the order of the samples in `meta`
+    key_values = [tuple(np.nan if code < 0 else col_uniques[code]
+                        for code, col_uniques in zip(key, uniques))
+                  for key in keys]
+    if len(control_cats) == 1:
+        key_values = [key[0] for key in key_values]
+    key_order = sorted(range(len(keys)), key=lambda k: str(key_values[k]))
+
+    # Counts the samples of each group in each stratum
+    grouped = row_groups >= 0
+    counts = np.zeros((len(order), len(keys)), dtype=int)
+    np.add.at(counts, (row_groups[grouped], row_keys[grouped]), 1)
+    keep = counts.min(axis=0) > 0
+    if strict_match:
+        keep &= np.array([_check_nans(key, switch=True)
+                          for key in key_values])
+    key_order = [k for k in key_order if keep[k]]
 
-    # Sets up variables to be filled
-    meta_pairs = {}
-    index = []
-    i1 = 0
-
-    # Groups the data by the control groups
-    ctrl_groups = meta.groupby(control_cats).groups
-    # Identifies the samples that satisfy the control pairs. Keys are iterated
-    # in sorted order so that results don't change with different dictionary
-    # ordering (especially apparent in Python 3).
-    for g in sorted(ctrl_groups, key=lambda k: str(k)):
-        ids = ctrl_groups[g]
-        # If strict_match, Skips over data that has nans
-        if not _check_nans(g, switch=True) and strict_match:
-            continue
-        # Draws the samples that are matched for control cats
-        m_ids = meta.loc[ids].groupby(cat).groups
-        # Checks if samples from the cat groups are represented in those
-        # Samples
-        ids_vec = id_vecs = [m_ids[o] for o in order if o in
-                             m_ids]
-        # If all groups are represented, the index and results are retained
-        if len(ids_vec) == len(order):
-            min_vec = np.array([len(v) for v in id_vecs])
-            loc_vec = np.arange(0, min_vec.min())
-            meta_pairs[i1] = id_vecs
-            index.append(np.zeros(loc_vec.shape) + i1)
-            i1 = i1 + 1
-        # If the groups are not represented, an empty array gets passed
-        else:
-            index.append(np.array([]))
+    strata = np.full(len(keys), -1, dtype=int)
+    strata[key_order] = np.arange(len(key_order))
+    row_strata = strata[row_keys]
 
-    # Converts index to a 1d array
-    index = np.hstack(index)
+    sizes = counts[:, key_order]
+    starts = np.cumsum(sizes, axis=1) - sizes
+    members = []
+    for group in range(len(order)):
+        positions = np.flatnonzero((row_groups == group) & (row_strata >= 0))
+        members.append(positions[np.argsort(row_strata[positions],
+                                            kind='mergesort')])
+    slots = np.repeat(np.arange(len(key_order)), sizes.min(axis=0))
 
-    # If index is empty, sets up meta_paris with a no key.
-    if not meta_pairs:
-        meta_pairs['no'] = order
+    return _SampleIndex(ids, slots, members, starts, sizes)
 
-    return meta_pairs, index
 
+def _choose_without_replacement(num_obs, count):
+    """Draws `count` distinct integers from ``range(num_obs)`` at random
 
-def _draw_paired_samples(meta_pairs, index, num_samps):
-    """Draws a random set of ids from a matched list
+    Integers are drawn with replacement and duplicates are discarded, so the
+    cost depends on `count` rather than on `num_obs` unless `count` is more
+    than half of `num_obs`.
+
+    """
+    if count > num_obs:
+        raise ValueError("Cannot draw %d observations without replacement "
+                         "from %d observations." % (count, num_obs))
+    if 2 * count > num_obs:
+        return np.random.permutation(num_obs)[:count]
+
+    drawn = np.random.randint(num_obs, size=count)
+    while True:
+        # keeps the distinct integers in the order they were first drawn
+        values, first = np.unique(drawn, return_index=True)
+        if len(values) >= count:
+            return drawn[np.sort(first)[:count]]
+        drawn = np.concatenate([drawn, np.random.randint(
+            num_obs, size=count - len(values))])
+
+
+def _draw_indexed_samples(sample_index, num_samps):
+    """Draws a random set of ids from a matched sample index
 
     Parameters
     ----------
-    meta_pairs : dict
-        Describes the categories matched for metadata. The
-        `control_cat`-grouped samples are numbered, corresponding to the
-        second list in `index`. The group is keyed to the list of sample arrays
-        with the same length of `order`.
-    index : list
-        A list of numpy arrays describing the positions of samples to be drawn.
-        The first array is an index array. The second gives an integer
-        corresponding to the `control_cat`-group, and the third lists the
-        position of the reference group sample in the list of samples.
+    sample_index : _SampleIndex
+        The index of the matched samples, from `_index_sample_groups`.
+    num_samps : int
+        The number of samples to draw from each group.
 
     Returns
     -------
     ids : list
-        A set of randomly selected ids groups from each group.
+        A set of randomly selected ids groups from each group. The ids at the
+        same position in every group are from the same stratum.
+
     """
+    ids, slots, members, starts, sizes = sample_index
 
     # Handles an empty paired vector
-    if 'no' in meta_pairs:
-        return [np.array([]) for o in meta_pairs['no']]
+    if len(slots) == 0:
+        return [np.array([]) for _ in members]
 
-    # Identifies the absolute positions of the control group being drawn
-    set_pos = np.random.choice(index, int(num_samps),
-                               replace=False).astype(int)
+    # Draws the number of samples from each stratum
+    drawn = _choose_without_replacement(len(slots), int(num_samps))
+    strata, counts = np.unique(slots[drawn], return_counts=True)
 
     subs = []
-
-    # Draws the other groups
-    for set_, num_ in viewitems(collections.Counter(set_pos)):
-        r2 = [np.random.choice(col, num_, replace=False) for col in
-              meta_pairs[set_]]
-        subs.append(r2)
-
-    ids = [np.hstack(ids) for ids in zip(*subs)]
-
-    return ids
+    for group, group_members in enumerate(members):
+        group_sizes = sizes[group, strata]
+        ends = np.cumsum(group_sizes)
+        offsets = np.repeat(starts[group, strata] - ends + group_sizes,
+                            group_sizes)
+        # positions in `group_members` of the samples of the drawn strata,
+        # shuffled within each stratum by sorting on a random key
+        positions = offsets + np.arange(ends[-1])
+        stratum = np.repeat(np.arange(len(strata)), group_sizes)
+        shuffled = positions[np.lexsort((np.random.random_sample(ends[-1]),
+                                         stratum))]
+        rank = np.arange(ends[-1]) - np.repeat(ends - group_sizes,
+                                               group_sizes)
+        keep = shuffled[rank < np.repeat(counts, group_sizes)]
+        subs.append(ids[group_members[keep]])
+
+    return subs
 
 
 def _calculate_power_curve(test, samples, sample_counts, ratio=None,
@@ -1219,11 +1325,15 @@ def _calculate_power_curve(test, samples, sample_counts, ratio=None,
     num_iter : int
         The default is 1000. The number of p-values to generate for each point
         on the curve.
+    alpha : float or 1-D array, optional
+        The critical value (or values) for calculating power. All critical
+        values are compared to the same simulated p-values.
 
     Returns
     -------
     p_values : array
-        The p-values associated with the input sample counts.
+        The power associated with the input sample counts. If `alpha` is an
+        array, the power for each critical value is a row.
     Raises
     ------
     ValueError
@@ -1240,6 +1350,7 @@ def _calculate_power_curve(test, samples, sample_counts, ratio=None,
         alpha = np.array([alpha])
     else:
         vec = False
+        alpha = np.asarray(alpha)
         num_crit = alpha.shape[0]
         pwr = np.zeros((num_crit, num_samps))
     # Checks the ratio argument
@@ -1249,19 +1360,20 @@ def _calculate_power_curve(test, samples, sample_counts, ratio=None,
     if not ratio.shape == (num_groups,):
         raise ValueError('There must be a ratio for each group.')
 
-    # Loops through the sample sizes
+    # Loops through the sample sizes. The p values are simulated once and
+    # compared to every critical value.
     for id2, s in enumerate(sample_counts):
         count = np.round(s * ratio, 0).astype(int)
-        for id1, a in enumerate(alpha):
-            ps = _compare_distributions(test=test,
-                                        samples=samples,
-                                        counts=count,
-                                        num_p=1,
-                                        num_iter=num_iter,
-                                        mode=mode)
-            if vec:
-                pwr[id2] = _calculate_power(ps, a)
-            else:
-                pwr[id1, id2] = _calculate_power(ps, a)
+        ps = _compare_distributions(test=test,
+                                    samples=samples,
+                                    counts=count,
+                                    num_p=1,
+                                    num_iter=num_iter,
+                                    mode=mode)
+        power = (np.reshape(ps, (-1, 1)) < alpha).mean(axis=0)
+        if vec:
+            pwr[id2] = power[0]
+        else:
+            pwr[:, id2] = power
 
     return pwr
@@ -13,6 +13,7 @@ Functions
    :toctree: generated/
 
    procrustes
+   protest
 
 """
 
@@ -27,8 +28,10 @@ Functions
 from __future__ import absolute_import, division, print_function
 
 import numpy as np
+import pandas as pd
 
-from skbio.util._decorator import deprecated
+from skbio.stats._monte_carlo import _check_random_state, _run_monte_carlo
+from skbio.util._decorator import deprecated, experimental
 
 
 @deprecated(as_of="0.4.0", until="0.4.1",
@@ -133,6 +136,154 @@ def procrustes(data1, data2):
     return mtx1, mtx2, disparity
 
 
+@experimental(as_of="0.4.0-dev")
+def protest(reference, ordinations, permutations=999, seed=None, n_jobs=1,
+            precision=None):
+    r"""Test the significance of the Procrustes fit of ordinations (PROTEST).
+
+    Each ordination is centered, scaled such that ``trace(AA') = 1`` and
+    optimally rotated, reflected and dilated to fit `reference`, like with
+    ``procrustes``. The test statistic is the Procrustes correlation
+    :math:`r = \sqrt{1 - M^2}`, where :math:`M^2` is the disparity of the
+    fit. Its significance is assessed by permuting the rows of the
+    ordination, like ``protest`` in R's package vegan [1]_.
+
+    Parameters
+    ----------
+    reference : array_like
+        n rows represent points in k (columns) space.
+    ordinations : array_like
+        Either one n by k' matrix of points or a sequence (or 3-D array) of
+        them, e.g., jackknifed replicates of an ordination. Rows must be in
+        the same order as in `reference`. The number of columns doesn't need
+        to match that of `reference`.
+    permutations : int, optional
+        Number of permutations to use when assessing statistical
+        significance. Must be greater than or equal to zero. If zero,
+        statistical significance calculations will be skipped and the p-value
+        will be ``np.nan``.
+    seed : int or np.random.RandomState, optional
+        Seed or random state used to draw the permutations. If ``None``
+        (the default), NumPy's global random state is used.
+    n_jobs : int, optional
+        Number of threads used to evaluate permutations. If -1, all CPUs are
+        used. For a given `seed`, results do not depend on `n_jobs`.
+    precision : float, optional
+        If provided, stop drawing permutations once the standard error of the
+        p-value is less than `precision`. Results then report the number of
+        permutations that were actually used.
+
+    Returns
+    -------
+    pandas.Series or pandas.DataFrame
+        Results of the statistical test, including ``test statistic``,
+        ``p-value`` and ``disparity``. If `ordinations` is a sequence of
+        matrices, a ``DataFrame`` with one row of results per ordination.
+
+    Raises
+    ------
+    ValueError
+        If an ordination doesn't have the same number of rows as `reference`,
+        or if a matrix has no rows, no columns or less than two unique points.
+
+    See Also
+    --------
+    procrustes
+
+    Notes
+    -----
+    `reference` and every ordination are centered and normalized once. For a
+    permutation :math:`P`, the correlation is the sum of the singular values
+    of :math:`A^T P B`, where :math:`A` and :math:`B` are the normalized
+    `reference` and ordination. The products and singular values of a batch
+    of permutations are computed at once, as stacks of small matrices.
+
+    If `ordinations` is a sequence and `seed` is given, the permutations of
+    each ordination are drawn from their own random state, seeded from
+    `seed`.
+
+    References
+    ----------
+    .. [1] Peres-Neto, P. R. and Jackson, D. A. (2001). "How well do
+       multivariate data sets match? The advantages of a Procrustean
+       superimposition approach over the Mantel test". Oecologia 129:
+       169-178.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from skbio.stats.spatial import protest
+    >>> a = np.array([[1, 3], [1, 2], [1, 1], [2, 1], [3, 3], [2, 4]], 'd')
+    >>> b = np.array([[4, -2], [4, -4], [4, -6], [2, -6], [1, -1], [2, 1]],
+    ...              'd')
+    >>> protest(a, b, seed=0)
+    method name                              PROTEST
+    test statistic name       Procrustes correlation
+    sample size                                    6
+    test statistic                          0.983872
+    p-value                                    0.002
+    disparity                              0.0319966
+    number of permutations                       999
+    Name: PROTEST results, dtype: object
+
+    """
+    reference = _standardize(reference)
+    num_rows = reference.shape[0]
+
+    if isinstance(ordinations, (list, tuple)):
+        # a list of rows or a list of (possibly differently shaped) matrices
+        single = len(ordinations) > 0 and np.ndim(ordinations[0]) == 1
+    else:
+        single = np.ndim(ordinations) == 2
+    if single:
+        ordinations = [ordinations]
+    if seed is None:
+        seeds = [None] * len(ordinations)
+    else:
+        seeds = _check_random_state(seed).randint(2 ** 31 - 1,
+                                                  size=len(ordinations))
+
+    results = []
+    for ordination, ordination_seed in zip(ordinations, seeds):
+        ordination = _standardize(ordination)
+        if ordination.shape[0] != num_rows:
+            raise ValueError(
+                "Ordinations must have the same number of rows as the "
+                "reference (%d), not %d." % (num_rows, ordination.shape[0]))
+
+        def permuted_stats(random_state, num_perms, ordination=ordination):
+            perms = np.array([random_state.permutation(num_rows)
+                              for _ in range(num_perms)])
+            cross = np.einsum('kni,nj->kij', reference[perms], ordination)
+            return np.linalg.svd(cross, compute_uv=False).sum(axis=1)
+
+        stat = np.linalg.svd(reference.T.dot(ordination),
+                             compute_uv=False).sum()
+        p_value, perm_stats = _run_monte_carlo(
+            stat, permuted_stats, permutations, seed=ordination_seed,
+            n_jobs=n_jobs, precision=precision)
+        # the correlation can exceed 1 by rounding errors
+        results.append(['PROTEST', 'Procrustes correlation', num_rows, stat,
+                        p_value, max(1 - stat ** 2, 0.0), len(perm_stats)])
+
+    columns = ['method name', 'test statistic name', 'sample size',
+               'test statistic', 'p-value', 'disparity',
+               'number of permutations']
+    if single:
+        return pd.Series(results[0], index=columns, name='PROTEST results')
+    return pd.DataFrame(results, columns=columns)
+
+
+def _standardize(mtx):
+    """Center and normalize a matrix of points, checking that it's valid."""
+    mtx = _center(mtx)
+    if mtx.ndim != 2 or mtx.size == 0:
+        raise ValueError("input matrices must be >0 rows, >0 cols")
+    if not np.any(mtx):
+        raise ValueError("input matrices must contain >1 unique points")
+    return _normalize(mtx)
+
+
 def _center(mtx):
     """Translate all data (rows of the matrix) to center on the origin
 
@@ -11,10 +11,13 @@ from __future__ import absolute_import, division, print_function
 from unittest import TestCase, main
 import numpy as np
 import numpy.testing as npt
+from scipy.sparse import csr_matrix
+
+import skbio.stats.composition as composition
 from skbio.stats.composition import (closure, multiplicative_replacement,
                                      perturb, perturb_inv, power, inner,
                                      clr, clr_inv, ilr, ilr_inv,
-                                     centralize)
+                                     centralize, _gram_schmidt_basis)
 
 
 class CompositionTests(TestCase):
@@ -263,6 +266,12 @@ class CompositionTests(TestCase):
         with self.assertRaises(ValueError):
             centralize(self.bad2)
 
+        # no compositions
+        npt.assert_array_equal(centralize(np.empty((0, 3))),
+                               np.empty((0, 3)))
+        out = np.empty((0, 3))
+        self.assertIs(centralize(np.empty((0, 3)), out=out), out)
+
         # make sure that inplace modification is not occurring
         centralize(self.cdata1)
         npt.assert_allclose(self.cdata1,
@@ -303,5 +312,82 @@ class CompositionTests(TestCase):
                             np.array([[2, 2, 6],
                                       [4, 4, 2]]))
 
+    def test_ilr_implicit_basis(self):
+        mat = multiplicative_replacement(self.cdata3)
+        basis = clr_inv(_gram_schmidt_basis(5))
+        npt.assert_allclose(ilr(mat), ilr(mat, basis=basis))
+        coords = ilr(mat)
+        npt.assert_allclose(ilr_inv(coords),
+                            ilr_inv(coords, basis=_gram_schmidt_basis(5),
+                                    check=False))
+        npt.assert_allclose(ilr_inv(coords), mat)
+
+    def test_out(self):
+        mat = closure(self.cdata1)
+        for func in (closure, multiplicative_replacement, clr, clr_inv,
+                     centralize):
+            exp = func(mat)
+            out = np.empty((2, 3))
+            obs = func(mat, out=out)
+            self.assertIs(obs, out)
+            npt.assert_allclose(out, exp)
+
+            # in place
+            inplace = mat.copy()
+            func(inplace, out=inplace)
+            npt.assert_allclose(inplace, exp)
+
+        out = np.empty(2)
+        self.assertIs(ilr(self.cdata2, out=out), out)
+        npt.assert_allclose(out, ilr(self.cdata2))
+        out = np.empty(3)
+        self.assertIs(ilr_inv(np.ones(2), out=out), out)
+        npt.assert_allclose(out, ilr_inv(np.ones(2)))
+
+        with self.assertRaises(ValueError):
+            clr(self.cdata1, out=np.empty((3, 2)))
+        with self.assertRaises(ValueError):
+            ilr(self.cdata1, out=np.empty((2, 3)))
+
+    def test_blocks(self):
+        rs = np.random.RandomState(0)
+        mat = closure(rs.rand(25, 6) + 0.1)
+        basis = clr_inv(_gram_schmidt_basis(6))
+        exp = [func(mat) for func in (closure, multiplicative_replacement,
+                                      clr, clr_inv, ilr, centralize)]
+        exp.append(ilr(mat, basis=basis))
+        block_cells = composition._BLOCK_CELLS
+        try:
+            composition._BLOCK_CELLS = 12
+            obs = [func(mat) for func in (closure, multiplicative_replacement,
+                                          clr, clr_inv, ilr, centralize)]
+            obs.append(ilr(mat, basis=basis))
+        finally:
+            composition._BLOCK_CELLS = block_cells
+        for o, e in zip(obs, exp):
+            npt.assert_allclose(o, e)
+
+    def test_sparse(self):
+        mat = np.array(self.cdata3, dtype=float)
+        sparse = csr_matrix(mat)
+
+        obs = closure(sparse)
+        self.assertIsInstance(obs, csr_matrix)
+        npt.assert_allclose(obs.toarray(), closure(mat))
+        with self.assertRaises(ValueError):
+            closure(csr_matrix(self.bad1))
+        with self.assertRaises(ValueError):
+            closure(sparse, out=np.empty(mat.shape))
+
+        npt.assert_allclose(multiplicative_replacement(sparse),
+                            multiplicative_replacement(mat))
+        mat = multiplicative_replacement(mat)
+        sparse = csr_matrix(mat)
+        for func in clr, ilr, centralize:
+            npt.assert_allclose(func(sparse), func(mat))
+        with self.assertRaises(ValueError):
+            clr(csr_matrix(self.bad1))
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,164 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2013--, scikit-bio development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from __future__ import absolute_import, division, print_function
+
+from unittest import TestCase, main
+
+import numpy as np
+import numpy.testing as npt
+
+import skbio.stats._monte_carlo as _monte_carlo
+from skbio.stats._monte_carlo import _check_random_state, _run_monte_carlo
+
+
+def _uniform_stats(random_state, n):
+    return random_state.uniform(-1, 1, n)
+
+
+class CheckRandomStateTests(TestCase):
+    def test_none(self):
+        self.assertIs(_check_random_state(None), np.random.mtrand._rand)
+
+    def test_int(self):
+        obs = _check_random_state(42)
+        self.assertIsInstance(obs, np.random.RandomState)
+        self.assertEqual(obs.randint(1000),
+                         np.random.RandomState(42).randint(1000))
+
+    def test_random_state(self):
+        random_state = np.random.RandomState(0)
+        self.assertIs(_check_random_state(random_state), random_state)
+
+    def test_invalid(self):
+        with self.assertRaises(TypeError):
+            _check_random_state('42')
+
+
+class RunMonteCarloTests(TestCase):
+    def test_alternatives(self):
+        stats = np.array([-0.5, 0.1, 0.3, 0.6, -0.2])
+
+        def permuted_stats(random_state, n):
+            return stats
+
+        for alternative, exp in (('greater', 3 / 6), ('less', 5 / 6),
+                                 ('two-sided', 4 / 6)):
+            p_value, perm_stats = _run_monte_carlo(
+                0.3, permuted_stats, 5, alternative=alternative)
+            self.assertAlmostEqual(p_value, exp)
+            npt.assert_array_equal(perm_stats, stats)
+
+    def test_ties_within_floating_point_error(self):
+        p_value, _ = _run_monte_carlo(0.3, lambda rs, n: [0.1 + 0.2], 1)
+        self.assertEqual(p_value, 1.0)
+        p_value, _ = _run_monte_carlo(0.1 + 0.2, lambda rs, n: [0.3], 1,
+                                      alternative='less')
+        self.assertEqual(p_value, 1.0)
+
+    def test_close_values_are_not_ties(self):
+        # only rounding errors make ties, not relative differences of 1e-6
+        for alternative in 'greater', 'two-sided':
+            p_value, _ = _run_monte_carlo(0.3, lambda rs, n: [0.3 - 3e-7], 1,
+                                          alternative=alternative)
+            self.assertEqual(p_value, 0.5)
+        p_value, _ = _run_monte_carlo(0.3, lambda rs, n: [0.3 + 3e-7], 1,
+                                      alternative='less')
+        self.assertEqual(p_value, 0.5)
+
+    def test_batches(self):
+        sizes = []
+
+        def permuted_stats(random_state, n):
+            sizes.append(n)
+            return np.zeros(n)
+
+        batch_size = _monte_carlo._PERMUTATION_BATCH_SIZE
+        try:
+            _monte_carlo._PERMUTATION_BATCH_SIZE = 4
+            p_value, perm_stats = _run_monte_carlo(1, permuted_stats, 10)
+        finally:
+            _monte_carlo._PERMUTATION_BATCH_SIZE = batch_size
+        self.assertEqual(sizes, [4, 4, 2])
+        self.assertEqual(len(perm_stats), 10)
+        self.assertEqual(p_value, 1 / 11)
+
+    def test_global_random_state(self):
+        np.random.seed(0)
+        obs = _run_monte_carlo(0.5, _uniform_stats, 250)
+        np.random.seed(0)
+        exp = np.random.uniform(-1, 1, 250)
+        npt.assert_array_equal(obs[1], exp)
+        self.assertEqual(obs[0], ((exp >= 0.5).sum() + 1) / 251)
+
+    def test_seed_reproducible_across_n_jobs(self):
+        exp = _run_monte_carlo(0.5, _uniform_stats, 250, seed=42)
+        for n_jobs in 1, 2, 3:
+            for seed in 42, np.random.RandomState(42):
+                obs = _run_monte_carlo(0.5, _uniform_stats, 250, seed=seed,
+                                       n_jobs=n_jobs)
+                self.assertEqual(obs[0], exp[0])
+                npt.assert_array_equal(obs[1], exp[1])
+
+    def test_batches_use_independent_streams(self):
+        _, perm_stats = _run_monte_carlo(0.5, _uniform_stats, 200, seed=42)
+        self.assertFalse(np.array_equal(perm_stats[:100], perm_stats[100:]))
+
+    def test_seeded_global_random_state_with_threads(self):
+        np.random.seed(0)
+        exp = _run_monte_carlo(0.5, _uniform_stats, 250, n_jobs=2)
+        np.random.seed(0)
+        obs = _run_monte_carlo(0.5, _uniform_stats, 250, n_jobs=3)
+        npt.assert_array_equal(obs[1], exp[1])
+
+    def test_precision(self):
+        # the p-value is resolved as soon as the first batch shows that it is
+        # large
+        p_value, perm_stats = _run_monte_carlo(
+            -1, lambda rs, n: np.zeros(n), 999, precision=0.05)
+        self.assertEqual(len(perm_stats), 100)
+        self.assertEqual(p_value, 1.0)
+
+        # stopping doesn't depend on the number of threads
+        exp = _run_monte_carlo(0.9, _uniform_stats, 5000, seed=0,
+                               precision=0.005)
+        self.assertLess(len(exp[1]), 5000)
+        for n_jobs in 2, 4:
+            obs = _run_monte_carlo(0.9, _uniform_stats, 5000, seed=0,
+                                   n_jobs=n_jobs, precision=0.005)
+            self.assertEqual(obs[0], exp[0])
+            npt.assert_array_equal(obs[1], exp[1])
+
+        # never stops before the end if precision is not reached
+        p_value, perm_stats = _run_monte_carlo(
+            0.0, _uniform_stats, 500, seed=0, precision=0.001)
+        self.assertEqual(len(perm_stats), 500)
+
+    def test_no_permutations(self):
+        p_value, perm_stats = _run_monte_carlo(0.5, _uniform_stats, 0)
+        npt.assert_equal(p_value, np.nan)
+        self.assertEqual(perm_stats.shape, (0,))
+
+    def test_nan_stat(self):
+        p_value, perm_stats = _run_monte_carlo(np.nan, _uniform_stats, 10)
+        npt.assert_equal(p_value, np.nan)
+        self.assertEqual(perm_stats.shape, (0,))
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            _run_monte_carlo(0.5, _uniform_stats, -1)
+        with self.assertRaises(ValueError):
+            _run_monte_carlo(0.5, _uniform_stats, 10, alternative='foo')
+        with self.assertRaises(ValueError):
+            _run_monte_carlo(0.5, _uniform_stats, 10, precision=0)
+        with self.assertRaises(ValueError):
+            _run_monte_carlo(0.5, _uniform_stats, 10, n_jobs=0)
+
+
+if __name__ == '__main__':
+    main()
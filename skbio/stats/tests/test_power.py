@@ -21,10 +21,12 @@ from skbio.stats.power import (subsample_power,
                                confidence_bound,
                                _calculate_power,
                                _compare_distributions,
+                               _draw_subsample_indices,
                                _calculate_power_curve,
                                _check_subsample_power_inputs,
-                               _identify_sample_groups,
-                               _draw_paired_samples,
+                               _index_sample_groups,
+                               _choose_without_replacement,
+                               _draw_indexed_samples,
                                _get_min_size,
                                bootstrap_power_curve,
                                paired_subsamples
@@ -92,9 +94,6 @@ class PowerAnalysisTest(TestCase):
                 'NR': {'INT': 'Y', 'ABX': 'Y', 'DIV': 15.7, 'AGE': '20s',
                        'SEX': 'F'}}
         self.meta = pd.DataFrame.from_dict(meta, orient='index')
-        self.meta_pairs = {0: [['GW', 'SR', 'TS'], ['CB', 'LF', 'PC']],
-                           1: [['MM', 'PP', 'WM'], ['CD', 'MH', 'NR']]}
-        self.pair_index = np.array([0, 0, 0, 1, 1, 1])
         self.counts = np.array([5, 15, 25, 35, 45])
         self.powers = [np.array([[0.105, 0.137, 0.174, 0.208, 0.280],
                                  [0.115, 0.135, 0.196, 0.204, 0.281],
@@ -151,6 +150,16 @@ class PowerAnalysisTest(TestCase):
         self.assertEqual(test_p.shape, (5, 4, 2))
         npt.assert_array_equal(np.array([10, 20, 30, 40]), test_c)
 
+    def test_subsample_power_n_jobs(self):
+        np.random.seed(5)
+        known_p, known_c = subsample_power(self.f, self.pop, num_iter=10,
+                                           num_runs=5)
+        np.random.seed(5)
+        test_p, test_c = subsample_power(self.f, self.pop, num_iter=10,
+                                         num_runs=5, n_jobs=3)
+        npt.assert_array_equal(known_p, test_p)
+        npt.assert_array_equal(known_c, test_c)
+
     def test_subsample_paired_power(self):
         known_c = np.array([1, 2, 3, 4])
         # Sets up the handling values
@@ -296,6 +305,45 @@ class PowerAnalysisTest(TestCase):
         npt.assert_allclose(known_std, test.std(), rtol=0.1, atol=0.02)
         self.assertEqual(known_shape, test.shape)
 
+    def test__compare_distributions_matched_positions(self):
+        # matched observations are drawn at the same positions in every group
+        def f(x):
+            npt.assert_array_equal(x[0] * 2, x[1])
+            return 0.5
+
+        test = _compare_distributions(f, self.pop, 1, counts=10,
+                                      mode='matched', num_iter=20, n_jobs=2)
+        npt.assert_array_equal(test, np.ones(20) * 0.5)
+
+    def test__draw_subsample_indices(self):
+        test = _draw_subsample_indices(10, 4, 5000)
+        self.assertEqual(test.shape, (5000, 4))
+        # positions are drawn without replacement
+        self.assertTrue(all(len(set(row)) == 4 for row in test))
+        # and each position is equally likely
+        freqs = np.bincount(test.ravel(), minlength=10) / test.size
+        npt.assert_allclose(freqs, 0.1, atol=0.01)
+
+        self.assertEqual(_draw_subsample_indices(10, 0, 3).shape, (3, 0))
+        npt.assert_array_equal(np.sort(_draw_subsample_indices(5, 5, 2)),
+                               [np.arange(5)] * 2)
+
+    def test__draw_subsample_indices_blocks(self):
+        import skbio.stats.power as power
+        block_cells = power._DRAW_BLOCK_CELLS
+        try:
+            power._DRAW_BLOCK_CELLS = 25
+            np.random.seed(0)
+            test = _draw_subsample_indices(10, 3, 7)
+        finally:
+            power._DRAW_BLOCK_CELLS = block_cells
+        self.assertEqual(test.shape, (7, 3))
+        self.assertTrue(((test >= 0) & (test < 10)).all())
+
+    def test__draw_subsample_indices_error(self):
+        with self.assertRaises(ValueError):
+            _draw_subsample_indices(3, 4, 10)
+
     def test__compare_distributions_draw_mode(self):
         draw_mode = 'Ultron'
         with self.assertRaises(ValueError):
@@ -403,6 +451,20 @@ class PowerAnalysisTest(TestCase):
         # Checks the samples returned sanely
         npt.assert_allclose(test, known, rtol=0.1, atol=0.1)
 
+    def test__calculate_power_curve_alphas_share_draws(self):
+        np.random.seed(5)
+        test = _calculate_power_curve(self.f, self.pop, self.num_samps,
+                                      alpha=self.alpha, num_iter=100)
+        self.assertEqual(test.shape, (4, 9))
+        # the same p values are compared to every critical value, so power
+        # never increases as the critical value decreases
+        self.assertTrue((np.diff(test, axis=0) <= 0).all())
+
+        np.random.seed(5)
+        known = _calculate_power_curve(self.f, self.pop, self.num_samps,
+                                       alpha=self.alpha[1], num_iter=100)
+        npt.assert_array_equal(test[1], known)
+
     def test_bootstrap_power_curve(self):
         # Sets the known values
         known_mean = np.array([0.500, 0.82, 0.965, 0.995, 1.000, 1.000,
@@ -476,7 +538,16 @@ class PowerAnalysisTest(TestCase):
         self.assertEqual(set(test_array[0]), known_array[0])
         self.assertEqual(set(test_array[1]), known_array[1])
 
-    def test__identify_sample_groups(self):
+    def _pairs(self, sample_index):
+        # the ids of each group in each stratum
+        return {stratum: [sorted(sample_index.ids[members[start:start + size]])
+                          for members, start, size in zip(
+                              sample_index.members,
+                              sample_index.starts[:, stratum],
+                              sample_index.sizes[:, stratum])]
+                for stratum in range(sample_index.sizes.shape[1])}
+
+    def test__index_sample_groups(self):
         # Defines the know values
         known_pairs = {0: [['MM'], ['CD']],
                        1: [['SR'], ['LF']],
@@ -485,41 +556,106 @@ class PowerAnalysisTest(TestCase):
                        4: [['PP'], ['MH']],
                        5: [['WM'], ['NR']]}
         known_index = np.array([0, 1, 2, 3, 4, 5])
-        test_pairs, test_index = _identify_sample_groups(self.meta,
-                                                         'INT',
-                                                         ['SEX', 'AGE'],
-                                                         order=['N', 'Y'],
-                                                         strict_match=True)
+        test_index = _index_sample_groups(self.meta,
+                                          'INT',
+                                          ['SEX', 'AGE'],
+                                          order=['N', 'Y'],
+                                          strict_match=True)
+        test_pairs = self._pairs(test_index)
         self.assertEqual(known_pairs.keys(), test_pairs.keys())
         self.assertEqual(sorted(known_pairs.values()),
                          sorted(test_pairs.values()))
-        npt.assert_array_equal(known_index, test_index)
+        npt.assert_array_equal(known_index, test_index.slots)
 
-    def test__identify_sample_groups_not_strict(self):
+    def test__index_sample_groups_not_strict(self):
         # Defines the know values
         known_pairs = {0: [['PP'], ['CD', 'NR']],
                        1: [['MM', 'WM'], ['MH']],
                        2: [['GW'], ['CB']]}
         known_index = np.array([0, 1, 2])
-        test_pairs, test_index = _identify_sample_groups(self.meta,
-                                                         'INT',
-                                                         ['SEX', 'ABX'],
-                                                         order=['N', 'Y'],
-                                                         strict_match=False)
+        test_index = _index_sample_groups(self.meta,
+                                          'INT',
+                                          ['SEX', 'ABX'],
+                                          order=['N', 'Y'],
+                                          strict_match=False)
+        test_pairs = self._pairs(test_index)
         self.assertEqual(known_pairs.keys(), test_pairs.keys())
         self.assertEqual(sorted(known_pairs.values()),
                          sorted(test_pairs.values()))
-        npt.assert_array_equal(known_index, test_index)
+        npt.assert_array_equal(known_index, test_index.slots)
+
+        # the stratum with a missing value is dropped when matching strictly
+        test_index = _index_sample_groups(self.meta,
+                                          'INT',
+                                          ['SEX', 'ABX'],
+                                          order=['N', 'Y'],
+                                          strict_match=True)
+        self.assertEqual(sorted(self._pairs(test_index).values()),
+                         sorted(known_pairs.values())[1:])
+
+    def test__index_sample_groups_slots(self):
+        # each stratum has as many slots as its smallest group
+        test_index = _index_sample_groups(self.meta,
+                                          'INT',
+                                          ['ABX'],
+                                          order=['N', 'Y'],
+                                          strict_match=True)
+        npt.assert_array_equal(test_index.sizes, [[2, 3], [3, 2]])
+        npt.assert_array_equal(test_index.slots, [0, 0, 1, 1])
+
+    def test__choose_without_replacement(self):
+        for count in 0, 3, 8, 10:
+            test = _choose_without_replacement(10, count)
+            self.assertEqual(len(test), count)
+            self.assertEqual(len(set(test)), count)
+            self.assertTrue(((test >= 0) & (test < 10)).all())
+        with self.assertRaises(ValueError):
+            _choose_without_replacement(3, 4)
+
+        # each integer is equally likely
+        freqs = np.bincount(np.hstack([_choose_without_replacement(20, 3)
+                                       for _ in range(5000)]), minlength=20)
+        npt.assert_allclose(freqs / freqs.sum(), 0.05, atol=0.01)
 
-    def test__draw_paired_samples(self):
+    def test__draw_indexed_samples(self):
         num_samps = 3
         known_sets = [{'GW', 'SR', 'TS', 'MM', 'PP', 'WM'},
                       {'CB', 'LF', 'PC', 'CD', 'MH', 'NR'}]
-        test_samps = _draw_paired_samples(self.meta_pairs, self.pair_index,
-                                          num_samps)
+        sample_index = _index_sample_groups(self.meta, 'INT', ['SEX', 'AGE'],
+                                            order=['N', 'Y'],
+                                            strict_match=True)
+        test_samps = _draw_indexed_samples(sample_index, num_samps)
         for i, t in enumerate(test_samps):
+            self.assertEqual(len(t), num_samps)
             self.assertTrue(set(t).issubset(known_sets[i]))
 
+    def test__draw_indexed_samples_matched(self):
+        # drawn ids at the same position are from the same stratum, and each
+        # sample of a stratum is equally likely to be drawn
+        sample_index = _index_sample_groups(self.meta, 'INT', ['ABX'],
+                                            order=['N', 'Y'],
+                                            strict_match=True)
+        abx = self.meta['ABX']
+        drawn = []
+        for _ in range(3000):
+            test_samps = _draw_indexed_samples(sample_index, 4)
+            npt.assert_array_equal(abx[test_samps[0]].values,
+                                   abx[test_samps[1]].values)
+            for group in test_samps:
+                self.assertEqual(len(set(group)), 4)
+            drawn.extend(test_samps[0])
+        # two of the three samples in the group are drawn every time
+        freqs = pd.Series(drawn).value_counts()[['PP', 'SR', 'TS']] / 3000
+        npt.assert_allclose(freqs, 2 / 3, atol=0.03)
+
+    def test__draw_indexed_samples_empty(self):
+        sample_index = _index_sample_groups(self.meta, 'ABX',
+                                            ['SEX', 'AGE', 'INT'],
+                                            order=['N', 'Y'],
+                                            strict_match=True)
+        test_samps = _draw_indexed_samples(sample_index, 3)
+        npt.assert_array_equal(test_samps, [np.array([]), np.array([])])
+
 
 if __name__ == '__main__':
     main()
@@ -11,9 +11,11 @@ from __future__ import absolute_import, division, print_function
 from unittest import TestCase, main
 
 import numpy as np
+import pandas as pd
+import pandas.util.testing as pdt
 
-from skbio.stats.spatial import (procrustes, _get_disparity, _center,
-                                 _normalize)
+from skbio.stats.spatial import (procrustes, protest, _get_disparity,
+                                 _center, _normalize)
 
 
 class ProcrustesTests(TestCase):
@@ -142,5 +144,92 @@ class ProcrustesTests(TestCase):
     # and test_procrustes() tests it implicitly.
 
 
+class ProtestTests(TestCase):
+    def setUp(self):
+        rs = np.random.RandomState(0)
+        self.reference = rs.randn(20, 3)
+        # a rotated, scaled and noisy copy of the reference
+        rotation = np.linalg.qr(rs.randn(3, 3))[0]
+        self.ordination = (2 * self.reference.dot(rotation) +
+                           0.3 * rs.randn(20, 3))
+        self.unrelated = rs.randn(20, 2)
+
+    def test_statistic(self):
+        obs = protest(self.reference, self.ordination, permutations=0)
+        _, _, disparity = procrustes(self.reference, self.ordination)
+        np.testing.assert_almost_equal(obs['disparity'], disparity)
+        np.testing.assert_almost_equal(obs['test statistic'],
+                                       np.sqrt(1 - disparity))
+        self.assertEqual(obs['sample size'], 20)
+        np.testing.assert_equal(obs['p-value'], np.nan)
+        self.assertEqual(obs['number of permutations'], 0)
+
+    def test_different_number_of_columns(self):
+        # padding with columns of zeros doesn't change the fit
+        padded = np.hstack((self.unrelated, np.zeros((20, 1))))
+        _, _, disparity = procrustes(self.reference, padded)
+        obs = protest(self.reference, self.unrelated, permutations=0)
+        np.testing.assert_almost_equal(obs['disparity'], disparity)
+
+    def test_p_value(self):
+        obs = protest(self.reference, self.ordination, seed=0)
+        self.assertEqual(obs['p-value'], 1 / 1000)
+        self.assertEqual(obs['number of permutations'], 999)
+
+        obs = protest(self.reference, self.unrelated, seed=0)
+        self.assertGreater(obs['p-value'], 0.05)
+
+    def test_permuted_statistics(self):
+        # compare with procrustes on explicitly permuted rows
+        rs = np.random.RandomState(42)
+        perms = [rs.permutation(20) for _ in range(20)]
+        padded = np.hstack((self.unrelated, np.zeros((20, 1))))
+        exp = [np.sqrt(1 - procrustes(self.reference[perm], padded)[2])
+               for perm in perms]
+        stat = protest(self.reference, self.unrelated,
+                       permutations=0)['test statistic']
+        # permutations are drawn in order from the global random state
+        np.random.seed(42)
+        obs = protest(self.reference, self.unrelated, permutations=20)
+        self.assertEqual(obs['p-value'],
+                         (np.sum(np.array(exp) >= stat - 1e-9) + 1) / 21)
+
+    def test_seed_reproducible_across_n_jobs(self):
+        exp = protest(self.reference, self.unrelated, permutations=250,
+                      seed=42)
+        for n_jobs in 2, 3:
+            obs = protest(self.reference, self.unrelated, permutations=250,
+                          seed=42, n_jobs=n_jobs)
+            pdt.assert_series_equal(obs, exp)
+
+    def test_batch(self):
+        ordinations = [self.ordination, self.unrelated, self.ordination]
+        obs = protest(self.reference, ordinations, permutations=99, seed=0)
+        self.assertIsInstance(obs, pd.DataFrame)
+        self.assertEqual(len(obs), 3)
+        for i, ordination in enumerate(ordinations):
+            single = protest(self.reference, ordination, permutations=0)
+            np.testing.assert_almost_equal(obs['test statistic'][i],
+                                           single['test statistic'])
+        self.assertEqual(list(obs['number of permutations']), [99] * 3)
+
+        # a 3-D array of ordinations
+        obs_array = protest(self.reference,
+                            np.array([self.ordination, self.ordination]),
+                            permutations=99, seed=0)
+        np.testing.assert_almost_equal(obs_array['test statistic'].values,
+                                       obs['test statistic'].values[[0, 2]])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            protest(self.reference, self.unrelated[:-1])
+        with self.assertRaises(ValueError):
+            protest(self.reference, np.ones((20, 2)))
+        with self.assertRaises(ValueError):
+            protest(np.zeros((0, 2)), np.zeros((0, 2)))
+        with self.assertRaises(ValueError):
+            protest(self.reference, self.unrelated, permutations=-1)
+
+
 if __name__ == '__main__':
     main()
@@ -7,38 +7,23 @@
 # ----------------------------------------------------------------------------
 
 from __future__ import absolute_import, division, print_function
-try:
-    # future >= 0.12
-    from future.backports.test.support import import_fresh_module
-except ImportError:
-    from future.standard_library.test.support import import_fresh_module
 
 import unittest
-import warnings
 
 import numpy as np
 import numpy.testing as npt
+from scipy.sparse import csr_matrix, issparse
+from scipy.stats import chisquare
 
-from skbio.stats import isubsample
+import skbio.stats._subsample as subsample
+from skbio.diversity.alpha import observed_otus, shannon
+from skbio.stats import isubsample, rarefy_table, rarefaction_curve
+from skbio.stats._subsample import _subsample_counts_without_replacement
 
 
-cy_subsample = import_fresh_module('skbio.stats._subsample',
-                                   fresh=['skbio.stats.__subsample'])
-py_subsample = import_fresh_module('skbio.stats._subsample',
-                                   blocked=['skbio.stats.__subsample'])
+class SubsampleCountsTests(unittest.TestCase):
+    module = subsample
 
-
-def setup():
-    """Ignore warnings during tests."""
-    warnings.simplefilter("ignore")
-
-
-def teardown():
-    """Clear the list of warning filters, so that no filters are active."""
-    warnings.resetwarnings()
-
-
-class SubsampleCountsTests(object):
     def test_subsample_counts_nonrandom(self):
         a = np.array([0, 5, 0])
 
@@ -122,46 +107,233 @@ class SubsampleCountsTests(object):
         with self.assertRaises(ValueError):
             self.module.subsample_counts([0, 5, 0], 6)
 
+    def test_subsample_counts_without_replacement_distribution(self):
+        # the item of the last feature is kept in two of the three possible
+        # pairs of items
+        a = np.array([2, 0, 1])
+        outcomes = {(1, 0, 1): 0, (2, 0, 0): 0}
+        np.random.seed(0)
+        for i in range(3000):
+            outcomes[tuple(self.module.subsample_counts(a, 2))] += 1
+        self.assertGreater(chisquare([outcomes[(1, 0, 1)],
+                                      outcomes[(2, 0, 0)]], [2000, 1000])[1],
+                           0.001)
+
+        # the subsampled count of each feature follows a hypergeometric
+        # distribution
+        a = np.array([5, 0, 20, 1, 30, 7, 0, 12, 2, 3])
+        obs = np.array([self.module.subsample_counts(a, 20)
+                        for i in range(2000)])
+        self.assertTrue((obs.sum(axis=1) == 20).all())
+        self.assertTrue((obs <= a).all())
+        npt.assert_allclose(obs.mean(axis=0), a * 20 / a.sum(), atol=0.15)
+        exp_var = (20 * a / a.sum() * (1 - a / a.sum()) *
+                   (a.sum() - 20) / (a.sum() - 1))
+        npt.assert_allclose(obs.var(axis=0), exp_var, rtol=0.15, atol=0.01)
+
+    def test_subsample_counts_without_replacement_large(self):
+        # the cost does not depend on the number of items
+        a = np.array([10 ** 12, 3, 0, 10 ** 11, 10 ** 9])
+        obs = self.module.subsample_counts(a, 10 ** 10)
+        self.assertEqual(obs.sum(), 10 ** 10)
+        self.assertTrue((obs <= a).all())
+
+    def test_subsample_counts_without_replacement_seed(self):
+        a = np.arange(100)
+        exp = _subsample_counts_without_replacement(a, 500, 42)
+        for seed in 42, np.random.RandomState(42):
+            npt.assert_equal(
+                _subsample_counts_without_replacement(a, 500, seed), exp)
+        self.assertEqual(exp.sum(), 500)
+
+
+class RarefyTableTests(unittest.TestCase):
+    def setUp(self):
+        rs = np.random.RandomState(0)
+        self.counts = rs.poisson(rs.rand(150, 40) * 3)
+        self.counts[5] = 0
+        self.depth = np.sort(self.counts.sum(axis=1))[20]
+
+    def test_dense(self):
+        obs, ids = rarefy_table(self.counts, self.depth, seed=42)
+        exp_ids = np.flatnonzero(self.counts.sum(axis=1) >= self.depth)
+        npt.assert_equal(ids, exp_ids)
+        self.assertEqual(obs.shape, (len(exp_ids), 40))
+        self.assertTrue((obs.sum(axis=1) == self.depth).all())
+        self.assertTrue((obs <= self.counts[exp_ids]).all())
+
+        # samples with exactly depth items are unchanged
+        equal = self.counts[exp_ids].sum(axis=1) == self.depth
+        self.assertTrue(equal.any())
+        npt.assert_equal(obs[equal], self.counts[exp_ids][equal])
+
+    def test_sparse(self):
+        exp, exp_ids = rarefy_table(self.counts, self.depth, seed=42)
+        obs, ids = rarefy_table(csr_matrix(self.counts), self.depth, seed=42)
+        self.assertTrue(issparse(obs))
+        npt.assert_equal(obs.toarray(), exp)
+        npt.assert_equal(ids, exp_ids)
+        self.assertTrue((obs.data > 0).all())
+
+    def test_reproducible_across_n_jobs_and_blocks(self):
+        exp = rarefy_table(self.counts, self.depth, seed=42)
+        block_rows = subsample._RAREFY_BLOCK_ROWS
+        try:
+            for rows in 1, 7, 1000:
+                subsample._RAREFY_BLOCK_ROWS = rows
+                for n_jobs in 1, 3:
+                    for seed in 42, np.random.RandomState(42):
+                        obs = rarefy_table(self.counts, self.depth,
+                                           n_jobs=n_jobs, seed=seed)
+                        npt.assert_equal(obs[0], exp[0])
+                        npt.assert_equal(obs[1], exp[1])
+        finally:
+            subsample._RAREFY_BLOCK_ROWS = block_rows
+
+        np.random.seed(0)
+        obs = rarefy_table(self.counts, self.depth)
+        np.random.seed(0)
+        npt.assert_equal(rarefy_table(self.counts, self.depth)[0], obs[0])
+        self.assertFalse(np.array_equal(obs[0], exp[0]))
+
+    def test_samples_independent_of_other_samples(self):
+        # the subsample of a sample does not depend on which other samples
+        # are dropped
+        exp, exp_ids = rarefy_table(self.counts, self.depth, seed=42)
+        counts = self.counts.copy()
+        counts[exp_ids[0]] = 0
+        obs, ids = rarefy_table(counts, self.depth, seed=42)
+        npt.assert_equal(obs, exp[1:])
+
+    def test_ids(self):
+        ids = ['S%d' % i for i in range(150)]
+        obs, obs_ids = rarefy_table(self.counts, self.depth, ids=ids, seed=1)
+        exp, exp_ids = rarefy_table(self.counts, self.depth, seed=1)
+        npt.assert_equal(obs, exp)
+        self.assertEqual(list(obs_ids), [ids[i] for i in exp_ids])
+
+    def test_no_samples_kept(self):
+        for counts in self.counts, csr_matrix(self.counts):
+            obs, ids = rarefy_table(counts, 10 ** 6)
+            self.assertEqual(obs.shape, (0, 40))
+            self.assertEqual(len(ids), 0)
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            rarefy_table(self.counts, -1)
+        with self.assertRaises(TypeError):
+            rarefy_table([[1, 2.5]], 1)
+        with self.assertRaises(ValueError):
+            rarefy_table([1, 2, 3], 1)
+        with self.assertRaises(ValueError):
+            rarefy_table([[1, -2, 3]], 1)
+        with self.assertRaises(ValueError):
+            rarefy_table(csr_matrix([[1, -2, 3]]), 1)
+        with self.assertRaises(ValueError):
+            rarefy_table(self.counts, 1, ids=['a', 'b'])
 
-class PySubsampleCountsTests(SubsampleCountsTests, unittest.TestCase):
-    module = py_subsample
 
+class RarefactionCurveTests(unittest.TestCase):
+    def setUp(self):
+        rs = np.random.RandomState(0)
+        self.counts = rs.poisson(rs.rand(6, 30) * 4)
+        self.depths = [40, 5, 20]
+
+    def test_1d(self):
+        counts = self.counts[0]
+        obs = rarefaction_curve(counts, self.depths,
+                                ['observed_otus', shannon, len],
+                                iterations=7, seed=0)
+        self.assertEqual(obs.shape, (3, 7, 3))
+        # the length of a subsample is the number of features
+        npt.assert_equal(obs[:, :, 2], len(counts))
+        self.assertTrue((obs[1:, :, 0] <= [[5], [20]]).all())
+        # deeper subsamples are nested supersets of shallower ones
+        self.assertTrue((obs[0, :, 0] >= obs[2, :, 0]).all())
+        self.assertTrue((obs[2, :, 0] >= obs[1, :, 0]).all())
+
+    def test_depth_equal_to_total(self):
+        counts = self.counts[0]
+        total = counts.sum()
+        obs = rarefaction_curve(counts, [total, total + 1],
+                                [observed_otus, shannon], iterations=3)
+        npt.assert_almost_equal(obs[0], [[observed_otus(counts),
+                                          shannon(counts)]] * 3)
+        self.assertTrue(np.isnan(obs[1]).all())
+
+    def test_nested_subsample_distribution(self):
+        # shallow subsamples drawn from deeper ones are subsamples of the
+        # original counts: the expected count of each feature is unchanged
+        counts = np.array([50, 30, 15, 5])
+        obs = rarefaction_curve(counts, [80, 10], [lambda c: c[0]],
+                                iterations=4000, seed=0)
+        npt.assert_almost_equal(obs[:, :, 0].mean(axis=1) / [80, 10], 0.5,
+                                decimal=2)
+
+    def test_2d_reproducible_across_n_jobs(self):
+        exp = rarefaction_curve(self.counts, self.depths, ['shannon'],
+                                iterations=4, seed=42)
+        self.assertEqual(exp.shape, (6, 3, 4, 1))
+        for n_jobs in 1, 3:
+            for seed in 42, np.random.RandomState(42):
+                obs = rarefaction_curve(self.counts, self.depths,
+                                        ['shannon'], iterations=4,
+                                        n_jobs=n_jobs, seed=seed)
+                npt.assert_equal(obs, exp)
+
+        np.random.seed(0)
+        obs = rarefaction_curve(self.counts, self.depths, ['shannon'])
+        np.random.seed(0)
+        npt.assert_equal(
+            rarefaction_curve(self.counts, self.depths, ['shannon']), obs)
 
-@unittest.skipIf(cy_subsample is None,
-                 "Accelerated subsample module unavailable.")
-class CySubsampleCountsTests(SubsampleCountsTests, unittest.TestCase):
-    module = cy_subsample
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            rarefaction_curve(self.counts, [0, 5], ['shannon'])
+        with self.assertRaises(ValueError):
+            rarefaction_curve(self.counts, [5], [])
+        with self.assertRaises(ValueError):
+            rarefaction_curve(self.counts, [5], ['foo'])
+        with self.assertRaises(ValueError):
+            rarefaction_curve(self.counts, [5], ['shannon'], iterations=0)
+        with self.assertRaises(ValueError):
+            rarefaction_curve([1, -2, 3], [1], ['shannon'])
+        with self.assertRaises(ValueError):
+            rarefaction_curve(np.ones((2, 2, 2), dtype=int), [1],
+                              ['shannon'])
+        with self.assertRaises(TypeError):
+            rarefaction_curve([1, 2.5], [1], ['shannon'])
 
 
 class ISubsampleTests(unittest.TestCase):
     def setUp(self):
         np.random.seed(123)
 
-        # comment indicates the expected random value
         self.sequences = [
-            ('a_1', 'AATTGGCC-a1'),  # 2, 3624216819017203053
-            ('a_2', 'AATTGGCC-a2'),  # 5, 5278339153051796802
-            ('b_1', 'AATTGGCC-b1'),  # 4, 4184670734919783522
-            ('b_2', 'AATTGGCC-b2'),  # 0, 946590342492863505
-            ('a_4', 'AATTGGCC-a4'),  # 3, 4048487933969823850
-            ('a_3', 'AATTGGCC-a3'),  # 7, 7804936597957240377
-            ('c_1', 'AATTGGCC-c1'),  # 8, 8868534167180302049
-            ('a_5', 'AATTGGCC-a5'),  # 1, 3409506807702804593
-            ('c_2', 'AATTGGCC-c2'),  # 9, 8871627813779918895
-            ('c_3', 'AATTGGCC-c3')   # 6, 7233291490207274528
+            ('a_1', 'AATTGGCC-a1'),
+            ('a_2', 'AATTGGCC-a2'),
+            ('b_1', 'AATTGGCC-b1'),
+            ('b_2', 'AATTGGCC-b2'),
+            ('a_4', 'AATTGGCC-a4'),
+            ('a_3', 'AATTGGCC-a3'),
+            ('c_1', 'AATTGGCC-c1'),
+            ('a_5', 'AATTGGCC-a5'),
+            ('c_2', 'AATTGGCC-c2'),
+            ('c_3', 'AATTGGCC-c3')
         ]
 
     def mock_sequence_iter(self, items):
         return ({'SequenceID': sid, 'Sequence': seq} for sid, seq in items)
 
+    def sort_key(self, x):
+        return x[0], x[1]['SequenceID']
+
     def test_isubsample_simple(self):
         maximum = 10
 
         def bin_f(x):
             return x['SequenceID'].rsplit('_', 1)[0]
 
-        # note, the result here is sorted by sequence_id but is in heap order
-        # by the random values associated to each sequence
         exp = sorted([('a', {'SequenceID': 'a_5', 'Sequence': 'AATTGGCC-a5'}),
                       ('a', {'SequenceID': 'a_1', 'Sequence': 'AATTGGCC-a1'}),
                       ('a', {'SequenceID': 'a_4', 'Sequence': 'AATTGGCC-a4'}),
@@ -172,10 +344,10 @@ class ISubsampleTests(unittest.TestCase):
                       ('c', {'SequenceID': 'c_3', 'Sequence': 'AATTGGCC-c3'}),
                       ('c', {'SequenceID': 'c_2', 'Sequence': 'AATTGGCC-c2'}),
                       ('c', {'SequenceID': 'c_1', 'Sequence': 'AATTGGCC-c1'})],
-                     key=lambda x: x[0])
+                     key=self.sort_key)
         obs = isubsample(self.mock_sequence_iter(self.sequences), maximum,
                          bin_f=bin_f)
-        self.assertEqual(sorted(obs, key=lambda x: x[0]), exp)
+        self.assertEqual(sorted(obs, key=self.sort_key), exp)
 
     def test_per_sample_sequences_min_seqs(self):
         maximum = 10
@@ -184,8 +356,6 @@ class ISubsampleTests(unittest.TestCase):
         def bin_f(x):
             return x['SequenceID'].rsplit('_', 1)[0]
 
-        # note, the result here is sorted by sequence_id but is in heap order
-        # by the random values associated to each sequence
         exp = sorted([('a', {'SequenceID': 'a_5', 'Sequence': 'AATTGGCC-a5'}),
                       ('a', {'SequenceID': 'a_1', 'Sequence': 'AATTGGCC-a1'}),
                       ('a', {'SequenceID': 'a_4', 'Sequence': 'AATTGGCC-a4'}),
@@ -194,10 +364,10 @@ class ISubsampleTests(unittest.TestCase):
                       ('c', {'SequenceID': 'c_3', 'Sequence': 'AATTGGCC-c3'}),
                       ('c', {'SequenceID': 'c_2', 'Sequence': 'AATTGGCC-c2'}),
                       ('c', {'SequenceID': 'c_1', 'Sequence': 'AATTGGCC-c1'})],
-                     key=lambda x: x[0])
+                     key=self.sort_key)
         obs = isubsample(self.mock_sequence_iter(self.sequences), maximum,
                          minimum, bin_f=bin_f)
-        self.assertEqual(sorted(obs, key=lambda x: x[0]), exp)
+        self.assertEqual(sorted(obs, key=self.sort_key), exp)
 
     def test_per_sample_sequences_complex(self):
         maximum = 2
@@ -205,16 +375,59 @@ class ISubsampleTests(unittest.TestCase):
         def bin_f(x):
             return x['SequenceID'].rsplit('_', 1)[0]
 
-        exp = sorted([('a', {'SequenceID': 'a_2', 'Sequence': 'AATTGGCC-a2'}),
-                      ('a', {'SequenceID': 'a_3', 'Sequence': 'AATTGGCC-a3'}),
+        exp = sorted([('a', {'SequenceID': 'a_1', 'Sequence': 'AATTGGCC-a1'}),
+                      ('a', {'SequenceID': 'a_4', 'Sequence': 'AATTGGCC-a4'}),
                       ('b', {'SequenceID': 'b_2', 'Sequence': 'AATTGGCC-b2'}),
                       ('b', {'SequenceID': 'b_1', 'Sequence': 'AATTGGCC-b1'}),
-                      ('c', {'SequenceID': 'c_1', 'Sequence': 'AATTGGCC-c1'}),
+                      ('c', {'SequenceID': 'c_3', 'Sequence': 'AATTGGCC-c3'}),
                       ('c', {'SequenceID': 'c_2', 'Sequence': 'AATTGGCC-c2'})],
-                     key=lambda x: x[0])
+                     key=self.sort_key)
         obs = isubsample(self.mock_sequence_iter(self.sequences), maximum,
                          bin_f=bin_f, buf_size=1)
-        self.assertEqual(sorted(obs, key=lambda x: x[0]), exp)
+        self.assertEqual(sorted(obs, key=self.sort_key), exp)
+
+    def test_seed(self):
+        def bin_f(x):
+            return x % 3
+
+        exp = sorted(isubsample(range(1000), 5, bin_f=bin_f, seed=42))
+        obs = isubsample(range(1000), 5, bin_f=bin_f,
+                         seed=np.random.RandomState(42))
+        self.assertEqual(sorted(obs), exp)
+
+        np.random.seed(0)
+        obs = sorted(isubsample(range(1000), 5))
+        np.random.seed(0)
+        self.assertEqual(sorted(isubsample(range(1000), 5)), obs)
+        self.assertNotEqual(sorted(isubsample(range(1000), 5)), obs)
+
+    def test_uniform(self):
+        random_state = np.random.RandomState(0)
+        for bin_f in None, lambda x: x % 2:
+            counts = np.zeros(40)
+            for _ in range(3000):
+                for _, item in isubsample(range(40), 4, bin_f=bin_f,
+                                          seed=random_state):
+                    counts[item] += 1
+            n_bins = 1 if bin_f is None else 2
+            self.assertEqual(counts.sum(), 3000 * 4 * n_bins)
+            self.assertGreater(chisquare(counts).pvalue, 0.01)
+
+    def test_only_sampled_items_copied(self):
+        class Item(object):
+            copies = 0
+
+            def __copy__(self):
+                Item.copies += 1
+                return self
+
+        items = [Item() for _ in range(10000)]
+        for bin_f in None, lambda x: True:
+            Item.copies = 0
+            obs = list(isubsample(items, 10, bin_f=bin_f, seed=0))
+            self.assertEqual(len(obs), 10)
+            # about 10 * (1 + log(10000 / 10)) items enter the reservoir
+            self.assertLess(Item.copies, 200)
 
     def test_min_gt_max(self):
         gen = isubsample([1, 2, 3], maximum=2, minimum=10)
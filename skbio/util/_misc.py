@@ -13,6 +13,8 @@ from os import remove, makedirs
 from os.path import exists, isdir
 from functools import partial
 from types import FunctionType
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 import inspect
 from ._decorator import experimental, deprecated
 
@@ -399,6 +401,41 @@ def flatten(items):
     return result
 
 
+def _resolve_n_jobs(n_jobs):
+    """Return the number of workers to use given an `n_jobs` argument.
+
+    `n_jobs` must be a positive integer, or -1 to use all available CPUs.
+
+    """
+    if n_jobs == -1:
+        return cpu_count()
+    if n_jobs < 1:
+        raise ValueError("`n_jobs` must be a positive integer or -1, not %r."
+                         % n_jobs)
+    return n_jobs
+
+
+def _parallel_map(func, iterable, n_jobs=1):
+    """Apply `func` to every item of `iterable`, optionally in parallel.
+
+    If `n_jobs` is greater than one, items are processed by a pool of threads.
+    This only results in a speedup if `func` spends most of its time in code
+    that releases the GIL (e.g., large NumPy operations or BLAS calls).
+    Results are returned as a list in the order of `iterable`.
+
+    """
+    n_jobs = _resolve_n_jobs(n_jobs)
+    if n_jobs == 1:
+        return [func(item) for item in iterable]
+
+    pool = ThreadPool(n_jobs)
+    try:
+        return pool.map(func, iterable)
+    finally:
+        pool.close()
+        pool.join()
+
+
 def _get_create_dir_error_codes():
     return {'NO_ERROR':      0,
             'DIR_EXISTS':    1,
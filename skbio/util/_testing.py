@@ -175,7 +175,7 @@ def assert_ordination_results_equal(left, right, ignore_method_names=False,
         Ignore differences in `biplot_scores` row and column labels.
     ignore_directionality : bool, optional
         Ignore differences in directionality (i.e., differences in signs) for
-        attributes `samples` and `features`.
+        attributes `samples`, `features` and `sample_constraints`.
 
     Raises
     ------
@@ -206,6 +206,7 @@ def assert_ordination_results_equal(left, right, ignore_method_names=False,
 
     _assert_frame_equal(left.sample_constraints, right.sample_constraints,
                         ignore_columns=ignore_axis_labels,
+                        ignore_directionality=ignore_directionality,
                         decimal=decimal)
 
     _assert_series_equal(left.eigvals, right.eigvals, ignore_axis_labels,
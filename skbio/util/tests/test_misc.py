@@ -21,7 +21,8 @@ from skbio.util import (cardinal_to_ordinal, safe_md5, remove_files,
                         create_dir, find_duplicates, flatten,
                         is_casava_v180_or_later)
 from skbio.util._misc import (
-    _handle_error_codes, MiniRegistry, chunk_str, resolve_key)
+    _handle_error_codes, MiniRegistry, chunk_str, resolve_key,
+    _resolve_n_jobs, _parallel_map)
 
 
 class TestMiniRegistry(unittest.TestCase):
@@ -271,6 +272,34 @@ class MiscTests(unittest.TestCase):
         self.assertEqual(flatten([1, [2, 3], [[4, [5]]]]), [1, 2, 3, [4, [5]]])
 
 
+class ParallelMapTests(unittest.TestCase):
+    def test_resolve_n_jobs(self):
+        self.assertEqual(_resolve_n_jobs(1), 1)
+        self.assertEqual(_resolve_n_jobs(4), 4)
+        self.assertGreaterEqual(_resolve_n_jobs(-1), 1)
+
+    def test_resolve_n_jobs_invalid(self):
+        for n_jobs in 0, -2:
+            with self.assertRaises(ValueError):
+                _resolve_n_jobs(n_jobs)
+
+    def test_parallel_map(self):
+        for n_jobs in 1, 2, -1:
+            self.assertEqual(_parallel_map(lambda x: x ** 2, range(10),
+                                           n_jobs=n_jobs),
+                             [x ** 2 for x in range(10)])
+
+    def test_parallel_map_empty(self):
+        self.assertEqual(_parallel_map(abs, [], n_jobs=2), [])
+
+    def test_parallel_map_error(self):
+        def f(x):
+            raise ZeroDivisionError()
+
+        with self.assertRaises(ZeroDivisionError):
+            _parallel_map(f, range(3), n_jobs=2)
+
+
 class CardinalToOrdinalTests(unittest.TestCase):
     def test_valid_range(self):
         # taken and modified from http://stackoverflow.com/a/20007730/3776794
@@ -97,6 +97,20 @@ class TestAssertOrdinationResultsEqual(unittest.TestCase):
         almost_minimal1.proportion_explained = None
         almost_minimal1.proportion_explained = None
 
+    def test_assert_ordination_results_equal_directionality(self):
+        minimal1 = OrdinationResults('foo', 'bar', pd.Series([1.0, 2.0]),
+                                     pd.DataFrame([[1, 2], [3, 4]]))
+        flipped = OrdinationResults('foo', 'bar', pd.Series([1.0, 2.0]),
+                                    pd.DataFrame([[-1, 2], [-3, 4]]))
+        for attr in 'features', 'sample_constraints':
+            setattr(minimal1, attr, pd.DataFrame([[1, 2], [3, 4]]))
+            setattr(flipped, attr, pd.DataFrame([[1, -2], [3, -4]]))
+
+        with npt.assert_raises(AssertionError):
+            assert_ordination_results_equal(minimal1, flipped)
+        assert_ordination_results_equal(minimal1, flipped,
+                                        ignore_directionality=True)
+
 
 class TestNormalizeSigns(unittest.TestCase):
     def test_shapes_and_nonarray_input(self):